@@ -0,0 +1,233 @@
+"""
+足球卡尔曼跟踪器 - 恒速模型
+在两次完整YOLO检测之间预测足球位置，并用局部模板匹配确认轨迹，
+使检测器可以跳过大部分帧（三脚架固定机位时效果最明显）
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from detection import Detection
+
+
+class BallTracker:
+    """
+    恒速卡尔曼滤波足球跟踪器
+
+    状态向量 [x, y, vx, vy]，观测为球心 [x, y]。
+    每帧先 predict，再由完整检测或局部搜索的结果 update。
+    """
+
+    def __init__(self, detect_interval: int = 5, max_position_std: float = 25.0,
+                 process_noise: float = 2000.0, measurement_noise: float = 3.0,
+                 search_sigma: float = 3.0, match_threshold: float = 0.6,
+                 max_missed: int = 3):
+        """
+        Args:
+            detect_interval: 每隔多少帧强制做一次完整检测
+            max_position_std: 位置标准差（像素）超过该值时立即做完整检测
+            process_noise: 加速度白噪声强度（像素/秒²）
+            measurement_noise: 观测噪声标准差（像素）
+            search_sigma: 局部搜索窗口覆盖的标准差倍数
+            match_threshold: 模板匹配接受阈值（归一化相关系数）
+            max_missed: 连续多少次完整检测未找到球后丢弃轨迹
+        """
+        self.detect_interval = detect_interval
+        self.max_position_std = max_position_std
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.search_sigma = search_sigma
+        self.match_threshold = match_threshold
+        self.max_missed = max_missed
+
+        self.H = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=np.float64)
+        self.R = np.eye(2) * measurement_noise ** 2
+
+        # 统计信息
+        self.stats = {'frames': 0, 'full_detections': 0, 'local_hits': 0, 'local_misses': 0,
+                      'confirmations': 0}
+        self.reset()
+
+    def reset(self):
+        """丢弃当前轨迹"""
+        self.initialized = False
+        self.x = np.zeros(4)
+        self.P = np.eye(4)
+        self.last_time = None
+        self.frames_since_detection = 0
+        self.missed_detections = 0
+        self.template = None
+        self.ball_size = (20.0, 20.0)
+        self.confidence = 0.0
+
+    def predict(self, timestamp: float) -> np.ndarray:
+        """
+        把状态推进到给定时刻
+
+        Returns:
+            预测的球心 [x, y]
+        """
+        self.stats['frames'] += 1
+        if not self.initialized:
+            return self.x[:2]
+
+        dt = max(0.0, timestamp - self.last_time) if self.last_time is not None else 0.0
+        self.last_time = timestamp
+        if dt > 0:
+            F = np.array([[1, 0, dt, 0], [0, 1, 0, dt], [0, 0, 1, 0], [0, 0, 0, 1]], dtype=np.float64)
+            # 离散白噪声加速度模型
+            G = np.array([[dt * dt / 2, 0], [0, dt * dt / 2], [dt, 0], [0, dt]])
+            Q = G @ G.T * self.process_noise ** 2
+            self.x = F @ self.x
+            self.P = F @ self.P @ F.T + Q
+        return self.x[:2]
+
+    def update(self, center: List[float], timestamp: float):
+        """用一次观测（球心）修正状态"""
+        z = np.asarray(center, dtype=np.float64)
+        if not self.initialized:
+            self.x = np.array([z[0], z[1], 0.0, 0.0])
+            # 速度未知，给较大的初始不确定度
+            self.P = np.diag([self.measurement_noise ** 2] * 2 + [500.0 ** 2] * 2)
+            self.last_time = timestamp
+            self.initialized = True
+            return
+
+        y = z - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(4) - K @ self.H) @ self.P
+
+    def position_std(self) -> float:
+        """位置不确定度：位置协方差最大特征值的平方根"""
+        if not self.initialized:
+            return float('inf')
+        return float(np.sqrt(np.linalg.eigvalsh(self.P[:2, :2]).max()))
+
+    def needs_detection(self) -> bool:
+        """本帧是否需要完整检测"""
+        return (not self.initialized or
+                self.template is None or
+                self.frames_since_detection >= self.detect_interval or
+                self.position_std() > self.max_position_std)
+
+    def observe_detection(self, frame: np.ndarray, ball: Optional[Dict], timestamp: float):
+        """
+        记录一次完整检测的结果
+
+        找到球时更新状态和匹配模板；连续多次未找到则丢弃轨迹。
+        """
+        self.stats['full_detections'] += 1
+        self.frames_since_detection = 0
+        if ball is None:
+            self.missed_detections += 1
+            if self.missed_detections >= self.max_missed:
+                self.reset()
+            return
+
+        self.missed_detections = 0
+        self.update(ball['center'], timestamp)
+        self.confidence = float(ball['confidence'])
+
+        x1, y1, x2, y2 = [int(round(v)) for v in ball['bbox']]
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
+        if x2 - x1 >= 4 and y2 - y1 >= 4:
+            gray = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+            self.template = gray
+            self.ball_size = (float(x2 - x1), float(y2 - y1))
+
+    def search_region(self, frame_shape: Tuple[int, ...], margin: float = 0.0) -> Tuple[int, int, int, int]:
+        """
+        预测位置附近的搜索窗口
+
+        Args:
+            frame_shape: 帧尺寸
+            margin: 额外外扩的像素
+
+        Returns:
+            (x1, y1, x2, y2)，已裁剪到画面内
+        """
+        px, py = self.x[:2]
+        tw, th = self.ball_size
+        radius = self.search_sigma * self.position_std() + margin
+        x1 = int(max(0, px - tw / 2 - radius))
+        y1 = int(max(0, py - th / 2 - radius))
+        x2 = int(min(frame_shape[1], px + tw / 2 + radius))
+        y2 = int(min(frame_shape[0], py + th / 2 + radius))
+        return x1, y1, x2, y2
+
+    def local_search(self, frame: np.ndarray, timestamp: float) -> Optional[Detection]:
+        """
+        在预测位置附近做模板匹配，确认轨迹
+
+        Returns:
+            确认成功时返回足球检测结果（detection_method='tracker'），否则None
+        """
+        if self.template is None:
+            return None
+
+        x1, y1, x2, y2 = self.search_region(frame.shape)
+        th_i, tw_i = self.template.shape[:2]
+        if x2 - x1 < tw_i or y2 - y1 < th_i:
+            self.stats['local_misses'] += 1
+            return None
+
+        region = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+        scores = cv2.matchTemplate(region, self.template, cv2.TM_CCOEFF_NORMED)
+        _, best_score, _, best_loc = cv2.minMaxLoc(scores)
+        if best_score < self.match_threshold:
+            self.stats['local_misses'] += 1
+            return None
+
+        self.stats['local_hits'] += 1
+        self.frames_since_detection += 1
+        bx1, by1 = x1 + best_loc[0], y1 + best_loc[1]
+        center = [bx1 + tw_i / 2, by1 + th_i / 2]
+        self.update(center, timestamp)
+        return Detection([float(bx1), float(by1), float(bx1 + tw_i), float(by1 + th_i)],
+                         float(min(self.confidence, best_score)), 'sports ball', 'tracker',
+                         [float(center[0]), float(center[1])])
+
+    def confirm_detection(self, ball: Dict, timestamp: float):
+        """
+        用廉价检测器（如颜色检测）在预测位置附近找到的球确认轨迹
+
+        与局部模板匹配一样计入两次完整检测之间的帧数，不替换匹配模板，
+        因此到达 detect_interval 时仍会回到完整检测重新锚定。
+        """
+        self.stats['confirmations'] += 1
+        self.frames_since_detection += 1
+        self.update(ball['center'], timestamp)
+
+    def hold(self, timestamp: float):
+        """
+        运动门控跳过的帧：关注区域（包含预测的球框）内没有运动，视为球静止
+
+        把轨迹时钟推进到本帧并把速度置零，下一次 predict 不会按旧速度外推整段跳过的时间；
+        同时计入两次完整检测之间的帧数，跳过的帧也会让轨迹按 detect_interval 老化。
+        """
+        if not self.initialized:
+            return
+        self.last_time = timestamp
+        self.x[2:] = 0.0
+        self.frames_since_detection += 1
+
+    def get_state(self) -> Optional[Dict]:
+        """
+        当前轨迹状态（预测位置及其协方差）
+
+        Returns:
+            没有轨迹时返回None
+        """
+        if not self.initialized:
+            return None
+        return {
+            'position': self.x[:2].tolist(),
+            'velocity': self.x[2:].tolist(),
+            'covariance': self.P[:2, :2].tolist(),
+            'position_std': self.position_std(),
+            'frames_since_detection': self.frames_since_detection
+        }
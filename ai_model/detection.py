@@ -0,0 +1,104 @@
+"""
+检测结果类型 - 检测器内部使用的轻量对象
+使用 __slots__ 避免每个检测结果分配一个字典；只在序列化边界（JSON响应）转换成字典。
+为兼容按字典访问的旧代码，同时支持 detection['bbox'] / detection.get('detection_method') 形式的读写。
+"""
+
+from typing import Dict, Iterator, List, Optional
+
+
+class Detection:
+    """
+    单个检测结果
+
+    Attributes:
+        bbox: [x1, y1, x2, y2]（原图坐标）
+        confidence: 置信度（颜色检测为圆度）
+        class_name: 类别名称
+        center: [x, y]
+        detection_method: 产生该结果的检测方法（'yolo' / 'tracker' / 'color_white' 等）
+        class_id: 模型类别编号（非YOLO结果为None）
+        timestamp: 采集时间（秒），写入历史时才设置
+    """
+
+    __slots__ = ('bbox', 'confidence', 'class_name', 'center', 'detection_method', 'class_id', 'timestamp')
+
+    def __init__(self, bbox: List[float], confidence: float, class_name: str = 'sports ball',
+                 detection_method: str = 'yolo', center: Optional[List[float]] = None,
+                 class_id: Optional[int] = None, timestamp: Optional[float] = None):
+        self.bbox = bbox
+        self.confidence = confidence
+        self.class_name = class_name
+        self.center = center if center is not None else [(bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2]
+        self.detection_method = detection_method
+        self.class_id = class_id
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Detection':
+        """由检测结果字典构建（已经是 Detection 时原样返回）"""
+        if isinstance(data, Detection):
+            return data
+        return cls(list(data['bbox']), data['confidence'], data.get('class_name', 'sports ball'),
+                   data.get('detection_method', 'unknown'), data.get('center'),
+                   data.get('class_id'), data.get('timestamp'))
+
+    def to_dict(self) -> Dict:
+        """完整字典（未设置的 class_id / timestamp 不输出）"""
+        data = {
+            'bbox': self.bbox,
+            'confidence': self.confidence,
+            'class_name': self.class_name,
+            'center': self.center,
+            'detection_method': self.detection_method
+        }
+        if self.class_id is not None:
+            data['class_id'] = self.class_id
+        if self.timestamp is not None:
+            data['timestamp'] = self.timestamp
+        return data
+
+    def to_json(self, digits: int = 1) -> Dict:
+        """
+        WebSocket 响应使用的精简字典
+
+        Args:
+            digits: 坐标保留的小数位数（置信度固定保留2位）
+        """
+        x1, y1, x2, y2 = self.bbox
+        cx, cy = self.center
+        return {
+            'bbox': [round(x1, digits), round(y1, digits), round(x2, digits), round(y2, digits)],
+            'confidence': round(self.confidence, 2),
+            'center': [round(cx, digits), round(cy, digits)],
+            'class_name': self.class_name,
+            'detection_method': self.detection_method
+        }
+
+    # 字典式访问，兼容按 ball['bbox'] 读写检测结果的代码
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def keys(self) -> Iterator[str]:
+        return (key for key in self.__slots__ if getattr(self, key) is not None)
+
+    def __repr__(self) -> str:
+        return (f'Detection({self.class_name}, method={self.detection_method}, '
+                f'conf={self.confidence:.2f}, bbox={[round(v, 1) for v in self.bbox]})')
@@ -0,0 +1,214 @@
+"""
+事件流 - 会话级状态机，只在状态变化时向客户端发送消息
+逐帧发送完整结果时，客户端要自己做重叠判断和冷却；比赛平静时绝大多数帧没有任何变化。
+这里在服务端维护 球可见/丢失、球在门内/离开、预测射门 三组状态，
+用连续帧数去抖、用进入/离开两个阈值做迟滞，只输出状态转换，外加低频心跳（最新位置）。
+"""
+
+import time
+import numpy as np
+from typing import Dict, List, Optional
+
+from goal_region import GoalRegion
+
+
+class EventStream:
+    """
+    每个会话一个实例
+
+    状态：
+        ball_visible - 连续 appear_frames 帧检测到球后变为可见，连续 lose_frames 帧没有球后变为丢失
+        in_goal      - 球框与球门重叠比例连续 enter_frames 帧不低于 enter_overlap 时进入，
+                       连续 exit_frames 帧不高于 exit_overlap 时离开；扫掠路径进门直接进入
+        射门预测     - 进门预测置信度不低于 shot_confidence 时发出，shot_cooldown 秒内不重复
+    """
+
+    def __init__(self, appear_frames: int = 2, lose_frames: int = 5,
+                 enter_frames: int = 2, exit_frames: int = 3,
+                 enter_overlap: float = 0.5, exit_overlap: float = 0.2,
+                 shot_confidence: float = 0.4, shot_cooldown: float = 3.0,
+                 heartbeat_interval: float = 1.0):
+        """
+        Args:
+            appear_frames: 连续多少帧检测到球才报告可见
+            lose_frames: 连续多少帧没有球才报告丢失
+            enter_frames: 连续多少帧重叠足够才报告进门
+            exit_frames: 连续多少帧重叠不足才报告离开
+            enter_overlap: 进门阈值（球框在球门内的面积比例）
+            exit_overlap: 离开阈值（低于进门阈值，形成迟滞区间）
+            shot_confidence: 报告射门预测的最低置信度
+            shot_cooldown: 两次射门预测之间的最短间隔（秒，采集时间）
+            heartbeat_interval: 没有事件时发送心跳的间隔（秒，服务器时间）
+        """
+        self.appear_frames = appear_frames
+        self.lose_frames = lose_frames
+        self.enter_frames = enter_frames
+        self.exit_frames = exit_frames
+        self.enter_overlap = enter_overlap
+        self.exit_overlap = exit_overlap
+        self.shot_confidence = shot_confidence
+        self.shot_cooldown = shot_cooldown
+        self.heartbeat_interval = heartbeat_interval
+        self.reset()
+
+    def reset(self):
+        """回到初始状态（球不可见、不在门内）"""
+        self.ball_visible = False
+        self.in_goal = False
+        self.goal_index = None
+        self.frames = 0
+        self.last_position = None
+        self.last_shot_time = None
+        self.last_sent = None
+        self._ball_streak = 0
+        self._miss_streak = 0
+        self._enter_streak = 0
+        self._exit_streak = 0
+        self.stats = {'frames': 0, 'events': 0, 'heartbeats': 0, 'silent': 0}
+
+    def update(self, result: Dict, goal_areas: List[Dict], now: Optional[float] = None) -> Optional[Dict]:
+        """
+        用本帧检测结果推进状态机
+
+        Args:
+            result: SoccerDetector.process_frame 的结果
+            goal_areas: 参与进门判断的球门（自动检测锁定的球门和用户标注的球门）
+            now: 服务器时间（秒），用于心跳计时；None 表示当前时间
+
+        Returns:
+            需要发送的消息（{'type': 'events', ...} 或 {'type': 'heartbeat', ...}），不需要发送时为None
+        """
+        now = time.time() if now is None else now
+        timestamp = result['timestamp']
+        self.frames += 1
+        self.stats['frames'] += 1
+
+        balls = result['detections']['soccer_balls']
+        best_ball = max(balls, key=lambda b: b['confidence']) if balls else None
+        if best_ball is not None:
+            self.last_position = list(best_ball['center'])
+
+        events = []
+        self._update_visibility(best_ball, timestamp, events)
+        self._update_goal(best_ball, goal_areas, result.get('goal_crossing'), timestamp, events)
+        self._update_shot(result.get('goal_entry'), timestamp, events)
+
+        if events:
+            self.stats['events'] += len(events)
+            self.last_sent = now
+            return {'type': 'events', 'events': events, 'timestamp': round(timestamp, 3)}
+        return self.tick(now)
+
+    def tick(self, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        没有新的检测结果时（例如运动门控跳过的帧）只检查是否需要心跳
+
+        Returns:
+            心跳消息，未到发送间隔时为None
+        """
+        now = time.time() if now is None else now
+        if self.last_sent is not None and now - self.last_sent < self.heartbeat_interval:
+            self.stats['silent'] += 1
+            return None
+        self.last_sent = now
+        self.stats['heartbeats'] += 1
+        return {
+            'type': 'heartbeat',
+            'ball_visible': self.ball_visible,
+            'in_goal': self.in_goal,
+            'position': [round(v, 1) for v in self.last_position] if self.last_position else None,
+            'timestamp': round(now, 2)
+        }
+
+    def _update_visibility(self, ball: Optional[Dict], timestamp: float, events: List[Dict]):
+        """球可见/丢失：连续帧计数去抖，偶发的误检和漏检不产生事件"""
+        if ball is not None:
+            self._ball_streak += 1
+            self._miss_streak = 0
+            if not self.ball_visible and self._ball_streak >= self.appear_frames:
+                self.ball_visible = True
+                events.append(self._event('ball_visible', timestamp, position=ball['center']))
+        else:
+            self._miss_streak += 1
+            self._ball_streak = 0
+            if self.ball_visible and self._miss_streak >= self.lose_frames:
+                self.ball_visible = False
+                events.append(self._event('ball_lost', timestamp, position=self.last_position))
+
+    def _update_goal(self, ball: Optional[Dict], goal_areas: List[Dict], crossing: Optional[Dict],
+                     timestamp: float, events: List[Dict]):
+        """球在门内/离开：进入和离开使用不同的重叠阈值，避免在门线附近来回抖动"""
+        overlap, goal_index = 0.0, None
+        if ball is not None and goal_areas:
+            fractions = ball_goal_overlaps(ball['bbox'], goal_areas)
+            goal_index = int(np.argmax(fractions))
+            overlap = float(fractions[goal_index])
+
+        if not self.in_goal:
+            # 扫掠路径进门是两次观测之间插值得到的确定结果，不需要等待连续帧
+            if crossing is not None:
+                self._enter_goal(crossing['goal_index'], crossing['crossing_time'], 'crossing',
+                                 crossing['crossing_point'], events)
+                return
+            self._enter_streak = self._enter_streak + 1 if overlap >= self.enter_overlap else 0
+            if self._enter_streak >= self.enter_frames:
+                self._enter_goal(goal_index, timestamp, 'overlap', ball['center'], events)
+        else:
+            self._exit_streak = self._exit_streak + 1 if overlap <= self.exit_overlap else 0
+            if self._exit_streak >= self.exit_frames:
+                self.in_goal = False
+                self._enter_streak = 0
+                events.append(self._event('goal_exit', timestamp, goal_index=self.goal_index))
+                self.goal_index = None
+
+    def _enter_goal(self, goal_index: int, timestamp: float, source: str,
+                    point: List[float], events: List[Dict]):
+        self.in_goal = True
+        self.goal_index = goal_index
+        self._exit_streak = 0
+        events.append(self._event('goal_enter', timestamp, goal_index=goal_index,
+                                  source=source, position=point))
+
+    def _update_shot(self, entry: Optional[Dict], timestamp: float, events: List[Dict]):
+        """射门预测：置信度足够且不在冷却期内时报告一次"""
+        if entry is None or self.in_goal or entry['confidence'] < self.shot_confidence:
+            return
+        if self.last_shot_time is not None and timestamp - self.last_shot_time < self.shot_cooldown:
+            return
+        self.last_shot_time = timestamp
+        events.append(self._event('shot_predicted', timestamp, goal_index=entry['goal_index'],
+                                  time_to_entry_ms=entry['time_to_entry_ms'],
+                                  position=entry['entry_point'],
+                                  confidence=round(entry['confidence'], 2)))
+
+    @staticmethod
+    def _event(name: str, timestamp: float, position: Optional[List[float]] = None, **fields) -> Dict:
+        event = {'event': name, 'timestamp': round(timestamp, 3)}
+        if position is not None:
+            event['position'] = [round(float(v), 1) for v in position]
+        event.update(fields)
+        return event
+
+
+def ball_goal_overlaps(ball_bbox: List[float], goal_areas: List[Dict]) -> np.ndarray:
+    """
+    球框落在各球门内的面积比例
+
+    GoalRegion 按标注的四边形计算（积分图查表），其余球门按 bbox 求交
+
+    Returns:
+        (G,) 取值 [0, 1]
+    """
+    x1, y1, x2, y2 = ball_bbox
+    area = max(x2 - x1, 0) * max(y2 - y1, 0)
+    fractions = np.zeros(len(goal_areas))
+    if area <= 0:
+        return fractions
+    for i, goal in enumerate(goal_areas):
+        if isinstance(goal, GoalRegion):
+            fractions[i] = goal.overlap_fraction([ball_bbox])[0]
+        else:
+            gx1, gy1, gx2, gy2 = goal['bbox']
+            inter = max(min(x2, gx2) - max(x1, gx1), 0) * max(min(y2, gy2) - max(y1, gy1), 0)
+            fractions[i] = inter / area
+    return fractions
@@ -0,0 +1,145 @@
+"""
+帧上下文 - 同一帧的派生图像只计算一次
+灰度、HSV、模糊、边缘、缩小图和金字塔层在第一次使用时计算并缓存，供本帧所有检测器共用；
+结果写入按尺寸复用的预分配缓冲区，相同分辨率的连续帧不再重复分配内存
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, Optional, Tuple, Union
+
+
+class BufferPool:
+    """
+    按 (名称, 形状, 类型) 复用的输出缓冲区
+
+    缓冲区在下一帧会被覆盖，派生图像不能跨帧保存；同一个缓冲池只能在一个线程中使用。
+    """
+
+    def __init__(self, max_buffers: int = 64):
+        """
+        Args:
+            max_buffers: 缓冲区数量上限，超过时全部丢弃重新分配（分辨率频繁变化时防止无限增长）
+        """
+        self.max_buffers = max_buffers
+        self._buffers: Dict[Tuple, np.ndarray] = {}
+        self.stats = {'allocations': 0, 'reuses': 0}
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """取出一块可以直接覆盖写入的缓冲区"""
+        key = (name, tuple(shape), np.dtype(dtype).str)
+        buffer = self._buffers.get(key)
+        if buffer is not None:
+            self.stats['reuses'] += 1
+            return buffer
+        if len(self._buffers) >= self.max_buffers:
+            self._buffers.clear()
+        self.stats['allocations'] += 1
+        buffer = self._buffers[key] = np.empty(shape, dtype=dtype)
+        return buffer
+
+
+class FrameContext:
+    """
+    一帧图像及其按需计算的派生图像
+
+    检测器既可以接收原始帧也可以接收 FrameContext（见 wrap），
+    同一帧内重复请求同一派生图像时直接返回缓存结果。
+    """
+
+    def __init__(self, frame: np.ndarray, pool: Optional[BufferPool] = None, name: str = 'frame'):
+        """
+        Args:
+            frame: BGR图像
+            pool: 输出缓冲池；None 时每次新分配
+            name: 缓冲区名称前缀，区分原图与各级缩小图
+        """
+        self.frame = frame
+        self.pool = pool
+        self.name = name
+        self._cache = {}
+
+    @classmethod
+    def wrap(cls, frame: Union[np.ndarray, 'FrameContext']) -> 'FrameContext':
+        """已经是 FrameContext 时原样返回，否则包装成不带缓冲池的上下文"""
+        return frame if isinstance(frame, FrameContext) else cls(frame)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.frame.shape
+
+    def _buffer(self, key: str, shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        return self.pool.get(f'{self.name}/{key}', shape) if self.pool is not None else None
+
+    def _memo(self, key, compute):
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = compute()
+        return value
+
+    @property
+    def gray(self) -> np.ndarray:
+        """灰度图"""
+        return self._memo('gray', lambda: cv2.cvtColor(
+            self.frame, cv2.COLOR_BGR2GRAY, dst=self._buffer('gray', self.shape[:2])))
+
+    @property
+    def hsv(self) -> np.ndarray:
+        """HSV图"""
+        return self._memo('hsv', lambda: cv2.cvtColor(
+            self.frame, cv2.COLOR_BGR2HSV, dst=self._buffer('hsv', self.shape)))
+
+    def blurred(self, ksize: int) -> np.ndarray:
+        """灰度图的 ksize×ksize 高斯模糊"""
+        return self._memo(('blurred', ksize), lambda: cv2.GaussianBlur(
+            self.gray, (ksize, ksize), 0, dst=self._buffer(f'blurred{ksize}', self.shape[:2])))
+
+    def edges(self, low: float, high: float, blur: int = 0) -> np.ndarray:
+        """
+        Canny 边缘图
+
+        Args:
+            low, high: Canny 双阈值
+            blur: 先做高斯模糊的核尺寸，0 表示直接在灰度图上检测
+        """
+        def compute():
+            source = self.blurred(blur) if blur else self.gray
+            return cv2.Canny(source, low, high,
+                             edges=self._buffer(f'edges{low}_{high}_{blur}', self.shape[:2]))
+        return self._memo(('edges', low, high, blur), compute)
+
+    def resized(self, scale: float) -> 'FrameContext':
+        """按比例缩小（INTER_AREA）后的上下文，scale=1 时返回自身"""
+        if scale == 1.0:
+            return self
+
+        def compute():
+            height, width = self.shape[:2]
+            size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+            small = cv2.resize(self.frame, size, dst=self._buffer(f'x{scale}', (size[1], size[0]) + self.shape[2:]),
+                               interpolation=cv2.INTER_AREA)
+            return FrameContext(small, self.pool, f'{self.name}@x{scale}')
+        return self._memo(('resized', scale), compute)
+
+    def pyr_down(self) -> 'FrameContext':
+        """高斯金字塔的下一层（宽高各减半）"""
+        def compute():
+            height, width = self.shape[:2]
+            size = ((width + 1) // 2, (height + 1) // 2)
+            small = cv2.pyrDown(self.frame, dst=self._buffer('pyr', (size[1], size[0]) + self.shape[2:]),
+                                dstsize=size)
+            return FrameContext(small, self.pool, f'{self.name}/pyr')
+        return self._memo('pyr', compute)
+
+    def pyramid_level(self, max_width: int) -> Tuple['FrameContext', float]:
+        """
+        宽度不超过 max_width 的第一层金字塔
+
+        Returns:
+            (该层的上下文, 相对本帧的缩放比例)
+        """
+        level, scale = self, 1.0
+        while level.shape[1] > max_width:
+            level = level.pyr_down()
+            scale /= 2
+        return level, scale
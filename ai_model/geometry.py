@@ -0,0 +1,354 @@
+"""
+几何工具 - 检测框与多边形的向量化运算
+IoU矩阵、贪心NMS、Soft-NMS、点在框内/多边形内判断、点到多边形的距离，供足球、球门和碰撞检测共用
+"""
+
+import numpy as np
+from typing import Tuple
+
+
+def box_areas(boxes: np.ndarray) -> np.ndarray:
+    """
+    检测框面积（宽或高为负时记为0）
+
+    Args:
+        boxes: (N, 4) xyxy
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def pairwise_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    两组检测框两两之间的IoU
+
+    Args:
+        boxes_a: (N, 4) xyxy
+        boxes_b: (M, 4) xyxy
+
+    Returns:
+        (N, M) IoU矩阵，并集为0时记为0
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    union = box_areas(a)[:, None] + box_areas(b)[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float,
+                        max_det: int = 300) -> np.ndarray:
+    """
+    贪心NMS
+
+    分数相同的框保持输入顺序（稳定排序），与按置信度排序后逐个去重的结果一致。
+    只保留少量框时逐个抑制；否则先按 x 排序扫描出所有重叠的框对，
+    只对这些框对计算IoU，贪心过程只剩按分数顺序的一次遍历；
+    框相对画面不太大时，数千个框也只需几毫秒。
+
+    Args:
+        boxes: (N, 4) xyxy
+        scores: (N,)
+        iou_threshold: 与已保留框的IoU超过该值即被抑制
+        max_det: 最多保留数量
+
+    Returns:
+        保留框的下标，按分数从高到低
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    if min(len(boxes), max_det) <= 16:
+        return _greedy_nms(boxes, order, iou_threshold, max_det)
+
+    # 按 x1 排序后，可能与某个框 IoU 超过阈值的框是紧随其后的连续一段：
+    # IoU > t 要求交集宽度 > t·w，即对方的 x1 < x2 - t·w
+    n = len(boxes)
+    by_x = np.argsort(boxes[:, 0], kind='stable')
+    sorted_boxes = boxes[by_x]
+    sorted_areas = box_areas(sorted_boxes)
+    widths = np.clip(sorted_boxes[:, 2] - sorted_boxes[:, 0], 0, None)
+    window_end = np.searchsorted(sorted_boxes[:, 0], sorted_boxes[:, 2] - max(iou_threshold, 0) * widths,
+                                 side='left')
+    counts = np.maximum(window_end - np.arange(n) - 1, 0)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    first = np.repeat(np.arange(n), counts)
+    second = first + 1 + offsets
+    box_a = np.repeat(sorted_boxes, counts, axis=0)
+    box_b = sorted_boxes[second]
+
+    inter = (np.clip(np.minimum(box_a[:, 2], box_b[:, 2]) - box_b[:, 0], 0, None) *
+             np.clip(np.minimum(box_a[:, 3], box_b[:, 3]) - np.maximum(box_a[:, 1], box_b[:, 1]), 0, None))
+    union = np.repeat(sorted_areas, counts) + sorted_areas[second] - inter
+    overlapping = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0) > iou_threshold
+    a, b = by_x[first[overlapping]], by_x[second[overlapping]]
+
+    # 抑制关系：分数高的框 -> 分数低的框，按前者分组
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    a_first = rank[a] < rank[b]
+    higher = np.where(a_first, a, b)
+    lower = np.where(a_first, b, a)
+    grouped = np.argsort(higher, kind='stable')
+    higher, lower = higher[grouped], lower[grouped]
+    starts = np.searchsorted(higher, np.arange(n), side='left').tolist()
+    ends = np.searchsorted(higher, np.arange(n), side='right').tolist()
+
+    # 超过阈值的框对通常很少，这里用纯Python列表比逐个NumPy索引更快
+    lower = lower.tolist()
+    suppressed = [False] * n
+    keep = []
+    for i in order.tolist():
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        if len(keep) >= max_det:
+            break
+        for j in lower[starts[i]:ends[i]]:
+            suppressed[j] = True
+    return np.array(keep, dtype=np.int64)
+
+
+def _greedy_nms(boxes: np.ndarray, order: np.ndarray, iou_threshold: float,
+                max_det: int) -> np.ndarray:
+    """逐个保留分数最高的框并抑制与它重叠的框（保留数量少时最快）"""
+    areas = box_areas(boxes)
+    keep = []
+    while order.size > 0 and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        union = areas[i] + areas[rest] - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def soft_nms(boxes: np.ndarray, scores: np.ndarray, sigma: float = 0.5,
+             score_threshold: float = 0.001, max_det: int = 300) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    高斯Soft-NMS：重叠框不直接删除，而是按 exp(-IoU²/sigma) 衰减分数
+
+    适合球门这类同一目标会被多种方法以略有不同的框检出、又不希望误删相邻目标的场景。
+
+    Args:
+        boxes: (N, 4) xyxy
+        scores: (N,)
+        sigma: 高斯衰减系数，越小衰减越强
+        score_threshold: 衰减后低于该分数的框被丢弃
+        max_det: 最多保留数量
+
+    Returns:
+        (保留框的下标, 衰减后的分数)，按衰减后分数从高到低
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    remaining = np.arange(len(boxes))
+    current = np.asarray(scores, dtype=np.float64).copy()
+    keep, kept_scores = [], []
+    while remaining.size > 0 and len(keep) < max_det:
+        best = int(np.argmax(current[remaining]))
+        i = remaining[best]
+        if current[i] < score_threshold:
+            break
+        keep.append(i)
+        kept_scores.append(current[i])
+        remaining = np.delete(remaining, best)
+        if remaining.size == 0:
+            break
+        iou = pairwise_iou(boxes[i:i + 1], boxes[remaining])[0]
+        current[remaining] *= np.exp(-(iou * iou) / sigma)
+        remaining = remaining[current[remaining] >= score_threshold]
+    return np.array(keep, dtype=np.int64), np.array(kept_scores, dtype=np.float64)
+
+
+def points_in_boxes(points: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """
+    点是否落在检测框内（含边界）
+
+    Args:
+        points: (P, 2) [x, y]
+        boxes: (B, 4) xyxy
+
+    Returns:
+        (P, B) 布尔矩阵
+    """
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return ((p[:, None, 0] >= b[None, :, 0]) & (p[:, None, 0] <= b[None, :, 2]) &
+            (p[:, None, 1] >= b[None, :, 1]) & (p[:, None, 1] <= b[None, :, 3]))
+
+
+def point_box_distances(points: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """
+    点到检测框的最短距离（点在框内时为0）
+
+    Args:
+        points: (P, 2) [x, y]
+        boxes: (B, 4) xyxy
+
+    Returns:
+        (P, B) 距离矩阵
+    """
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    closest_x = np.clip(p[:, None, 0], b[None, :, 0], b[None, :, 2])
+    closest_y = np.clip(p[:, None, 1], b[None, :, 1], b[None, :, 3])
+    return np.hypot(p[:, None, 0] - closest_x, p[:, None, 1] - closest_y)
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    点是否落在多边形内（射线法，所有点和所有边一次广播）
+
+    Args:
+        points: (P, 2) [x, y]
+        polygon: (V, 2) 多边形顶点，顺时针或逆时针均可
+
+    Returns:
+        (P,) 布尔数组；恰好落在边上的点结果不确定
+    """
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    v = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    if len(v) < 3:
+        return np.zeros(len(p), dtype=bool)
+    x1, y1 = v[:, 0], v[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    px, py = p[:, None, 0], p[:, None, 1]
+
+    # 向右的水平射线与每条边相交的次数，奇数次在多边形内
+    straddles = (y1[None, :] > py) != (y2[None, :] > py)
+    dy = np.where(y2 == y1, 1.0, y2 - y1)
+    crossing_x = x1[None, :] + (py - y1[None, :]) * (x2 - x1)[None, :] / dy[None, :]
+    crossings = straddles & (px < crossing_x)
+    return (crossings.sum(axis=1) % 2) == 1
+
+
+def segment_box_entries(starts: np.ndarray, ends: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """
+    线段首次进入轴对齐框的位置参数（slab法，所有线段和所有框一次广播）
+
+    Args:
+        starts: (S, 2) 线段起点
+        ends: (S, 2) 线段终点
+        boxes: (B, 4) xyxy
+
+    Returns:
+        (S, B) 参数 t ∈ [0, 1]，进入点为 start + t·(end - start)；起点已在框内时为0，不相交时为nan
+    """
+    s = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+    e = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+    b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    d = e - s
+    t_enter = np.zeros((len(s), len(b)))
+    t_exit = np.ones((len(s), len(b)))
+    for axis in range(2):
+        origin, delta = s[:, None, axis], d[:, None, axis]
+        low, high = b[None, :, axis], b[None, :, axis + 2]
+        moving = delta != 0
+        safe = np.where(moving, delta, 1.0)
+        t1, t2 = (low - origin) / safe, (high - origin) / safe
+        # 该方向不动时：在区间内则不受约束，否则永不相交
+        inside = (origin >= low) & (origin <= high)
+        t_enter = np.maximum(t_enter, np.where(moving, np.minimum(t1, t2), np.where(inside, -np.inf, np.inf)))
+        t_exit = np.minimum(t_exit, np.where(moving, np.maximum(t1, t2), np.where(inside, np.inf, -np.inf)))
+    return np.where(t_enter <= t_exit, t_enter, np.nan)
+
+
+def segment_polygon_entries(starts: np.ndarray, ends: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    线段首次进入多边形的位置参数
+
+    Args:
+        starts: (S, 2) 线段起点
+        ends: (S, 2) 线段终点
+        polygon: (V, 2) 多边形顶点
+
+    Returns:
+        (S,) 参数 t ∈ [0, 1]；起点已在多边形内时为0，不相交时为nan
+    """
+    s = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+    e = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+    v = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    if len(v) < 3:
+        return np.full(len(s), np.nan)
+    d = e - s
+    a = v
+    edge = np.roll(v, -1, axis=0) - v
+
+    # 线段 s + t·d 与边 a + u·edge 相交：叉积求解，平行的边不相交
+    denom = d[:, None, 0] * edge[None, :, 1] - d[:, None, 1] * edge[None, :, 0]
+    offset_x = a[None, :, 0] - s[:, None, 0]
+    offset_y = a[None, :, 1] - s[:, None, 1]
+    parallel = denom == 0
+    safe = np.where(parallel, 1.0, denom)
+    t = (offset_x * edge[None, :, 1] - offset_y * edge[None, :, 0]) / safe
+    u = (offset_x * d[:, None, 1] - offset_y * d[:, None, 0]) / safe
+    crossing = ~parallel & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+
+    first = np.where(crossing, t, np.inf).min(axis=1)
+    first = np.where(np.isfinite(first), first, np.nan)
+    return np.where(points_in_polygon(s, v), 0.0, first)
+
+
+def point_polygon_distances(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    点到多边形边界（各条边）的最短距离，不区分内外
+
+    Args:
+        points: (P, 2) [x, y]
+        polygon: (V, 2) 多边形顶点
+
+    Returns:
+        (P,) 距离
+    """
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    a = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    edge = np.roll(a, -1, axis=0) - a
+    length_sq = np.where((edge * edge).sum(axis=1) > 0, (edge * edge).sum(axis=1), 1.0)
+    offset = p[:, None, :] - a[None, :, :]
+    u = np.clip((offset * edge[None, :, :]).sum(axis=2) / length_sq[None, :], 0.0, 1.0)
+    closest = a[None, :, :] + u[:, :, None] * edge[None, :, :]
+    return np.hypot(p[:, None, 0] - closest[:, :, 0], p[:, None, 1] - closest[:, :, 1]).min(axis=1)
+
+
+def offset_polygon(polygon: np.ndarray, distance: float) -> np.ndarray:
+    """
+    多边形各条边沿外法线平移 distance 后的多边形（相邻两条平移后的边的交点为新顶点）
+
+    球心进入外扩后的多边形即球（圆）开始接触原多边形；对凸多边形，这与精确的外扩区域
+    只差顶点处的尖角（精确区域在顶点处是圆角），轴对齐矩形的结果与 bbox 四边各外扩 distance 完全相同
+
+    Args:
+        polygon: (V, 2) 多边形顶点（顺时针或逆时针均可）
+        distance: 外扩距离（像素），负数为内缩
+
+    Returns:
+        (V', 2) 外扩后的顶点（重复顶点会被去掉）
+    """
+    v = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    v = v[np.any(v != np.roll(v, -1, axis=0), axis=1)]
+    if distance == 0 or len(v) < 3:
+        return v
+    edge = np.roll(v, -1, axis=0) - v
+    length = np.hypot(edge[:, 0], edge[:, 1])
+    # 有向面积为正（x→y 方向逆时针）时外法线在边的右侧
+    area = np.sum(v[:, 0] * np.roll(v[:, 1], -1) - np.roll(v[:, 0], -1) * v[:, 1])
+    side = 1.0 if area > 0 else -1.0
+    normal = side * np.column_stack([edge[:, 1], -edge[:, 0]]) / length[:, None]
+    shifted = v + distance * normal
+
+    # 顶点 i 是边 i-1 与边 i 的交点：两条平移后的直线求交，共线的相邻边直接平移顶点
+    prev_start, prev_edge = np.roll(shifted, 1, axis=0), np.roll(edge, 1, axis=0)
+    cross = prev_edge[:, 0] * edge[:, 1] - prev_edge[:, 1] * edge[:, 0]
+    collinear = np.abs(cross) <= 1e-9 * length * np.roll(length, 1)
+    gap = shifted - prev_start
+    s = (gap[:, 0] * edge[:, 1] - gap[:, 1] * edge[:, 0]) / np.where(collinear, 1.0, cross)
+    return np.where(collinear[:, None], shifted, prev_start + s[:, None] * prev_edge)
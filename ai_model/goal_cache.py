@@ -0,0 +1,204 @@
+"""
+静态球门缓存 - 三脚架固定机位下球门不会移动
+每个会话只在开始时检测球门，连续多帧结果一致后锁定；之后在后台线程低频复核，
+只有画面整体发生变化（相机被移动、切换场景）时才立即重新检测
+"""
+
+import cv2
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from frame_context import FrameContext
+from geometry import pairwise_iou
+
+# 所有会话共用一个后台复核线程：复核频率很低，不需要并行
+_revalidation_pool = None
+
+
+def _get_revalidation_pool() -> ThreadPoolExecutor:
+    global _revalidation_pool
+    if _revalidation_pool is None:
+        _revalidation_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='goal-revalidate')
+    return _revalidation_pool
+
+
+class GoalCache:
+    """
+    会话级球门缓存
+
+    状态：
+        searching - 每帧检测球门，最近 stable_frames 帧的最佳球门两两重叠度足够时锁定
+        locked    - 直接返回锁定的球门；每隔 revalidate_interval 秒提交一次后台复核，
+                    连续 max_disagreements 次复核不一致，或画面整体变化时回到 searching
+    """
+
+    def __init__(self, detect_fn: Callable[[np.ndarray], List[Dict]], stable_frames: int = 5,
+                 match_iou: float = 0.7, revalidate_interval: float = 10.0,
+                 max_disagreements: int = 2, scene_width: int = 64,
+                 scene_pixel_threshold: int = 30, scene_change_threshold: float = 0.3):
+        """
+        Args:
+            detect_fn: 球门检测函数，输入帧，返回球门列表（如 SoccerDetector.detect_goal_advanced）
+            stable_frames: 锁定前需要连续一致的帧数
+            match_iou: 两次检测的球门框IoU不低于该值视为一致
+            revalidate_interval: 锁定后后台复核的间隔（秒）
+            max_disagreements: 连续多少次复核不一致后解除锁定
+            scene_width: 场景变化检测使用的缩略图宽度
+            scene_pixel_threshold: 与锁定时缩略图的灰度差超过该值的像素视为变化
+            scene_change_threshold: 变化像素比例超过该值视为相机移动/场景切换
+        """
+        self.detect_fn = detect_fn
+        self.stable_frames = stable_frames
+        self.match_iou = match_iou
+        self.revalidate_interval = revalidate_interval
+        self.max_disagreements = max_disagreements
+        self.scene_width = scene_width
+        self.scene_pixel_threshold = scene_pixel_threshold
+        self.scene_change_threshold = scene_change_threshold
+
+        self.stats = {'frames': 0, 'detections': 0, 'locks': 0, 'revalidations': 0,
+                      'scene_changes': 0, 'unlocks': 0}
+        self.reset()
+
+    def reset(self):
+        """丢弃锁定的球门和检测历史，下一帧重新检测"""
+        self.goal_detection_history = []
+        self.locked_goals = None
+        self.reference_thumbnail = None
+        self.last_validated = None
+        self.disagreements = 0
+        self.pending = None
+        self.pending_timestamp = None
+
+    @property
+    def locked(self) -> bool:
+        return self.locked_goals is not None
+
+    def update(self, frame: np.ndarray, timestamp: float,
+               context: Optional[FrameContext] = None) -> List[Dict]:
+        """
+        获取本帧的球门
+
+        Args:
+            frame: BGR原始帧
+            timestamp: 帧时间（秒）
+            context: 本帧的帧上下文；未锁定时同步检测直接复用其派生图像
+
+        Returns:
+            球门列表；锁定前为本帧的检测结果
+        """
+        self.stats['frames'] += 1
+
+        if self.locked:
+            self._collect_revalidation()
+
+        if self.locked and self._scene_changed(frame):
+            self.stats['scene_changes'] += 1
+            self._unlock()
+
+        if not self.locked:
+            return self._search(frame, timestamp, context)
+
+        if self.pending is None and timestamp - self.last_validated >= self.revalidate_interval:
+            self.stats['revalidations'] += 1
+            self.pending = _get_revalidation_pool().submit(self.detect_fn, frame.copy())
+            self.pending_timestamp = timestamp
+        return self.locked_goals
+
+    def get_state(self) -> Dict:
+        """缓存状态（用于调试和指标）"""
+        return {
+            'locked': self.locked,
+            'history': len(self.goal_detection_history),
+            'last_validated': self.last_validated,
+            'disagreements': self.disagreements
+        }
+
+    def _search(self, frame: np.ndarray, timestamp: float,
+                context: Optional[FrameContext] = None) -> List[Dict]:
+        """未锁定：同步检测，并判断最近几帧是否稳定"""
+        self.stats['detections'] += 1
+        goals = self.detect_fn(context if context is not None else frame)
+        self.goal_detection_history.append(goals)
+        if len(self.goal_detection_history) > self.stable_frames:
+            self.goal_detection_history.pop(0)
+
+        recent = self.goal_detection_history
+        if len(recent) == self.stable_frames and all(recent):
+            best_boxes = np.array([self._best_goal(g)['bbox'] for g in recent], dtype=np.float64)
+            if pairwise_iou(best_boxes, best_boxes).min() >= self.match_iou:
+                self._lock(frame, recent, best_boxes, timestamp)
+        return goals
+
+    def _lock(self, frame: np.ndarray, recent: List[List[Dict]], best_boxes: np.ndarray,
+              timestamp: float):
+        """
+        锁定球门：框取最近几帧的中位数，抑制单帧抖动
+
+        角点来自最后一帧的检测，按该帧的框到中位数框的缩放和平移同步变换，
+        保持透视形状的同时与锁定的框一致（下游 GoalRegion、offset_polygon 优先使用角点）
+        """
+        goal = dict(self._best_goal(recent[-1]))
+        x1, y1, x2, y2 = np.median(best_boxes, axis=0).tolist()
+        corners = goal.get('corners')
+        if corners:
+            lx1, ly1, lx2, ly2 = goal['bbox']
+            sx = (x2 - x1) / (lx2 - lx1) if lx2 > lx1 else 1.0
+            sy = (y2 - y1) / (ly2 - ly1) if ly2 > ly1 else 1.0
+            goal['corners'] = [[x1 + (cx - lx1) * sx, y1 + (cy - ly1) * sy] for cx, cy in corners]
+        goal['bbox'] = [x1, y1, x2, y2]
+        goal['center'] = [(x1 + x2) / 2, (y1 + y2) / 2]
+        goal['locked'] = True
+
+        self.locked_goals = [goal]
+        self.reference_thumbnail = self._thumbnail(frame)
+        self.last_validated = timestamp
+        self.disagreements = 0
+        self.stats['locks'] += 1
+
+    def _unlock(self):
+        self.stats['unlocks'] += 1
+        if self.pending is not None:
+            self.pending.cancel()
+        self.reset()
+
+    def _collect_revalidation(self):
+        """取回已完成的后台复核结果"""
+        pending: Optional[Future] = self.pending
+        if pending is None or not pending.done():
+            return
+        self.pending = None
+        if pending.cancelled() or pending.exception() is not None:
+            return
+
+        goals = pending.result()
+        self.last_validated = self.pending_timestamp
+        agrees = bool(goals) and pairwise_iou(
+            [self._best_goal(goals)['bbox']], [self.locked_goals[0]['bbox']]
+        )[0, 0] >= self.match_iou
+        if agrees:
+            self.disagreements = 0
+            return
+        self.disagreements += 1
+        if self.disagreements >= self.max_disagreements:
+            self._unlock()
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        scale = self.scene_width / frame.shape[1]
+        small = cv2.resize(frame, (self.scene_width, max(1, int(round(frame.shape[0] * scale)))),
+                           interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (3, 3), 0)
+
+    def _scene_changed(self, frame: np.ndarray) -> bool:
+        """与锁定时的缩略图相比，大部分像素都变了说明相机移动或场景切换"""
+        thumbnail = self._thumbnail(frame)
+        if thumbnail.shape != self.reference_thumbnail.shape:
+            return True
+        diff = cv2.absdiff(thumbnail, self.reference_thumbnail)
+        changed = cv2.countNonZero(cv2.threshold(diff, self.scene_pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        return changed / diff.size > self.scene_change_threshold
+
+    @staticmethod
+    def _best_goal(goals: List[Dict]) -> Dict:
+        return max(goals, key=lambda g: g['confidence'])
@@ -0,0 +1,210 @@
+"""
+多边形球门区域 - 预先栅格化的低分辨率占用网格
+用户标注的四个角点经透视后是任意四边形，按外接框判断会把门外的区域算进球门。
+标注时一次性把多边形栅格化为占用率网格、积分图和内距网格，之后每帧的
+点在门内、检测框重叠比例、球完全在门内三种查询都是按网格查表，所有球一次向量化完成；
+只有落在多边形边界所在格子里的点才回退到精确的多边形计算，因此点和球的查询与逐点精确计算一致；
+检测框重叠比例是积分图查表，在边界格子上有量化误差（见 _covered_area）。
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, Iterator, List
+
+from geometry import points_in_polygon, point_polygon_distances
+
+
+class GoalRegion:
+    """
+    多边形球门区域（与球门检测结果字典兼容：支持 goal['bbox'] / goal.get('corners') 形式读取）
+
+    网格状态：1 表示格子完全在多边形内，0 表示完全在外，-1 表示多边形的边经过该格子（需要精确判断）
+    """
+
+    _FIELDS = ('bbox', 'confidence', 'class_name', 'center', 'detection_method', 'corners')
+
+    def __init__(self, corners: List[List[float]], cell_size: float = 4.0, supersample: int = 4,
+                 confidence: float = 1.0, class_name: str = 'goal', detection_method: str = 'manual'):
+        """
+        Args:
+            corners: 多边形顶点 [[x, y], ...]（原图坐标，至少3个）
+            cell_size: 网格单元边长（像素），越小越精确、占用内存越多
+            supersample: 计算每个格子占用率时的超采样倍数
+            confidence: 置信度（手动标注为1.0）
+            class_name: 类别名称
+            detection_method: 来源（'manual' 表示用户标注）
+        """
+        polygon = np.asarray(corners, dtype=np.float64).reshape(-1, 2)
+        if len(polygon) < 3 or not np.isfinite(polygon).all():
+            raise ValueError('球门区域至少需要3个有效顶点')
+        (x1, y1), (x2, y2) = polygon.min(axis=0), polygon.max(axis=0)
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError('球门区域面积为0')
+
+        self.polygon = polygon
+        self.corners = polygon.tolist()
+        self.bbox = [float(x1), float(y1), float(x2), float(y2)]
+        self.center = [float(x1 + x2) / 2, float(y1 + y2) / 2]
+        self.confidence = confidence
+        self.class_name = class_name
+        self.detection_method = detection_method
+        self.cell_size = float(cell_size)
+
+        # 网格四周各留一格，边界上的点也落在网格内
+        self.origin = np.array([np.floor(x1) - cell_size, np.floor(y1) - cell_size])
+        self.grid_width = int(np.ceil((x2 - self.origin[0]) / cell_size)) + 1
+        self.grid_height = int(np.ceil((y2 - self.origin[1]) / cell_size)) + 1
+        self._build_grids(supersample)
+
+    @classmethod
+    def from_goal(cls, goal: Dict, cell_size: float = 4.0) -> 'GoalRegion':
+        """由球门字典构建（有3个以上角点时使用角点，否则使用 bbox；已经是 GoalRegion 时原样返回）"""
+        if isinstance(goal, GoalRegion):
+            return goal
+        corners = goal.get('corners')
+        if not corners or len(corners) < 3:
+            x1, y1, x2, y2 = goal['bbox']
+            corners = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+        return cls(corners, cell_size, confidence=goal.get('confidence', 1.0),
+                   class_name=goal.get('class_name', 'goal'),
+                   detection_method=goal.get('detection_method', 'unknown'))
+
+    def _build_grids(self, supersample: int):
+        """栅格化多边形：占用率、积分图、状态网格和内距网格"""
+        shape = (self.grid_height, self.grid_width)
+        # fillPoly 的 shift 参数支持亚像素顶点（1/16像素）；像素 k 的中心在 k + 0.5
+        fine_scale = supersample / self.cell_size
+        fine_points = np.round(((self.polygon - self.origin) * fine_scale - 0.5) * 16).astype(np.int32)
+        fine_mask = np.zeros((shape[0] * supersample, shape[1] * supersample), dtype=np.uint8)
+        cv2.fillPoly(fine_mask, [fine_points], 1, lineType=cv2.LINE_8, shift=4)
+        # INTER_AREA 缩小等价于对每个格子内的超采样点求平均，即格子的占用率
+        self.coverage = cv2.resize(fine_mask.astype(np.float32), (shape[1], shape[0]),
+                                   interpolation=cv2.INTER_AREA)
+
+        # 积分图单位为像素面积；integral[j, i] 为前 j 行、前 i 列格子的覆盖面积之和
+        self.integral = np.zeros((shape[0] + 1, shape[1] + 1), dtype=np.float64)
+        self.integral[1:, 1:] = np.cumsum(np.cumsum(self.coverage, axis=0), axis=1) * self.cell_size ** 2
+
+        # 多边形的边经过的格子标为不确定；线宽取3保证被边擦过角的格子也算在内
+        edge_mask = np.zeros(shape, dtype=np.uint8)
+        cell_points = np.round((self.polygon - self.origin) / self.cell_size * 16 - 8).astype(np.int32)
+        cv2.polylines(edge_mask, [cell_points], True, 1, thickness=3, lineType=cv2.LINE_8, shift=4)
+        self.state = np.where(self.coverage > 0.5, 1, 0).astype(np.int8)
+        self.state[edge_mask > 0] = -1
+
+        # 格子中心到多边形边界的近似距离（像素，门外为0）；边界格子带宽3格，误差不超过三个格子
+        self.clearance = cv2.distanceTransform((self.state == 1).astype(np.uint8), cv2.DIST_L2,
+                                               cv2.DIST_MASK_PRECISE) * self.cell_size
+
+    def _cells(self, points: np.ndarray):
+        """点所在的格子下标，以及是否落在网格内"""
+        grid = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        valid = ((grid[:, 0] >= 0) & (grid[:, 0] < self.grid_width) &
+                 (grid[:, 1] >= 0) & (grid[:, 1] < self.grid_height))
+        return np.where(valid, grid[:, 0], 0), np.where(valid, grid[:, 1], 0), valid
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """
+        点是否在球门区域内
+
+        Args:
+            points: (P, 2) [x, y]
+
+        Returns:
+            (P,) 布尔数组
+        """
+        p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        col, row, valid = self._cells(p)
+        state = np.where(valid, self.state[row, col], 0)
+        inside = state == 1
+        uncertain = np.flatnonzero(state == -1)
+        if len(uncertain):
+            inside[uncertain] = points_in_polygon(p[uncertain], self.polygon)
+        return inside
+
+    def _covered_area(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        原点到 (x, y) 的矩形内被球门覆盖的面积（像素²），不是精确值
+
+        积分图在格子之间做双线性插值，相当于假设每个格子内的覆盖是均匀的。完全在多边形内或外的格子
+        没有误差；多边形的边经过的格子有两类量化误差：占用率只由 supersample×supersample 个采样点
+        统计（每格约 cell_size²/supersample），查询矩形的边从这些格子内部截过时按均匀覆盖分摊
+        （每格最多 cell_size²）。因此重叠面积的误差与查询框边线截过的边界格子数成正比，
+        默认4像素格子下为几十像素²，球门边线附近的小球框重叠比例误差明显
+        """
+        gx = np.clip((x - self.origin[0]) / self.cell_size, 0, self.grid_width)
+        gy = np.clip((y - self.origin[1]) / self.cell_size, 0, self.grid_height)
+        i = np.minimum(np.floor(gx).astype(np.int64), self.grid_width - 1)
+        j = np.minimum(np.floor(gy).astype(np.int64), self.grid_height - 1)
+        fx, fy = gx - i, gy - j
+        integral = self.integral
+        return ((1 - fx) * (1 - fy) * integral[j, i] + fx * (1 - fy) * integral[j, i + 1] +
+                (1 - fx) * fy * integral[j + 1, i] + fx * fy * integral[j + 1, i + 1])
+
+    def overlap_fraction(self, boxes: np.ndarray) -> np.ndarray:
+        """
+        检测框与球门区域重叠的面积比例（积分图四次查表）
+
+        Args:
+            boxes: (B, 4) xyxy
+
+        Returns:
+            (B,) 重叠面积 / 检测框面积，取值 [0, 1]；面积为0的框记为0
+        """
+        b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        covered = (self._covered_area(b[:, 2], b[:, 3]) - self._covered_area(b[:, 0], b[:, 3]) -
+                   self._covered_area(b[:, 2], b[:, 1]) + self._covered_area(b[:, 0], b[:, 1]))
+        areas = np.clip(b[:, 2] - b[:, 0], 0, None) * np.clip(b[:, 3] - b[:, 1], 0, None)
+        fraction = np.divide(covered, areas, out=np.zeros_like(covered), where=areas > 0)
+        return np.clip(fraction, 0.0, 1.0)
+
+    def fully_inside(self, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """
+        球（圆）是否完全在球门区域内
+
+        内距网格足以判断的球直接查表；球心在边界格子里或内距与半径相差不到三个格子时
+        按球心到各条边的精确距离判断。
+
+        Args:
+            centers: (P, 2) 球心
+            radii: (P,) 或标量，球的半径（像素）
+
+        Returns:
+            (P,) 布尔数组
+        """
+        c = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        r = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(c),))
+        col, row, valid = self._cells(c)
+        state = np.where(valid, self.state[row, col], 0)
+        clearance = np.where(valid, self.clearance[row, col], 0.0)
+        result = (state == 1) & (clearance - r > 3 * self.cell_size)
+        uncertain = np.flatnonzero((state != 0) & (np.abs(clearance - r) <= 3 * self.cell_size))
+        if len(uncertain):
+            exact = points_in_polygon(c[uncertain], self.polygon)
+            exact &= point_polygon_distances(c[uncertain], self.polygon) >= r[uncertain]
+            result[uncertain] = exact
+        return result
+
+    def to_dict(self) -> Dict:
+        """球门字典（与自动检测的球门格式相同）"""
+        return {field: getattr(self, field) for field in self._FIELDS}
+
+    # 字典式读取，兼容按 goal['bbox'] 访问球门的代码
+    def __getitem__(self, key: str):
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._FIELDS
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._FIELDS else default
+
+    def keys(self) -> Iterator[str]:
+        return iter(self._FIELDS)
+
+    def __repr__(self) -> str:
+        return (f'GoalRegion({self.detection_method}, {len(self.corners)} corners, '
+                f'grid={self.grid_width}x{self.grid_height})')
+
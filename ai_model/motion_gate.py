@@ -0,0 +1,159 @@
+"""
+运动门控 - 三脚架固定机位下，画面没有变化时跳过YOLO检测
+"""
+
+import cv2
+import numpy as np
+from typing import List, Optional, Union
+
+from frame_context import FrameContext
+
+
+class MotionGate:
+    """
+    基于缩小灰度图和滑动平均背景的运动检测
+
+    每个会话一个实例。check() 返回 True 表示需要运行检测器，
+    False 表示相关区域内几乎没有运动，可以复用上一帧的结果。
+    给出多个关注区域时按区域分别计算运动比例，任何一个区域超过阈值就需要检测：
+    外扩后的球门框很大，和小小的球框合在一起统计时，滚动的球会被大片静止的球门区域稀释。
+    """
+
+    def __init__(self, width: int = 160, learning_rate: float = 0.05,
+                 pixel_threshold: int = 25, motion_threshold: float = 0.002,
+                 max_skip_frames: int = 30):
+        """
+        Args:
+            width: 运动检测使用的缩小宽度（像素）
+            learning_rate: 背景滑动平均的更新速率
+            pixel_threshold: 与背景的灰度差超过该值的像素视为运动
+            motion_threshold: 运动像素比例低于该值时跳过检测
+            max_skip_frames: 最多连续跳过的帧数，到达后强制检测一次
+        """
+        self.width = width
+        self.learning_rate = learning_rate
+        self.pixel_threshold = pixel_threshold
+        self.motion_threshold = motion_threshold
+        self.max_skip_frames = max_skip_frames
+
+        self.background = None
+        self.consecutive_skips = 0
+        self.last_motion = 1.0
+
+        self.stats = {'frames': 0, 'skipped': 0}
+
+    def reset(self):
+        """丢弃背景模型（例如相机被移动后）"""
+        self.background = None
+        self.consecutive_skips = 0
+
+    def check(self, frame: Union[np.ndarray, FrameContext],
+              regions: Optional[List[List[float]]] = None) -> bool:
+        """
+        判断本帧是否需要运行检测器
+
+        Args:
+            frame: BGR原始帧或帧上下文
+            regions: 关注区域列表 [[x1, y1, x2, y2], ...]（原图坐标），None表示整幅画面；
+                     last_motion 记录各区域运动比例中的最大值
+
+        Returns:
+            True 表示需要检测
+        """
+        self.stats['frames'] += 1
+
+        context = FrameContext.wrap(frame)
+        scale = self.width / context.shape[1]
+        gray = context.resized(scale).blurred(5)
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self.consecutive_skips = 0
+            self.last_motion = 1.0
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        moving = diff >= self.pixel_threshold
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        if regions:
+            self.last_motion = 0.0
+            for x1, y1, x2, y2 in regions:
+                window = moving[max(0, int(y1 * scale)):max(0, int(np.ceil(y2 * scale))),
+                                max(0, int(x1 * scale)):max(0, int(np.ceil(x2 * scale)))]
+                if window.size:
+                    self.last_motion = max(self.last_motion, float(window.mean()))
+        else:
+            self.last_motion = float(moving.mean())
+
+        if self.last_motion < self.motion_threshold and self.consecutive_skips < self.max_skip_frames:
+            self.consecutive_skips += 1
+            self.stats['skipped'] += 1
+            return False
+
+        self.consecutive_skips = 0
+        return True
+
+
+class BackgroundModel:
+    """
+    每个会话的MOG2背景模型，为远处小球提供运动候选区域
+
+    固定机位下，运动的足球相对静止的球场是前景；在缩小的画面上做背景建模，
+    候选框再映射回原图分辨率做裁剪分类。
+
+    背景模型每帧都要更新（包括级联廉价阶段给出结果、不运行YOLO的帧）：MOG2 按帧数衰减历史，
+    只在检测帧更新时，帧间隔随跟踪状态忽长忽短，刚停下的球和刚开始移动的球员会被错误地
+    留在前景或吸收进背景。apply 在缩小图上进行，开销很小；同一帧重复调用直接返回已有的掩码。
+    """
+
+    def __init__(self, scale: float = 0.5, history: int = 300, var_threshold: float = 16,
+                 warmup_frames: int = 5, full_frame_interval: int = 15):
+        """
+        Args:
+            scale: 背景建模使用的缩放比例
+            history: MOG2 历史帧数
+            var_threshold: MOG2 前景判定阈值
+            warmup_frames: 背景模型收敛前的帧数，期间使用整帧检测
+            full_frame_interval: 每隔多少次检测做一次整帧检测，找回静止的球
+        """
+        self.scale = scale
+        self.warmup_frames = warmup_frames
+        self.full_frame_interval = full_frame_interval
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=history, varThreshold=var_threshold, detectShadows=False
+        )
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self.frame_count = 0
+        self.detection_count = 0
+        self.foreground = None
+        self._source = None
+
+    def apply(self, frame: Union[np.ndarray, FrameContext]) -> np.ndarray:
+        """
+        用新的一帧更新背景模型
+
+        Args:
+            frame: BGR原始帧或帧上下文（复用本帧已计算的缩小图）；
+                   同一个帧上下文再次传入时不重复更新，直接返回本帧的掩码
+
+        Returns:
+            缩小后的前景掩码（uint8, 0/255）
+        """
+        if isinstance(frame, FrameContext) and frame is self._source:
+            return self.foreground
+        self.frame_count += 1
+        self._source = frame if isinstance(frame, FrameContext) else None
+        foreground = self.subtractor.apply(FrameContext.wrap(frame).resized(self.scale).frame)
+        self.foreground = cv2.morphologyEx(foreground, cv2.MORPH_OPEN, self.kernel)
+        return self.foreground
+
+    def needs_full_frame(self) -> bool:
+        """
+        本次检测是否应使用整帧检测（模型预热中或到了周期性整帧检测）
+
+        每次运行检测时调用一次；周期按检测次数计算，不受廉价阶段接管的帧数影响
+        """
+        self.detection_count += 1
+        return (self.frame_count <= self.warmup_frames or
+                self.detection_count % self.full_frame_interval == 0)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+INT8 训练后量化 - 为实时预览生成量化模型并输出精度对比报告
+
+流程:
+1. 把配置的 .pt 模型导出为 FP32 ONNX（复用 soccer_detector.export_model 的缓存）
+2. 用一批有代表性的画面（例如测试脚本写出的 *.jpg）做静态量化校准，
+   生成 <模型名>_<尺寸>_int8.onnx，放在 .pt 文件旁边
+3. 在留出的画面上对比 FP32 与 INT8：速度提升、检测框一致性、足球召回率
+
+量化结果通过 SoccerDetector(backend='onnx_int8') 使用。
+
+用法:
+    python ai_model/quantize_model.py --model yolo11s.pt --frames calibration_frames
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from geometry import pairwise_iou
+from soccer_detector import SoccerDetector, export_model, letterbox, int8_model_path
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# 检测头中的解码算子（DFL、sigmoid、坐标拼接）对量化误差敏感，保留FP32
+DETECT_HEAD_FP32_OPS = {'Sigmoid', 'Softmax', 'Concat', 'Mul', 'Add', 'Sub', 'Div',
+                        'Split', 'Reshape', 'Transpose', 'Slice'}
+
+
+def load_frames(frames_dir: str, max_frames: Optional[int] = None) -> List[np.ndarray]:
+    """读取目录中的所有图片帧（按文件名排序）"""
+    frames = []
+    for name in sorted(os.listdir(frames_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        frame = cv2.imread(os.path.join(frames_dir, name))
+        if frame is not None:
+            frames.append(frame)
+        if max_frames is not None and len(frames) >= max_frames:
+            break
+    return frames
+
+
+def split_frames(frames: List[np.ndarray], holdout: float) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """
+    按固定间隔划分校准集和留出集，避免连续帧全部落在同一边
+    """
+    if len(frames) < 2:
+        return frames, frames
+    step = max(2, int(round(1 / max(holdout, 1e-3))))
+    holdout_frames = frames[::step]
+    calibration_frames = [f for i, f in enumerate(frames) if i % step]
+    return calibration_frames, holdout_frames
+
+
+class FrameCalibrationReader:
+    """
+    onnxruntime 静态量化的校准数据读取器
+
+    使用与推理时完全相同的letterbox预处理。
+    """
+
+    def __init__(self, frames: List[np.ndarray], input_name: str, input_shape):
+        self.input_name = input_name
+        self.input_shape = input_shape
+        self._frames = iter(frames)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        frame = next(self._frames, None)
+        if frame is None:
+            return None
+        padded, _, _ = letterbox(frame, self.input_shape)
+        return {self.input_name: cv2.dnn.blobFromImage(padded, 1 / 255.0, swapRB=True)}
+
+    def rewind(self):
+        pass
+
+
+def _detect_head_nodes(onnx_model) -> List[str]:
+    """找出最后一个模块（Detect检测头）中的解码节点"""
+    def module_index(node_name):
+        parts = node_name.split('/')
+        for part in parts:
+            if part.startswith('model.') and part[6:].isdigit():
+                return int(part[6:])
+        return -1
+
+    last_module = max(module_index(node.name) for node in onnx_model.graph.node)
+    return [node.name for node in onnx_model.graph.node
+            if module_index(node.name) == last_module and node.op_type in DETECT_HEAD_FP32_OPS]
+
+
+def quantize(fp32_path: str, int8_path: str, calibration_frames: List[np.ndarray]) -> str:
+    """
+    对 FP32 ONNX 模型做 INT8 静态量化（QDQ格式，权重逐通道）
+    """
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import (CalibrationMethod, QuantFormat, QuantType,
+                                          quantize_static)
+
+    session = ort.InferenceSession(fp32_path, providers=['CPUExecutionProvider'])
+    model_input = session.get_inputs()[0]
+    input_shape = tuple(int(x) for x in model_input.shape[2:4])
+    reader = FrameCalibrationReader(calibration_frames, model_input.name, input_shape)
+
+    quantize_static(
+        fp32_path,
+        int8_path,
+        reader,
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=_detect_head_nodes(onnx.load(fp32_path)),
+    )
+    return int8_path
+
+
+def match_boxes(reference: np.ndarray, candidate: np.ndarray, iou_threshold: float) -> List[float]:
+    """
+    同类别贪心匹配，返回每个匹配对的IoU
+
+    Args:
+        reference/candidate: (N, 6) [x1, y1, x2, y2, conf, cls]
+    """
+    if len(reference) == 0 or len(candidate) == 0:
+        return []
+    ious = pairwise_iou(reference[:, :4], candidate[:, :4])
+    ious[reference[:, None, 5] != candidate[None, :, 5]] = 0.0
+    matched = []
+    for i in np.argsort(-reference[:, 4]):
+        j = int(np.argmax(ious[i]))
+        if ious[i, j] >= iou_threshold:
+            matched.append(float(ious[i, j]))
+            ious[:, j] = 0.0
+    return matched
+
+
+def _time_predict(detector: SoccerDetector, frame: np.ndarray) -> Tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    data = detector.backend.predict(frame, conf=detector.confidence_threshold,
+                                    iou=detector.iou_threshold, classes=None)
+    return data, (time.perf_counter() - start) * 1000
+
+
+def parity_report(fp32: SoccerDetector, int8: SoccerDetector, frames: List[np.ndarray],
+                  iou_threshold: float = 0.5, warmup: int = 3) -> Dict:
+    """
+    在留出集上比较 FP32 与 INT8 模型
+
+    - 速度：两者均使用 ONNX Runtime CPU，差异只来自量化
+    - 检测框一致性：以FP32结果为参照，同类别IoU≥阈值视为一致
+    - 足球召回率：FP32 经 SoccerDetector 筛选后的足球，有多少被INT8同样检出
+    """
+    for frame in frames[:warmup]:
+        fp32.backend.predict(frame, fp32.confidence_threshold, fp32.iou_threshold)
+        int8.backend.predict(frame, int8.confidence_threshold, int8.iou_threshold)
+
+    fp32_ms, int8_ms, matched_ious = [], [], []
+    fp32_boxes = int8_boxes = 0
+    fp32_balls = recalled_balls = 0
+
+    for frame in frames:
+        ref, ref_ms = _time_predict(fp32, frame)
+        cand, cand_ms = _time_predict(int8, frame)
+        fp32_ms.append(ref_ms)
+        int8_ms.append(cand_ms)
+
+        ious = match_boxes(ref, cand, iou_threshold)
+        matched_ious.extend(ious)
+        fp32_boxes += len(ref)
+        int8_boxes += len(cand)
+
+        ref_balls = fp32._yolo_detect(frame)['soccer_balls']
+        cand_balls = int8._yolo_detect(frame)['soccer_balls']
+        if ref_balls:
+            ref_arr = np.array([b['bbox'] + [b['confidence'], 32] for b in ref_balls], dtype=np.float32)
+            cand_arr = np.array([b['bbox'] + [b['confidence'], 32] for b in cand_balls],
+                                dtype=np.float32).reshape(-1, 6)
+            fp32_balls += len(ref_balls)
+            recalled_balls += len(match_boxes(ref_arr, cand_arr, iou_threshold))
+
+    fp32_mean = float(np.mean(fp32_ms)) if fp32_ms else 0.0
+    int8_mean = float(np.mean(int8_ms)) if int8_ms else 0.0
+    return {
+        'frames': len(frames),
+        'fp32_ms': round(fp32_mean, 2),
+        'int8_ms': round(int8_mean, 2),
+        'speedup': round(fp32_mean / int8_mean, 3) if int8_mean > 0 else None,
+        'box_recall_vs_fp32': round(len(matched_ious) / fp32_boxes, 4) if fp32_boxes else None,
+        'box_precision_vs_fp32': round(len(matched_ious) / int8_boxes, 4) if int8_boxes else None,
+        'mean_matched_iou': round(float(np.mean(matched_ious)), 4) if matched_ious else None,
+        'fp32_balls': fp32_balls,
+        'ball_recall_vs_fp32': round(recalled_balls / fp32_balls, 4) if fp32_balls else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description='ClipGoal-AI INT8 量化与精度对比')
+    parser.add_argument('--model', default='yolo11s.pt', help='FP32 .pt 模型')
+    parser.add_argument('--imgsz', type=int, default=640, help='导出与推理输入尺寸')
+    parser.add_argument('--frames', required=True, help='代表性画面目录（jpg/png）')
+    parser.add_argument('--holdout', type=float, default=0.2, help='留出集比例')
+    parser.add_argument('--max-frames', type=int, default=500, help='最多读取的画面数')
+    parser.add_argument('--report', help='报告输出路径（默认与INT8模型同名 .json）')
+    parser.add_argument('--min-ball-recall', type=float, default=0.95, help='推荐使用的最低足球召回率')
+    parser.add_argument('--min-speedup', type=float, default=1.2, help='推荐使用的最低加速比')
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.frames, args.max_frames)
+    if not frames:
+        print(f"❌ 目录中没有可用画面: {args.frames}")
+        return {}
+    calibration_frames, holdout_frames = split_frames(frames, args.holdout)
+    print(f"🖼️ 校准集 {len(calibration_frames)} 帧, 留出集 {len(holdout_frames)} 帧")
+
+    fp32_path = export_model(args.model, 'onnx', args.imgsz)
+    int8_path = int8_model_path(args.model, args.imgsz)
+    print(f"⚙️ 正在量化: {fp32_path} -> {int8_path}")
+    quantize(fp32_path, int8_path, calibration_frames)
+    print("✅ 量化完成")
+
+    fp32 = SoccerDetector(model_path=args.model, imgsz=args.imgsz, backend='onnx')
+    int8 = SoccerDetector(model_path=args.model, imgsz=args.imgsz, backend='onnx_int8')
+    report = parity_report(fp32, int8, holdout_frames)
+    report.update({
+        'model': args.model,
+        'imgsz': args.imgsz,
+        'fp32_model': fp32_path,
+        'int8_model': int8_path,
+        'recommended_for_preview': bool(
+            report['speedup'] is not None and report['speedup'] >= args.min_speedup and
+            (report['ball_recall_vs_fp32'] is None or report['ball_recall_vs_fp32'] >= args.min_ball_recall)
+        ),
+    })
+
+    report_path = args.report or os.path.splitext(int8_path)[0] + '.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n📊 INT8 精度对比报告:")
+    print(f"   ⏱️ FP32 {report['fp32_ms']}ms -> INT8 {report['int8_ms']}ms (加速 {report['speedup']}x)")
+    print(f"   📦 检测框一致性: 召回 {report['box_recall_vs_fp32']}, 精确 {report['box_precision_vs_fp32']}, "
+          f"平均IoU {report['mean_matched_iou']}")
+    print(f"   ⚽ 足球召回率: {report['ball_recall_vs_fp32']} (FP32共{report['fp32_balls']}个)")
+    print(f"   {'✅ 推荐用于实时预览' if report['recommended_for_preview'] else '⚠️ 不建议用于实时预览'}")
+    print(f"   📝 报告: {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
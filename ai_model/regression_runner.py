@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+离线回归评测 - 在视频目录上同时测量速度与检测精度
+
+对每个配置（模型 × 推理后端 × 输入尺寸 × 级联阶段 × 检测模式 × 球门缓存）运行完整的
+SoccerDetector.process_frame 流程，每个视频像 /ws 的一个连接一样使用独立的跟踪器、背景模型、
+球门缓存和轨迹估计器，时间戳按帧号/帧率给出，因此级联、候选区域和球门缓存都在评测范围内。
+输出逐帧CSV、每个配置的汇总（FPS、召回率、精确率，尤其是小球）以及速度/精度前沿，
+保证每一次性能改动都能看到它在检测效果上的代价。
+
+真值格式（可选）：--gt-dir 下与视频同名的CSV，例如 match1.mp4 -> match1.csv
+    frame,x1,y1,x2,y2
+    0,512,300,530,318
+frame 为从0开始的帧号，同一帧可有多行；有真值文件的视频中未出现的帧视为"无球"。
+
+用法:
+    python ai_model/regression_runner.py input_videos --gt-dir input_videos/gt \\
+        --model yolo11n.pt yolo11s.pt --backend torch onnx --imgsz 640 960 \\
+        --cascade tracker+color none --detection-mode full proposals --goal-cache off on
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ball_tracker import BallTracker
+from frame_context import BufferPool, FrameContext
+from motion_gate import BackgroundModel
+from soccer_detector import CASCADE_STAGES, SoccerDetector
+from track_buffer import TrackBuffer
+from trajectory import TrajectoryEstimator
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.m4v')
+
+# COCO 定义的小目标：面积小于 32×32 像素
+SMALL_BALL_AREA = 32 * 32
+
+# 视频没有帧率信息时按30fps生成时间戳
+DEFAULT_FPS = 30.0
+
+CSV_FIELDS = [
+    'config', 'cascade', 'detection_mode', 'goal_cache', 'video', 'frame', 'timestamp',
+    'latency_ms', 'stage', 'num_goals', 'num_pred', 'num_gt',
+    'tp', 'fp', 'fn', 'small_gt', 'small_tp', 'small_pred', 'small_pred_tp',
+    'best_confidence', 'best_bbox'
+]
+
+
+def list_videos(video_dir: str) -> List[str]:
+    """列出目录下的所有视频文件"""
+    videos = []
+    for name in sorted(os.listdir(video_dir)):
+        if name.lower().endswith(VIDEO_EXTENSIONS):
+            videos.append(os.path.join(video_dir, name))
+    return videos
+
+
+def load_ground_truth(gt_dir: Optional[str], video_path: str) -> Optional[Dict[int, List[List[float]]]]:
+    """
+    读取视频对应的真值球框
+
+    Returns:
+        {帧号: [[x1, y1, x2, y2], ...]}，没有真值文件时返回None
+    """
+    if not gt_dir:
+        return None
+
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    gt_path = os.path.join(gt_dir, f'{stem}.csv')
+    if not os.path.exists(gt_path):
+        return None
+
+    boxes: Dict[int, List[List[float]]] = {}
+    with open(gt_path, newline='') as f:
+        for row in csv.DictReader(f):
+            if not row.get('x1'):
+                continue  # 允许只写帧号的"无球"行
+            frame_idx = int(row['frame'])
+            boxes.setdefault(frame_idx, []).append(
+                [float(row['x1']), float(row['y1']), float(row['x2']), float(row['y2'])]
+            )
+    return boxes
+
+
+def _box_area(box) -> float:
+    return max(0.0, box[2] - box[0]) * max(0.0, box[3] - box[1])
+
+
+def _iou(a, b) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = _box_area(a) + _box_area(b) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_balls(preds: List[Dict], gts: List[List[float]], match_iou: float) -> List[Tuple[int, int]]:
+    """
+    贪心匹配预测球与真值球
+
+    预测按置信度从高到低依次匹配；IoU达到阈值，或预测中心落在真值框内即视为命中
+    （小球的框抖动几个像素IoU就会大幅下降，中心判据更稳定）。
+
+    Returns:
+        [(预测下标, 真值下标), ...]
+    """
+    order = sorted(range(len(preds)), key=lambda i: preds[i]['confidence'], reverse=True)
+    used_gt = set()
+    matches = []
+    for i in order:
+        bbox = preds[i]['bbox']
+        cx, cy = preds[i]['center']
+        best_j, best_iou = -1, -1.0
+        for j, gt in enumerate(gts):
+            if j in used_gt:
+                continue
+            iou = _iou(bbox, gt)
+            inside = gt[0] <= cx <= gt[2] and gt[1] <= cy <= gt[3]
+            if (iou >= match_iou or inside) and iou > best_iou:
+                best_j, best_iou = j, iou
+        if best_j >= 0:
+            used_gt.add(best_j)
+            matches.append((i, best_j))
+    return matches
+
+
+def evaluate_frame(preds: List[Dict], gts: Optional[List[List[float]]], match_iou: float,
+                   small_area: float) -> Dict:
+    """计算单帧的命中统计；gts为None表示该帧没有标注"""
+    stats = {
+        'num_pred': len(preds), 'num_gt': '', 'tp': '', 'fp': '', 'fn': '',
+        'small_gt': '', 'small_tp': '', 'small_pred': '', 'small_pred_tp': ''
+    }
+    if gts is None:
+        return stats
+
+    matches = match_balls(preds, gts, match_iou)
+    matched_pred = {i for i, _ in matches}
+    matched_gt = {j for _, j in matches}
+    small_gt = [j for j, gt in enumerate(gts) if _box_area(gt) < small_area]
+    small_pred = [i for i, p in enumerate(preds) if _box_area(p['bbox']) < small_area]
+
+    stats.update({
+        'num_gt': len(gts),
+        'tp': len(matches),
+        'fp': len(preds) - len(matches),
+        'fn': len(gts) - len(matches),
+        'small_gt': len(small_gt),
+        'small_tp': sum(1 for j in small_gt if j in matched_gt),
+        'small_pred': len(small_pred),
+        'small_pred_tp': sum(1 for i in small_pred if i in matched_pred),
+    })
+    return stats
+
+
+def _ratio(num: float, den: float) -> Optional[float]:
+    return round(num / den, 4) if den > 0 else None
+
+
+def summarize(rows: List[Dict]) -> Dict:
+    """汇总一个配置的所有逐帧结果"""
+    latencies = np.array([r['latency_ms'] for r in rows], dtype=np.float64)
+    annotated = [r for r in rows if r['num_gt'] != '']
+
+    def total(key):
+        return sum(r[key] for r in annotated)
+
+    summary = {
+        'frames': len(rows),
+        'annotated_frames': len(annotated),
+        'fps': round(float(1000.0 * len(rows) / latencies.sum()), 2) if latencies.sum() > 0 else None,
+        'latency_mean_ms': round(float(latencies.mean()), 2) if len(rows) else None,
+        'latency_p50_ms': round(float(np.percentile(latencies, 50)), 2) if len(rows) else None,
+        'latency_p95_ms': round(float(np.percentile(latencies, 95)), 2) if len(rows) else None,
+        'ball_frame_rate': _ratio(sum(1 for r in rows if r['num_pred'] > 0), len(rows)),
+        'yolo_share': _ratio(sum(1 for r in rows if r['stage'] == 'yolo'), len(rows)),
+        'recall': _ratio(total('tp'), total('num_gt')) if annotated else None,
+        'precision': _ratio(total('tp'), total('tp') + total('fp')) if annotated else None,
+        'small_recall': _ratio(total('small_tp'), total('small_gt')) if annotated else None,
+        'small_precision': _ratio(total('small_pred_tp'), total('small_pred')) if annotated else None,
+    }
+    return summary
+
+
+def speed_accuracy_frontier(summaries: Dict[str, Dict]) -> List[str]:
+    """
+    速度/精度帕累托前沿
+
+    精度指标依次选用小球召回率、整体召回率；没有真值时退化为有球帧比例。
+    返回不被任何其他配置在速度和精度上同时压制的配置名，按FPS从高到低排列。
+    """
+    def accuracy(s):
+        for key in ('small_recall', 'recall', 'ball_frame_rate'):
+            if s.get(key) is not None:
+                return s[key]
+        return 0.0
+
+    points = {name: (s['fps'] or 0.0, accuracy(s)) for name, s in summaries.items()}
+    frontier = []
+    for name, (fps, acc) in points.items():
+        dominated = any(
+            other_fps >= fps and other_acc >= acc and (other_fps, other_acc) != (fps, acc)
+            for other, (other_fps, other_acc) in points.items() if other != name
+        )
+        if not dominated:
+            frontier.append(name)
+    return sorted(frontier, key=lambda n: points[n][0], reverse=True)
+
+
+def run_config(config: Dict, videos: List[str], gt_dir: Optional[str], writer: csv.DictWriter,
+               max_frames: Optional[int], stride: int, match_iou: float, small_area: float) -> Dict:
+    """
+    在所有视频上运行一个检测配置，逐帧写入CSV并返回汇总
+
+    每个视频相当于 /ws 的一个新连接：会话对象（足球历史、跟踪器、背景模型、球门缓存、
+    轨迹估计器、缓冲池）按视频重新创建，帧的时间戳为 帧号 / 视频帧率。
+    """
+    detector = SoccerDetector(model_path=config['model'], imgsz=config['imgsz'],
+                              backend=config['backend'], detection_mode=config['detection_mode'],
+                              cascade=config['cascade'])
+    rows = []
+
+    for video_path in videos:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f"❌ 无法打开视频文件: {video_path}")
+            continue
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if not fps or fps <= 0 or not np.isfinite(fps):
+            fps = DEFAULT_FPS
+        gt = load_ground_truth(gt_dir, video_path)
+        ball_history = TrackBuffer()
+        tracker = BallTracker()
+        background_model = BackgroundModel()
+        goal_cache = detector.create_goal_cache() if config['goal_cache'] else None
+        trajectory = TrajectoryEstimator()
+        frame_pool = BufferPool()
+        frame_idx = -1
+        processed = 0
+
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_idx += 1
+            if frame_idx % stride:
+                continue
+            if max_frames is not None and processed >= max_frames:
+                break
+
+            timestamp = frame_idx / fps
+            start = time.perf_counter()
+            context = FrameContext(frame, frame_pool)
+            result = detector.process_frame(context, ball_history,
+                                            tracker=tracker,
+                                            background_model=background_model,
+                                            goal_cache=goal_cache,
+                                            trajectory=trajectory,
+                                            timestamp=timestamp)
+            latency_ms = (time.perf_counter() - start) * 1000
+            ball_history = result['ball_history']
+            processed += 1
+
+            preds = result['detections']['soccer_balls']
+            gts = gt.get(frame_idx, []) if gt is not None else None
+            best = max(preds, key=lambda b: b['confidence']) if preds else None
+
+            row = {
+                'config': config['name'],
+                'cascade': format_cascade(config['cascade']),
+                'detection_mode': config['detection_mode'],
+                'goal_cache': 'on' if config['goal_cache'] else 'off',
+                'video': os.path.basename(video_path),
+                'frame': frame_idx,
+                'timestamp': round(timestamp, 3),
+                'latency_ms': round(latency_ms, 2),
+                'stage': result['cascade']['stage'],
+                'num_goals': len(result['detections']['goal_areas']),
+                'best_confidence': round(best['confidence'], 4) if best else '',
+                'best_bbox': ' '.join(f'{v:.1f}' for v in best['bbox']) if best else '',
+            }
+            row.update(evaluate_frame(preds, gts, match_iou, small_area))
+            writer.writerow(row)
+            rows.append(row)
+
+        cap.release()
+        print(f"   📹 {config['name']} | {os.path.basename(video_path)}: {processed}帧")
+
+    return summarize(rows)
+
+
+def parse_cascade(text: str) -> List[str]:
+    """
+    解析命令行中的级联阶段：'tracker+color' -> ['tracker', 'color']，'none' 表示每帧都运行YOLO
+    """
+    if text == 'none':
+        return []
+    stages = [stage for stage in text.split('+') if stage]
+    unknown = [stage for stage in stages if stage not in CASCADE_STAGES]
+    if unknown:
+        raise ValueError(f'未知的级联阶段: {unknown}，可选 {list(CASCADE_STAGES)} 或 none')
+    return stages
+
+
+def format_cascade(stages: List[str]) -> str:
+    """parse_cascade 的逆操作，用于配置名和CSV"""
+    return '+'.join(stages) if stages else 'none'
+
+
+def build_configs(models: List[str], backends: List[str], sizes: List[int],
+                  cascades: Optional[List[List[str]]] = None, detection_modes: Optional[List[str]] = None,
+                  goal_caches: Optional[List[bool]] = None) -> List[Dict]:
+    """
+    模型 × 推理后端 × 输入尺寸 × 级联阶段 × 检测模式 × 球门缓存 的所有组合
+
+    未指定的轴取 /ws 的默认值（全部级联阶段、整帧检测、不启用球门缓存）
+    """
+    cascades = [list(CASCADE_STAGES)] if cascades is None else cascades
+    detection_modes = ['full'] if detection_modes is None else detection_modes
+    goal_caches = [False] if goal_caches is None else goal_caches
+    configs = []
+    for model, backend, imgsz, cascade, mode, goal_cache in itertools.product(
+            models, backends, sizes, cascades, detection_modes, goal_caches):
+        name = (f'{os.path.splitext(os.path.basename(model))[0]}/{backend}@{imgsz}'
+                f'/{mode}/{format_cascade(cascade)}' + ('/goals' if goal_cache else ''))
+        configs.append({'name': name, 'model': model, 'backend': backend, 'imgsz': imgsz,
+                        'cascade': list(cascade), 'detection_mode': mode, 'goal_cache': goal_cache})
+    return configs
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description='ClipGoal-AI 离线速度/精度回归评测')
+    parser.add_argument('video_dir', help='比赛视频目录')
+    parser.add_argument('--gt-dir', help='真值球框CSV目录（可选）')
+    parser.add_argument('--model', nargs='+', default=['yolo11s.pt'], help='待评测的模型')
+    parser.add_argument('--backend', nargs='+', default=['torch'], help='待评测的推理后端 (torch/onnx/openvino)')
+    parser.add_argument('--imgsz', nargs='+', type=int, default=[640], help='待评测的输入尺寸')
+    parser.add_argument('--cascade', nargs='+', default=['+'.join(CASCADE_STAGES)],
+                        help="待评测的级联阶段组合，阶段用+连接（如 tracker+color、color），none 表示每帧都运行YOLO")
+    parser.add_argument('--detection-mode', nargs='+', default=['full'], choices=['full', 'proposals'],
+                        help='待评测的检测模式')
+    parser.add_argument('--goal-cache', nargs='+', default=['off'], choices=['off', 'on'],
+                        help='是否启用会话球门缓存（自动球门检测）')
+    parser.add_argument('--output-dir', default='regression_output', help='结果输出目录')
+    parser.add_argument('--max-frames', type=int, help='每个视频最多处理的帧数')
+    parser.add_argument('--stride', type=int, default=1, help='每隔多少帧取一帧')
+    parser.add_argument('--match-iou', type=float, default=0.3, help='预测与真值匹配的IoU阈值')
+    parser.add_argument('--small-area', type=float, default=SMALL_BALL_AREA, help='小球面积上限（像素²）')
+    args = parser.parse_args(argv)
+
+    videos = list_videos(args.video_dir)
+    if not videos:
+        print(f"❌ 目录中没有视频: {args.video_dir}")
+        return {}
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    csv_path = os.path.join(args.output_dir, 'frames.csv')
+    configs = build_configs(args.model, args.backend, args.imgsz,
+                            cascades=[parse_cascade(text) for text in args.cascade],
+                            detection_modes=args.detection_mode,
+                            goal_caches=[value == 'on' for value in args.goal_cache])
+
+    print(f"🎯 {len(videos)}个视频 × {len(configs)}个配置")
+    summaries = {}
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for config in configs:
+            print(f"\n🔍 评测配置: {config['name']}")
+            summaries[config['name']] = run_config(
+                config, videos, args.gt_dir, writer,
+                args.max_frames, max(1, args.stride), args.match_iou, args.small_area
+            )
+
+    report = {
+        'configs': {c['name']: dict(c, **summaries[c['name']]) for c in configs},
+        'frontier': speed_accuracy_frontier(summaries),
+    }
+    with open(os.path.join(args.output_dir, 'summary.json'), 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n📊 汇总:")
+    width = max([24] + [len(name) + 2 for name in summaries])
+    print(f"{'配置':<{width}}{'FPS':>8}{'p95ms':>9}{'YOLO占比':>10}{'召回':>8}{'精确':>8}{'小球召回':>10}{'小球精确':>10}")
+    for name, s in summaries.items():
+        cells = [s['fps'], s['latency_p95_ms'], s['yolo_share'], s['recall'], s['precision'],
+                 s['small_recall'], s['small_precision']]
+        text = ''.join(f"{'-' if v is None else v:>{w}}" for v, w in zip(cells, (8, 9, 10, 8, 8, 10, 10)))
+        marker = ' ⭐' if name in report['frontier'] else ''
+        print(f"{name:<{width}}{text}{marker}")
+    print(f"\n✅ 逐帧结果: {csv_path}")
+    print(f"✅ 速度/精度前沿: {' > '.join(report['frontier'])}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -7,24 +7,297 @@ import torch
 import cv2
 import numpy as np
 from ultralytics import YOLO
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 import json
+import os
+import shutil
 import time
 
+from ball_tracker import BallTracker
+from detection import Detection
+from frame_context import FrameContext
+from geometry import (non_max_suppression, offset_polygon, point_polygon_distances, points_in_boxes,
+                      points_in_polygon, segment_box_entries, segment_polygon_entries)
+from goal_cache import GoalCache
+from goal_region import GoalRegion
+from motion_gate import BackgroundModel
+from track_buffer import TrackBuffer
+from trajectory import TrajectoryEstimator
+
+
+def letterbox(image: np.ndarray, new_shape: Tuple[int, int] = (640, 640),
+              color: Tuple[int, int, int] = (114, 114, 114)) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    等比缩放并居中填充到固定输入尺寸（与ultralytics导出模型的预处理一致）
+    
+    Args:
+        image: BGR图像
+        new_shape: 目标尺寸 (高, 宽)
+        color: 填充颜色
+        
+    Returns:
+        (填充后的图像, 缩放比例, (左侧填充, 上侧填充))
+    """
+    height, width = image.shape[:2]
+    ratio = min(new_shape[0] / height, new_shape[1] / width)
+    resized_w, resized_h = int(round(width * ratio)), int(round(height * ratio))
+    pad_w = (new_shape[1] - resized_w) / 2
+    pad_h = (new_shape[0] - resized_h) / 2
+    
+    if (width, height) != (resized_w, resized_h):
+        image = cv2.resize(image, (resized_w, resized_h), interpolation=cv2.INTER_LINEAR)
+    
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    padded = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return padded, ratio, (left, top)
+
+
+def export_model(model_path: str, export_format: str, imgsz: int) -> str:
+    """
+    把 .pt 模型导出为推理引擎格式，结果缓存在 .pt 文件旁边
+    
+    缓存名带有输入尺寸（如 yolo11s_640.onnx、yolo11s_640_openvino_model/），
+    .pt 文件更新后会重新导出。
+    
+    Args:
+        model_path: .pt 模型路径
+        export_format: 'onnx' 或 'openvino'
+        imgsz: 导出时固定的输入尺寸
+        
+    Returns:
+        导出模型的路径（onnx文件或openvino目录）
+    """
+    stem, _ = os.path.splitext(model_path)
+    if export_format == 'onnx':
+        cached_path = f'{stem}_{imgsz}.onnx'
+    elif export_format == 'openvino':
+        cached_path = f'{stem}_{imgsz}_openvino_model'
+    else:
+        raise ValueError(f'不支持的导出格式: {export_format}')
+    
+    if os.path.exists(cached_path) and (
+            not os.path.exists(model_path) or
+            os.path.getmtime(cached_path) >= os.path.getmtime(model_path)):
+        return cached_path
+    
+    print(f"正在导出 {model_path} -> {cached_path} ...")
+    exported_path = YOLO(model_path).export(format=export_format, imgsz=imgsz, dynamic=False)
+    if os.path.abspath(exported_path) != os.path.abspath(cached_path):
+        if os.path.isdir(cached_path):
+            shutil.rmtree(cached_path)
+        shutil.move(exported_path, cached_path)
+    print(f"✅ 模型导出完成: {cached_path}")
+    return cached_path
+
+
+def int8_model_path(model_path: str, imgsz: int) -> str:
+    """INT8量化模型的缓存路径（由 quantize_model.py 生成）"""
+    stem, _ = os.path.splitext(model_path)
+    return f'{stem}_{imgsz}_int8.onnx'
+
+
+class InferenceBackend:
+    """
+    推理后端接口
+    
+    predict 返回 (N, 6) 的 float32 数组，每行 [x1, y1, x2, y2, conf, cls]，坐标为原图像素。
+    """
+    name = 'base'
+    
+    def predict(self, frame: np.ndarray, conf: float, iou: float,
+                classes: Optional[List[int]] = None) -> np.ndarray:
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """ultralytics PyTorch 推理"""
+    name = 'torch'
+    
+    def __init__(self, model_path: str, imgsz: int):
+        self.model = YOLO(model_path)
+        self.imgsz = imgsz
+    
+    def predict(self, frame: np.ndarray, conf: float, iou: float,
+                classes: Optional[List[int]] = None) -> np.ndarray:
+        results = self.model.predict(
+            frame,
+            conf=conf,
+            iou=iou,
+            imgsz=self.imgsz,
+            classes=classes,
+            verbose=False
+        )
+        if not results or results[0].boxes is None:
+            return np.zeros((0, 6), dtype=np.float32)
+        return results[0].boxes.data.cpu().numpy().astype(np.float32, copy=False)
+
+
+class ExportedModelBackend(InferenceBackend):
+    """
+    导出模型（ONNX/OpenVINO）的公共部分：letterbox预处理 + YOLO输出解码 + NMS
+    """
+    input_shape = (640, 640)
+    max_det = 300
+    max_wh = 7680  # 按类别偏移框坐标，使NMS在类别内部进行
+    
+    def _infer(self, blob: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+    
+    def predict(self, frame: np.ndarray, conf: float, iou: float,
+                classes: Optional[List[int]] = None) -> np.ndarray:
+        padded, ratio, (pad_x, pad_y) = letterbox(frame, self.input_shape)
+        blob = cv2.dnn.blobFromImage(padded, 1 / 255.0, swapRB=True)
+        output = self._infer(blob)
+        return self._postprocess(output, ratio, pad_x, pad_y, frame.shape, conf, iou, classes)
+    
+    def _postprocess(self, output: np.ndarray, ratio: float, pad_x: float, pad_y: float,
+                     frame_shape, conf: float, iou: float,
+                     classes: Optional[List[int]]) -> np.ndarray:
+        # YOLO11 输出 (1, 4 + 类别数, 候选数)，前4行为 cx, cy, w, h
+        predictions = output[0].T
+        class_scores = predictions[:, 4:]
+        labels = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_scores)), labels]
+        
+        # 与ultralytics一致：先取最高分类别，再按类别过滤
+        keep = scores > conf
+        if classes is not None:
+            keep &= np.isin(labels, classes)
+        if not np.any(keep):
+            return np.zeros((0, 6), dtype=np.float32)
+        
+        xywh = predictions[keep, :4]
+        scores = scores[keep]
+        labels = labels[keep]
+        
+        boxes = np.empty_like(xywh)
+        boxes[:, 0] = xywh[:, 0] - xywh[:, 2] / 2
+        boxes[:, 1] = xywh[:, 1] - xywh[:, 3] / 2
+        boxes[:, 2] = xywh[:, 0] + xywh[:, 2] / 2
+        boxes[:, 3] = xywh[:, 1] + xywh[:, 3] / 2
+        
+        keep = non_max_suppression(boxes + labels[:, None] * self.max_wh, scores, iou, self.max_det)
+        boxes, scores, labels = boxes[keep], scores[keep], labels[keep]
+        
+        # 去掉填充并还原到原图尺寸
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad_x) / ratio
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad_y) / ratio
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, frame_shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, frame_shape[0])
+        
+        return np.concatenate(
+            [boxes, scores[:, None], labels[:, None].astype(boxes.dtype)], axis=1
+        ).astype(np.float32, copy=False)
+
+
+class OnnxRuntimeBackend(ExportedModelBackend):
+    """ONNX Runtime CPU 推理"""
+    name = 'onnx'
+    
+    def __init__(self, model_path: str, imgsz: int):
+        import onnxruntime as ort
+        
+        onnx_path = model_path if model_path.endswith('.onnx') else export_model(model_path, 'onnx', imgsz)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        shape = self.session.get_inputs()[0].shape
+        self.input_shape = tuple(int(x) if isinstance(x, int) else imgsz for x in shape[2:4])
+    
+    def _infer(self, blob: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OnnxInt8Backend(OnnxRuntimeBackend):
+    """INT8量化模型的 ONNX Runtime 推理"""
+    name = 'onnx_int8'
+    
+    def __init__(self, model_path: str, imgsz: int):
+        if not model_path.endswith('.onnx'):
+            model_path = int8_model_path(model_path, imgsz)
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(
+                    f'未找到INT8模型 {model_path}，请先运行 ai_model/quantize_model.py 进行量化'
+                )
+        super().__init__(model_path, imgsz)
+
+
+class OpenVINOBackend(ExportedModelBackend):
+    """OpenVINO CPU 推理"""
+    name = 'openvino'
+    
+    def __init__(self, model_path: str, imgsz: int):
+        import openvino as ov
+        
+        model_dir = model_path if os.path.isdir(model_path) else export_model(model_path, 'openvino', imgsz)
+        xml_files = [f for f in os.listdir(model_dir) if f.endswith('.xml')]
+        if not xml_files:
+            raise FileNotFoundError(f'OpenVINO模型目录中没有 .xml 文件: {model_dir}')
+        
+        core = ov.Core()
+        model = core.read_model(os.path.join(model_dir, xml_files[0]))
+        self.compiled_model = core.compile_model(model, 'CPU', {'PERFORMANCE_HINT': 'LATENCY'})
+        self.output = self.compiled_model.output(0)
+        shape = model.input(0).get_partial_shape()
+        self.input_shape = tuple(
+            dim.get_length() if dim.is_static else imgsz for dim in list(shape)[2:4]
+        )
+    
+    def _infer(self, blob: np.ndarray) -> np.ndarray:
+        return self.compiled_model([blob])[self.output]
+
+
+INFERENCE_BACKENDS = {
+    'torch': TorchBackend,
+    'onnx': OnnxRuntimeBackend,
+    'onnx_int8': OnnxInt8Backend,
+    'openvino': OpenVINOBackend,
+}
+
+
+# 级联检测中可以配置的廉价阶段；YOLO 始终是最后一级
+CASCADE_STAGES = ('tracker', 'color')
+
+
+def create_backend(backend: str, model_path: str, imgsz: int) -> InferenceBackend:
+    """
+    按名称创建推理后端
+    
+    Args:
+        backend: 'torch' / 'onnx' / 'onnx_int8' / 'openvino'
+        model_path: .pt 模型路径（或已导出的模型）
+        imgsz: 推理输入尺寸
+    """
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f'未知的推理后端: {backend}，可选: {", ".join(INFERENCE_BACKENDS)}')
+    return INFERENCE_BACKENDS[backend](model_path, imgsz)
+
 
 class SoccerDetector:
     """
     足球检测器 - 检测足球和球门
     """
     
-    def __init__(self, model_path: str = 'yolo11s.pt'):
+    def __init__(self, model_path: str = 'yolo11s.pt', imgsz: int = 640, backend: str = 'torch',
+                 detection_mode: str = 'full', cascade: Optional[List[str]] = None):
         """
         初始化足球检测器
         
         Args:
             model_path: YOLO模型路径
+            imgsz: 推理输入尺寸（长边像素）
+            backend: 推理后端 'torch' / 'onnx' / 'onnx_int8' / 'openvino'
+            detection_mode: 'full' 整帧检测；'proposals' 运动候选区域原分辨率裁剪检测
+            cascade: YOLO之前依次尝试的廉价阶段（'tracker' / 'color'），默认两者都用；
+                     空列表表示每帧都运行YOLO
         """
-        self.model = YOLO(model_path)
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.backend = create_backend(backend, model_path, imgsz)
+        # PyTorch后端下保留原始YOLO对象，其他后端为None
+        self.model = getattr(self.backend, 'model', None)
         
         # COCO数据集扩展类别映射 - 识别所有球类
         self.ball_classes = {
@@ -39,9 +312,42 @@ class SoccerDetector:
         self.confidence_threshold = 0.25  # 略微降低置信度
         self.iou_threshold = 0.4  # 降低IoU阈值
         
-        # 球门检测参数
-        self.goal_detection_history = []
+        # 推理时只保留下游实际使用的类别（目前只有运动球类会成为足球结果）
+        self.inference_classes = [32]
+        
+        # 运动候选区域检测参数（原图像素）
+        self.detection_mode = detection_mode
+        self.proposal_crop_size = 128
+        self.max_proposals = 16
+        self.proposal_min_area = 12
+        self.proposal_max_area = 3000
+        
+        # 级联检测：廉价阶段在跟踪器预测附近确认足球，可信时本帧不运行YOLO
+        self.cascade_stages = list(CASCADE_STAGES) if cascade is None else list(cascade)
+        unknown = [stage for stage in self.cascade_stages if stage not in CASCADE_STAGES]
+        if unknown:
+            raise ValueError(f'未知的级联阶段: {", ".join(unknown)}，可选: {", ".join(CASCADE_STAGES)}')
+        self.color_confirm_confidence = 0.6  # 颜色候选的最低圆度
+        self.color_confirm_size_ratio = 2.0  # 颜色候选与跟踪中足球的最大尺寸比
+        
+        # 球门检测参数（每个会话的检测历史保存在 GoalCache 中）
         self.goal_stable_frames = 5
+        self.goal_revalidate_interval = 10.0  # 锁定后后台复核的间隔（秒）
+        self.goal_detection_width = 640  # 球门检测所用金字塔层的最大宽度（像素）
+        self.corner_align_tolerance = 8  # 角点组成矩形时允许的行/列对齐误差（像素）
+        self.max_corner_rectangles = 50
+        
+        # 标注球门的栅格化区域，按顶点缓存：同一标注只栅格化一次
+        self.goal_region_cache_size = 16
+        self._goal_regions = {}
+        
+        # 进门时间预测：按轨迹外推，球到达前给出预警
+        self.entry_prediction_horizon = 2.0  # 最远预测多少秒
+        self.entry_prediction_step = 0.02  # 外推的时间步长（秒）
+        self.entry_min_speed = 20.0  # 低于该速率（像素/秒）不预测
+        self.entry_min_confidence = 0.2
+        self.entry_max_sample_gaps = 3  # 最新样本超过几个采样间隔没有更新时不再预测（球已丢失）
+        self.entry_max_sample_age = 1.0  # 同上，秒数上限（采样间隔未知时使用）
         
         # 各种球类颜色范围（HSV）- 支持更多球类
         self.ball_colors = {
@@ -55,110 +361,397 @@ class SoccerDetector:
             'purple': ([130, 120, 120], [160, 255, 255]) # 紫色球类
         }
         
-    def detect_ball_by_color(self, frame: np.ndarray) -> List[Dict]:
+        # 颜色检测启用的颜色及处理分辨率
+        self.active_ball_colors = ['white', 'black']
+        self.color_detection_scale = 0.5
+        self._color_kernels = {}
+        self._color_luts = {}
+        
+    def detect_ball_by_color(self, frame: Union[np.ndarray, FrameContext]) -> List[Detection]:
         """
         基于颜色检测各种运动球类
+        
+        所有启用的颜色在一次查表中完成：H、S、V 三个通道各查一张位掩码表再按位与，
+        得到每个像素的颜色编号（标签图）；去噪和连通域分析都只在这张标签图上做一次。
+        默认在半分辨率上处理，启用全部颜色的开销与过去单个颜色相当。
+        
+        Args:
+            frame: 输入帧或帧上下文（复用本帧已计算的缩小图和HSV图）
         """
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        balls = []
+        if not self.active_ball_colors:
+            return []
+        lut_h, lut_s, lut_v, first_color = self._color_lookup_tables()
+        
+        scale = self.color_detection_scale
+        h, sat, v = cv2.split(FrameContext.wrap(frame).resized(scale).hsv)
+        
+        # 颜色编号：1..N 对应 active_ball_colors，0 表示不属于任何颜色
+        color_bits = cv2.bitwise_and(cv2.LUT(h, lut_h), cv2.LUT(sat, lut_s))
+        color_bits = cv2.bitwise_and(color_bits, cv2.LUT(v, lut_v))
+        color_ids = cv2.LUT(color_bits, first_color)
+        
+        # 在标签图上做开闭运算去噪（核随分辨率缩放，原图5×5）
+        kernel_size = max(3, int(round(5 * scale)) | 1)
+        kernel = self._color_kernels.get(kernel_size)
+        if kernel is None:
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+            self._color_kernels[kernel_size] = kernel
+        color_ids = cv2.morphologyEx(color_ids, cv2.MORPH_OPEN, kernel)
+        color_ids = cv2.morphologyEx(color_ids, cv2.MORPH_CLOSE, kernel)
+        
+        # 不同颜色相邻处，去掉编号较大一侧的边缘像素，使各颜色区域互不连通
+        background = np.uint8(255)
+        lowest_neighbor = cv2.erode(np.where(color_ids == 0, background, color_ids),
+                                    self._color_kernels.setdefault('cut', np.ones((3, 3), np.uint8)))
+        mask = np.where((color_ids > 0) & (lowest_neighbor >= color_ids), color_ids, 0).astype(np.uint8)
+        
+        # 进一步扩大足球大小范围
+        survivors, labels = self._find_ball_components(
+            mask, 100 * scale * scale, 30000 * scale * scale, return_labels=True
+        )
         
-        # 检测各种颜色的球类
-        for color_name, (lower, upper) in self.ball_colors.items():
-            if color_name in ['white', 'black']:
-                lower = np.array(lower)
-                upper = np.array(upper)
-                mask = cv2.inRange(hsv, lower, upper)
-                
-                # 形态学操作去噪
-                kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-                mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-                mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-                
-                # 检测圆形轮廓
-                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                
-                for contour in contours:
-                    area = cv2.contourArea(contour)
-                    if 100 < area < 30000:  # 进一步扩大足球大小范围
-                        # 检查圆度
-                        perimeter = cv2.arcLength(contour, True)
-                        if perimeter > 0:
-                            circularity = 4 * np.pi * area / (perimeter * perimeter)
-                            if circularity > 0.4:  # 降低圆度要求
-                                x, y, w, h = cv2.boundingRect(contour)
-                                aspect_ratio = w / h
-                                if 0.5 < aspect_ratio < 2.0:  # 放宽宽高比要求
-                                    balls.append({
-                                        'bbox': [int(x), int(y), int(x + w), int(y + h)],
-                                        'confidence': float(circularity),
-                                        'class_name': f'{color_name}_ball',
-                                        'center': [float(x + w/2), float(y + h/2)],
-                                        'detection_method': f'color_{color_name}'
-                                    })
+        balls = []
+        for label, circularity, (x, y, w, h) in survivors:
+            # 连通域内颜色编号一致，取外接框首行上属于它的任一像素即可
+            first = x + int(np.flatnonzero(labels[y, x:x + w] == label)[0])
+            color_name = self.active_ball_colors[mask[y, first] - 1]
+            x1, y1 = x / scale, y / scale
+            x2, y2 = (x + w) / scale, (y + h) / scale
+            balls.append(Detection(
+                [int(x1), int(y1), int(x2), int(y2)], float(circularity),
+                class_name=f'{color_name}_ball', detection_method=f'color_{color_name}',
+                center=[float((x1 + x2) / 2), float((y1 + y2) / 2)]
+            ))
         
         return balls
+    
+    def _color_lookup_tables(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        为启用的颜色生成 H/S/V 位掩码查找表（按颜色组合缓存）
+        
+        Returns:
+            (H表, S表, V表, 位掩码->颜色编号 的表)
+        """
+        key = tuple(self.active_ball_colors)
+        tables = self._color_luts.get(key)
+        if tables is not None:
+            return tables
+        
+        channels = np.arange(256)
+        lut_h, lut_s, lut_v = (np.zeros(256, dtype=np.uint8) for _ in range(3))
+        for bit, name in enumerate(key):
+            lower, upper = self.ball_colors[name]
+            for lut, lo, hi in zip((lut_h, lut_s, lut_v), lower, upper):
+                lut[(channels >= lo) & (channels <= hi)] |= np.uint8(1 << bit)
+        
+        # 位掩码中最低位对应的颜色编号（按 active_ball_colors 的顺序优先，从1开始）
+        first_color = np.zeros(256, dtype=np.uint8)
+        for bits in range(1, 256):
+            first_color[bits] = (bits & -bits).bit_length()
+        
+        tables = (lut_h, lut_s, lut_v, first_color)
+        self._color_luts[key] = tables
+        return tables
+    
+    def _find_ball_components(self, mask: np.ndarray, min_area: float, max_area: float,
+                              return_labels: bool = False):
+        """
+        在二值掩码中寻找具有足球大小和形状的连通域
+        
+        面积、宽高比、填充率在所有连通域上向量化筛选；
+        只有通过初筛的少数连通域才提取轮廓计算精确圆度。
+        
+        Returns:
+            [(圆度, (x, y, w, h)), ...]；return_labels 为 True 时返回
+            ([(连通域编号, 圆度, (x, y, w, h)), ...], 连通域标签图)
+        """
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if count <= 1:
+            return ([], labels) if return_labels else []
+        
+        stats = stats[1:]
+        xs, ys = stats[:, cv2.CC_STAT_LEFT], stats[:, cv2.CC_STAT_TOP]
+        ws, hs = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+        areas = stats[:, cv2.CC_STAT_AREA].astype(np.float64)
+        aspect_ratios = ws / hs
+        # 圆的填充率为 π/4，圆度>0.4 的形状填充率不会低于这里的下限
+        extents = areas / (ws * hs)
+        
+        candidates = np.flatnonzero(
+            (areas > min_area) & (areas < max_area) &
+            (aspect_ratios > 0.5) & (aspect_ratios < 2.0) &  # 放宽宽高比要求
+            (extents > 0.3)
+        )
+        
+        results = []
+        for i in candidates.tolist():
+            x, y, w, h = int(xs[i]), int(ys[i]), int(ws[i]), int(hs[i])
+            component = (labels[y:y + h, x:x + w] == i + 1).astype(np.uint8)
+            contours, _ = cv2.findContours(component, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            perimeter = cv2.arcLength(contours[0], True) if contours else 0.0
+            if perimeter <= 0:
+                continue
+            circularity = 4 * np.pi * cv2.contourArea(contours[0]) / (perimeter * perimeter)
+            if circularity > 0.4:  # 降低圆度要求
+                if return_labels:
+                    results.append((i + 1, float(circularity), (x, y, w, h)))
+                else:
+                    results.append((float(circularity), (x, y, w, h)))
+        return (results, labels) if return_labels else results
+    
+    def _propose_ball_candidates(self, frame: Union[np.ndarray, FrameContext],
+                                 background_model: BackgroundModel) -> List[List[float]]:
+        """
+        从背景建模的前景中提取像足球的运动区域
+        
+        背景模型已在 _run_cascade 中用本帧更新过时，这里直接取回本帧的掩码，不会重复更新
+        
+        Returns:
+            候选框列表 [[x1, y1, x2, y2], ...]（原图坐标），按圆度从高到低
+        """
+        foreground = background_model.apply(frame)
+        scale = background_model.scale
+        components = self._find_ball_components(
+            foreground,
+            self.proposal_min_area * scale * scale,
+            self.proposal_max_area * scale * scale
+        )
+        
+        components.sort(key=lambda c: c[0], reverse=True)
+        return [[x / scale, y / scale, (x + w) / scale, (y + h) / scale]
+                for _, (x, y, w, h) in components[:self.max_proposals]]
+    
+    def _classify_proposals(self, frame: np.ndarray, candidates: List[List[float]]) -> Dict:
+        """
+        把候选区域按原始分辨率裁剪，拼成一张与模型输入同尺寸的拼图一次性送入YOLO
+        
+        拼图中每块 proposal_crop_size 像素，小球不经缩放直接进入网络，
+        检测框再映射回原图坐标。
+        """
+        crop_size = self.proposal_crop_size
+        grid = max(1, self.imgsz // crop_size)
+        frame_h, frame_w = frame.shape[:2]
+        
+        all_rows = []
+        for start in range(0, len(candidates), grid * grid):
+            batch = candidates[start:start + grid * grid]
+            mosaic = np.full((grid * crop_size, grid * crop_size, 3), 114, dtype=np.uint8)
+            # 每块的 (原图左上角x, 原图左上角y, 缩放比例)
+            placements = []
+            for k, (x1, y1, x2, y2) in enumerate(batch):
+                side = int(min(max(crop_size, 2 * max(x2 - x1, y2 - y1)), frame_w, frame_h))
+                cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+                ox = int(min(max(0, cx - side / 2), frame_w - side))
+                oy = int(min(max(0, cy - side / 2), frame_h - side))
+                crop = frame[oy:oy + side, ox:ox + side]
+                if side != crop_size:
+                    crop = cv2.resize(crop, (crop_size, crop_size), interpolation=cv2.INTER_AREA)
+                row, col = divmod(k, grid)
+                mosaic[row * crop_size:(row + 1) * crop_size, col * crop_size:(col + 1) * crop_size] = crop
+                placements.append((ox, oy, side / crop_size))
+            
+            data = self.backend.predict(mosaic, conf=self.confidence_threshold,
+                                        iou=self.iou_threshold, classes=self.inference_classes)
+            if len(data) == 0:
+                continue
+            
+            # 按检测框中心确定所属拼块，丢弃落在空白块上的框
+            centers = (data[:, :2] + data[:, 2:4]) / 2
+            tile_col = np.clip((centers[:, 0] // crop_size).astype(np.int64), 0, grid - 1)
+            tile_row = np.clip((centers[:, 1] // crop_size).astype(np.int64), 0, grid - 1)
+            tile = tile_row * grid + tile_col
+            valid = tile < len(placements)
+            data, tile_col, tile_row, tile = data[valid], tile_col[valid], tile_row[valid], tile[valid]
+            if len(data) == 0:
+                continue
+            
+            offsets = np.array(placements, dtype=np.float32)[tile]
+            boxes = data[:, :4].copy()
+            boxes[:, [0, 2]] -= (tile_col * crop_size)[:, None]
+            boxes[:, [1, 3]] -= (tile_row * crop_size)[:, None]
+            boxes = boxes.clip(0, crop_size) * offsets[:, 2:3]
+            boxes[:, [0, 2]] += offsets[:, 0:1]
+            boxes[:, [1, 3]] += offsets[:, 1:2]
+            data[:, :4] = boxes
+            all_rows.append(data)
+        
+        detections, soccer_balls = [], []
+        if all_rows:
+            data = np.concatenate(all_rows)
+            # 相邻候选的裁剪区域可能重叠，同一个球会被检出多次
+            keep = non_max_suppression(data[:, :4], data[:, 4], self.iou_threshold)
+            data = data[keep]
+            detections, soccer_balls = self._build_yolo_detections(
+                data[:, :4], data[:, 4], data[:, 5].astype(np.int64), method='yolo_proposal'
+            )
+        
+        return {
+            'detections': detections,
+            'soccer_balls': soccer_balls,
+            'goal_areas': []
+        }
 
-    def detect_goal_advanced(self, frame: np.ndarray) -> List[Dict]:
+    def create_goal_cache(self) -> GoalCache:
+        """
+        为一个会话创建球门缓存
+        
+        固定机位下球门只需在会话开始时检测，连续 goal_stable_frames 帧一致后锁定，
+        之后每帧的球门几乎没有开销。
+        """
+        return GoalCache(self.detect_goal_advanced, stable_frames=self.goal_stable_frames,
+                         revalidate_interval=self.goal_revalidate_interval)
+    
+    def detect_goal_advanced(self, frame: Union[np.ndarray, FrameContext]) -> List[Dict]:
         """
         先进的球门检测算法 - 支持任意角度和颜色（实时优化版）
+        
+        球门占画面很大一部分，检测在金字塔缩小后的图像上进行（像素阈值随缩放自动换算），
+        只有角点在原图分辨率的小窗口内精修，检测耗时约按缩放比例的平方下降。
+        
+        Args:
+            frame: 输入帧或帧上下文（各方法共用同一金字塔层的灰度图）
         """
+        context = FrameContext.wrap(frame)
+        small, scale = context.pyramid_level(self.goal_detection_width)
         goals = []
         
         # 方法1: 改进的边缘+直线检测（快速版）
-        goals.extend(self._detect_goal_by_edges_fast(frame))
+        goals.extend(self._detect_goal_by_edges_fast(small, scale))
         
         # 方法2: 轮廓检测法（简化版）
-        goals.extend(self._detect_goal_by_contours_fast(frame))
+        goals.extend(self._detect_goal_by_contours_fast(small, scale))
         
-        # 去重和筛选
-        return self._filter_goal_detections(goals)
+        # 去重和筛选（IoU与缩放无关），再映射回原图并精修角点
+        return self._refine_goals(context.frame, self._filter_goal_detections(goals), scale)
+    
+    @staticmethod
+    def _scaled_kernel(size: int, scale: float) -> int:
+        """按缩放换算滤波核/邻域尺寸，保持为不小于3的奇数"""
+        return max(3, int(round(size * scale)) | 1)
     
-    def _detect_goal_by_edges(self, frame: np.ndarray) -> List[Dict]:
-        """使用边缘检测找球门"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def _refine_goals(self, frame: np.ndarray, goals: List[Dict], scale: float) -> List[Dict]:
+        """
+        把金字塔层上的球门映射回原图坐标，并在原图小窗口内用 cornerSubPix 精修角点
+        
+        有角点时外接框取精修后角点的范围。
+        """
+        if scale == 1.0:
+            return goals
+        
+        refined = []
+        for goal in goals:
+            goal = dict(goal)
+            x1, y1, x2, y2 = [v / scale for v in goal['bbox']]
+            if goal.get('corners'):
+                corners = self._refine_goal_corners(frame, goal['corners'], scale)
+                xs = [p[0] for p in corners]
+                ys = [p[1] for p in corners]
+                goal['corners'] = corners
+                if len(corners) >= 3:
+                    x1, y1, x2, y2 = min(xs), min(ys), max(xs), max(ys)
+            goal['bbox'] = [float(x1), float(y1), float(x2), float(y2)]
+            goal['center'] = [float((x1 + x2) / 2), float((y1 + y2) / 2)]
+            refined.append(goal)
+        return refined
+    
+    def _refine_goal_corners(self, frame: np.ndarray, corners: List[List[float]],
+                             scale: float) -> List[List[float]]:
+        """
+        在原图分辨率下精修角点位置
+        
+        每个角点只取周围一个小窗口转灰度，窗口半径约为金字塔层一个像素在原图中的大小；
+        精修结果偏离过远（窗口内不是角点）时保留映射后的位置。
+        """
+        radius = max(2, int(round(1 / scale)))
+        pad = 2 * radius + 2
+        height, width = frame.shape[:2]
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 0.05)
+        
+        refined = []
+        for x, y in corners:
+            fx, fy = x / scale, y / scale
+            x0, y0 = max(0, int(fx) - pad), max(0, int(fy) - pad)
+            x1, y1 = min(width, int(fx) + pad + 1), min(height, int(fy) + pad + 1)
+            if x1 - x0 <= 2 * radius + 1 or y1 - y0 <= 2 * radius + 1:
+                refined.append([float(fx), float(fy)])
+                continue
+            
+            gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+            point = np.array([[[fx - x0, fy - y0]]], dtype=np.float32)
+            cv2.cornerSubPix(gray, point, (radius, radius), (-1, -1), criteria)
+            rx, ry = float(point[0, 0, 0] + x0), float(point[0, 0, 1] + y0)
+            if abs(rx - fx) > 2 * radius or abs(ry - fy) > 2 * radius:
+                rx, ry = float(fx), float(fy)
+            refined.append([rx, ry])
+        return refined
+    
+    def _detect_goal_by_edges(self, frame: Union[np.ndarray, FrameContext], scale: float = 1.0) -> List[Dict]:
+        """
+        使用边缘检测找球门
+        
+        Args:
+            frame: 输入帧或帧上下文（可以是金字塔缩小后的图像）
+            scale: frame 相对原图的缩放比例，长度阈值随之换算；返回 frame 坐标
+        """
+        context = FrameContext.wrap(frame)
         goals = []
         
         # 多尺度边缘检测
+        candidates = []
         for low_threshold in [30, 50, 80]:
             for high_threshold in [low_threshold * 2, low_threshold * 3]:
-                edges = cv2.Canny(gray, low_threshold, high_threshold)
+                edges = context.edges(low_threshold, high_threshold)
                 
                 # 霍夫直线检测 - 更灵敏的参数
-                lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=50, 
-                                       minLineLength=30, maxLineGap=15)
+                lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=max(10, int(50 * scale)), 
+                                       minLineLength=30 * scale, maxLineGap=15 * scale)
                 
                 if lines is not None:
-                    goal_rects = self._analyze_lines_for_rectangles(lines, frame.shape)
-                    for rect in goal_rects:
-                        goals.append({
-                            'bbox': rect['bbox'],
-                            'confidence': rect['confidence'],
-                            'class_name': 'goal',
-                            'center': rect['center'],
-                            'detection_method': 'edge_lines',
-                            'corners': rect.get('corners', [])
-                        })
+                    candidates.append(self._line_rectangles(lines, context.shape, scale))
+        
+        if not candidates:
+            return goals
+        
+        # 不同阈值组合常找到完全相同的矩形，只保留第一次出现的
+        rects = np.concatenate(candidates)
+        _, first_seen = np.unique(rects, axis=0, return_index=True)
+        for rect in self._rectangles_to_dicts(rects[np.sort(first_seen)]):
+            goals.append({
+                'bbox': rect['bbox'],
+                'confidence': rect['confidence'],
+                'class_name': 'goal',
+                'center': rect['center'],
+                'detection_method': 'edge_lines',
+                'corners': rect['corners']
+            })
         return goals
     
-    def _detect_goal_by_contours(self, frame: np.ndarray) -> List[Dict]:
-        """使用轮廓检测找球门"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def _detect_goal_by_contours(self, frame: Union[np.ndarray, FrameContext], scale: float = 1.0) -> List[Dict]:
+        """
+        使用轮廓检测找球门
+        
+        Args:
+            frame: 输入帧或帧上下文（可以是金字塔缩小后的图像）
+            scale: frame 相对原图的缩放比例，面积阈值和滤波尺寸随之换算；返回 frame 坐标
+        """
+        area_scale = scale * scale
+        context = FrameContext.wrap(frame)
         goals = []
         
         # 多种预处理方式
         for blur_size in [3, 5, 7]:
-            blurred = cv2.GaussianBlur(gray, (blur_size, blur_size), 0)
+            blurred = context.blurred(self._scaled_kernel(blur_size, scale))
             
             # 自适应阈值
             for block_size in [11, 15, 21]:
                 thresh = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                             cv2.THRESH_BINARY, block_size, 2)
+                                             cv2.THRESH_BINARY, self._scaled_kernel(block_size, scale), 2)
                 
                 contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
                 
                 for contour in contours:
                     area = cv2.contourArea(contour)
-                    if 1000 < area < 50000:  # 球门大小范围
+                    if 1000 * area_scale < area < 50000 * area_scale:  # 球门大小范围
                         # 多边形拟合
                         epsilon = 0.02 * cv2.arcLength(contour, True)
                         approx = cv2.approxPolyDP(contour, epsilon, True)
@@ -170,7 +763,7 @@ class SoccerDetector:
                             if 0.5 < aspect_ratio < 4.0:  # 球门宽高比范围
                                 goals.append({
                                     'bbox': [x, y, x + w, y + h],
-                                    'confidence': min(0.9, area / 10000),
+                                    'confidence': min(0.9, area / area_scale / 10000),
                                     'class_name': 'goal',
                                     'center': [x + w/2, y + h/2],
                                     'detection_method': 'contour',
@@ -178,18 +771,24 @@ class SoccerDetector:
                                 })
         return goals
     
-    def _detect_goal_by_corners(self, frame: np.ndarray) -> List[Dict]:
-        """使用角点检测找球门"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def _detect_goal_by_corners(self, frame: Union[np.ndarray, FrameContext], scale: float = 1.0) -> List[Dict]:
+        """
+        使用角点检测找球门
+        
+        Args:
+            frame: 输入帧或帧上下文（可以是金字塔缩小后的图像）
+            scale: frame 相对原图的缩放比例，距离阈值随之换算；返回 frame 坐标
+        """
+        context = FrameContext.wrap(frame)
         goals = []
         
         # Harris角点检测
-        corners = cv2.goodFeaturesToTrack(gray, 100, 0.01, 10)
+        corners = cv2.goodFeaturesToTrack(context.gray, 100, 0.01, max(2.0, 10 * scale))
         
         if corners is not None:
             corners = corners.astype(int)
             # 尝试从角点组合中找到矩形结构
-            goal_rects = self._find_rectangles_from_corners(corners, frame.shape)
+            goal_rects = self._find_rectangles_from_corners(corners, context.shape, scale)
             for rect in goal_rects:
                 goals.append({
                     'bbox': rect['bbox'],
@@ -202,159 +801,203 @@ class SoccerDetector:
         
         return goals
     
-    def _analyze_lines_for_rectangles(self, lines, frame_shape) -> List[Dict]:
+    def _analyze_lines_for_rectangles(self, lines, frame_shape, scale: float = 1.0) -> List[Dict]:
         """从直线中分析出矩形结构"""
-        rectangles = []
+        return self._rectangles_to_dicts(self._line_rectangles(lines, frame_shape, scale))
+    
+    def _line_rectangles(self, lines, frame_shape, scale: float = 1.0) -> np.ndarray:
+        """
+        垂直线 × 水平线组合成候选矩形（向量化）
         
-        # 分类直线为垂直和水平线
-        vertical_lines = []
-        horizontal_lines = []
+        线段的角度、长度分类在整组线段数组上一次算完，每一对垂直线和水平线
+        用广播得到外接框并校验尺寸；繁杂的球场标线产生数百条线段时也只是几次数组运算。
         
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            angle = np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi
-            length = np.sqrt((x2-x1)**2 + (y2-y1)**2)
+        Args:
+            lines: HoughLinesP 输出 (n, 1, 4)
+            frame_shape: 帧尺寸
+            scale: 帧相对原图的缩放比例，长度阈值随之换算
             
-            if abs(angle) < 15 or abs(angle) > 165:  # 水平线
-                horizontal_lines.append(((x1, y1, x2, y2), length))
-            elif 75 < abs(angle) < 105:  # 垂直线
-                vertical_lines.append(((x1, y1, x2, y2), length))
-        
-        # 尝试组合垂直和水平线形成矩形
-        for v_line, v_len in vertical_lines:
-            for h_line, h_len in horizontal_lines:
-                if v_len > 30 and h_len > 30:  # 足够长的线段
-                    rect = self._try_form_rectangle(v_line, h_line, frame_shape)
-                    if rect:
-                        rectangles.append(rect)
+        Returns:
+            (k, 4) 候选矩形 [x1, y1, x2, y2]，按 垂直线 × 水平线 的顺序排列
+        """
+        segments = np.asarray(lines, dtype=np.int64).reshape(-1, 4)
+        dx = segments[:, 2] - segments[:, 0]
+        dy = segments[:, 3] - segments[:, 1]
+        angles = np.abs(np.degrees(np.arctan2(dy, dx)))
+        long_enough = np.hypot(dx, dy) > 30 * scale  # 足够长的线段
+        
+        horizontal = segments[((angles < 15) | (angles > 165)) & long_enough]  # 水平线
+        vertical = segments[(angles > 75) & (angles < 105) & long_enough]       # 垂直线
+        if len(horizontal) == 0 or len(vertical) == 0:
+            return np.zeros((0, 4), dtype=np.int64)
+        
+        # (V, H) 外接框：垂直线和水平线两个端点的 x、y 极值
+        v_min_x = vertical[:, [0, 2]].min(axis=1)[:, None]
+        v_max_x = vertical[:, [0, 2]].max(axis=1)[:, None]
+        v_min_y = vertical[:, [1, 3]].min(axis=1)[:, None]
+        v_max_y = vertical[:, [1, 3]].max(axis=1)[:, None]
+        min_x = np.minimum(v_min_x, horizontal[:, [0, 2]].min(axis=1)[None, :])
+        max_x = np.maximum(v_max_x, horizontal[:, [0, 2]].max(axis=1)[None, :])
+        min_y = np.minimum(v_min_y, horizontal[:, [1, 3]].min(axis=1)[None, :])
+        max_y = np.maximum(v_max_y, horizontal[:, [1, 3]].max(axis=1)[None, :])
         
+        # 验证矩形是否合理
+        widths = max_x - min_x
+        heights = max_y - min_y
+        valid = ((widths > 50 * scale) & (widths < frame_shape[1] * 0.8) &
+                 (heights > 30 * scale) & (heights < frame_shape[0] * 0.8))
+        return np.stack([min_x[valid], min_y[valid], max_x[valid], max_y[valid]], axis=1)
+    
+    def _rectangles_to_dicts(self, rects: np.ndarray, confidence: float = 0.7) -> List[Dict]:
+        """把候选矩形数组转换为结果字典"""
+        rectangles = []
+        for min_x, min_y, max_x, max_y in rects.tolist():
+            rectangles.append({
+                'bbox': [min_x, min_y, max_x, max_y],
+                'confidence': confidence,
+                'center': [float((min_x + max_x) / 2), float((min_y + max_y) / 2)],
+                'corners': [[min_x, min_y], [max_x, min_y], [max_x, max_y], [min_x, max_y]]
+            })
         return rectangles
     
-    def _try_form_rectangle(self, v_line, h_line, frame_shape):
-        """尝试从垂直线和水平线形成矩形"""
-        # 简化的矩形识别逻辑
-        vx1, vy1, vx2, vy2 = v_line
-        hx1, hy1, hx2, hy2 = h_line
+    def _find_rectangles_from_corners(self, corners, frame_shape, scale: float = 1.0) -> List[Dict]:
+        """
+        从角点中寻找矩形结构
         
-        # 计算可能的矩形区域
-        x_coords = [vx1, vx2, hx1, hx2]
-        y_coords = [vy1, vy2, hy1, hy2]
+        角点按坐标排序扫描（等价于按对齐误差分桶、只比较相邻桶）：先把同一行附近的角点
+        配对成水平边，再把左右端点 x 都对齐的上边和下边配对成四边形，
+        最后对所有候选做向量化校验，不再枚举全部4点组合。
+        """
+        points = np.asarray(corners, dtype=np.float64).reshape(-1, 2)
+        if len(points) < 4:
+            return []
         
-        min_x, max_x = min(x_coords), max(x_coords)
-        min_y, max_y = min(y_coords), max(y_coords)
+        tolerance = max(1.0, self.corner_align_tolerance * scale)
+        frame_h, frame_w = frame_shape[:2]
         
-        width = max_x - min_x
-        height = max_y - min_y
+        # 水平边：y 相近、宽度合理的角点对 (左, 右)
+        edges = self._horizontal_corner_pairs(points, tolerance, 50 * scale, frame_w * 0.8)
+        if len(edges) < 2:
+            return []
         
-        # 验证矩形是否合理
-        if 50 < width < frame_shape[1] * 0.8 and 30 < height < frame_shape[0] * 0.8:
-            return {
+        # 上边 + 下边：左右端点 x 分别对齐、高度合理
+        tops, bottoms = self._pair_horizontal_edges(points, edges, tolerance, 30 * scale, frame_h * 0.8)
+        if len(tops) == 0:
+            return []
+        
+        # 四边形角点顺序：左上、右上、右下、左下
+        quads = np.stack([edges[tops, 0], edges[tops, 1], edges[bottoms, 1], edges[bottoms, 0]], axis=1)
+        quad_points = points[quads]  # (q, 4, 2)
+        
+        # 对齐误差：上下边的 y 差、左右边的 x 差的平均
+        alignment_error = (
+            np.abs(quad_points[:, 0, 1] - quad_points[:, 1, 1]) +
+            np.abs(quad_points[:, 3, 1] - quad_points[:, 2, 1]) +
+            np.abs(quad_points[:, 0, 0] - quad_points[:, 3, 0]) +
+            np.abs(quad_points[:, 1, 0] - quad_points[:, 2, 0])
+        ) / 4
+        confidences = 0.6 * (1 - 0.5 * alignment_error / tolerance)
+        
+        # 对齐最好的候选优先，数量有上限（网格状球网会产生大量角点）
+        best = np.argsort(-confidences, kind='stable')[:self.max_corner_rectangles]
+        mins = quad_points[best].min(axis=1)
+        maxs = quad_points[best].max(axis=1)
+        
+        rectangles = []
+        for (min_x, min_y), (max_x, max_y), conf, pts in zip(
+                mins.tolist(), maxs.tolist(), confidences[best].tolist(), quad_points[best].tolist()):
+            rectangles.append({
                 'bbox': [int(min_x), int(min_y), int(max_x), int(max_y)],
-                'confidence': 0.7,
+                'confidence': float(conf),
                 'center': [float((min_x + max_x) / 2), float((min_y + max_y) / 2)],
-                'corners': [[int(min_x), int(min_y)], [int(max_x), int(min_y)], 
-                           [int(max_x), int(max_y)], [int(min_x), int(max_y)]]
-            }
-        return None
-    
-    def _find_rectangles_from_corners(self, corners, frame_shape) -> List[Dict]:
-        """从角点中寻找矩形结构"""
-        rectangles = []
-        
-        # 简化实现：寻找4个角点组成的矩形
-        if len(corners) >= 4:
-            # 选取距离合适的4个点
-            for i in range(len(corners) - 3):
-                for j in range(i + 1, len(corners) - 2):
-                    for k in range(j + 1, len(corners) - 1):
-                        for l in range(k + 1, len(corners)):
-                            pts = [corners[i][0], corners[j][0], corners[k][0], corners[l][0]]
-                            rect = self._check_four_points_rectangle(pts, frame_shape)
-                            if rect:
-                                rectangles.append(rect)
+                'corners': [[int(p[0]), int(p[1])] for p in pts]
+            })
         
         return rectangles
     
-    def _check_four_points_rectangle(self, points, frame_shape):
-        """检查4个点是否能形成合理的矩形"""
-        # 简化的矩形验证
-        if len(points) != 4:
-            return None
-        
-        # 计算边界框
-        x_coords = [p[0] for p in points]
-        y_coords = [p[1] for p in points]
+    @staticmethod
+    def _sorted_window_pairs(values: np.ndarray, tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        一维排序扫描：找出所有取值相差不超过 tolerance 的索引对（无序，每对一次）
         
-        min_x, max_x = min(x_coords), max(x_coords)
-        min_y, max_y = min(y_coords), max(y_coords)
+        排序后每个元素只与其后取值不超过 v+tolerance 的连续一段配对，
+        相当于宽度为 tolerance 的分桶只比较相邻桶，结果完全向量化生成。
+        """
+        order = np.argsort(values, kind='stable')
+        sorted_values = values[order]
+        n = len(values)
+        window_end = np.searchsorted(sorted_values, sorted_values + tolerance, side='right')
+        counts = window_end - np.arange(n) - 1
+        first = np.repeat(np.arange(n), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return order[first], order[first + 1 + offsets]
+    
+    def _horizontal_corner_pairs(self, points: np.ndarray, tolerance: float,
+                                 min_width: float, max_width: float) -> np.ndarray:
+        """
+        y 相差不超过 tolerance、宽度合理的角点对
         
-        width = max_x - min_x
-        height = max_y - min_y
+        Returns:
+            (m, 2) 角点索引数组，每行为 (左端点, 右端点)
+        """
+        a, b = self._sorted_window_pairs(points[:, 1], tolerance)
+        a_is_left = points[a, 0] <= points[b, 0]
+        left = np.where(a_is_left, a, b)
+        right = np.where(a_is_left, b, a)
+        widths = points[right, 0] - points[left, 0]
+        keep = (widths > min_width) & (widths < max_width)
+        return np.stack([left[keep], right[keep]], axis=1)
+    
+    def _pair_horizontal_edges(self, points: np.ndarray, edges: np.ndarray, tolerance: float,
+                               min_height: float, max_height: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        把左端 x 对齐的水平边两两配对，再按右端 x 对齐和高度筛选
         
-        # 验证尺寸合理性
-        if 50 < width < frame_shape[1] * 0.8 and 30 < height < frame_shape[0] * 0.8:
-            return {
-                'bbox': [int(min_x), int(min_y), int(max_x), int(max_y)],
-                'confidence': 0.6,
-                'center': [float((min_x + max_x) / 2), float((min_y + max_y) / 2)],
-                'corners': [[int(p[0]), int(p[1])] for p in points]
-            }
-        return None
+        Returns:
+            (上边索引, 下边索引)
+        """
+        left_x = points[edges[:, 0], 0]
+        right_x = points[edges[:, 1], 0]
+        edge_y = (points[edges[:, 0], 1] + points[edges[:, 1], 1]) / 2
+        
+        a, b = self._sorted_window_pairs(left_x, tolerance)
+        a_is_top = edge_y[a] <= edge_y[b]
+        tops = np.where(a_is_top, a, b)
+        bottoms = np.where(a_is_top, b, a)
+        heights = edge_y[bottoms] - edge_y[tops]
+        keep = ((np.abs(right_x[tops] - right_x[bottoms]) <= tolerance) &
+                (heights > min_height) & (heights < max_height))
+        return tops[keep], bottoms[keep]
     
     def _filter_goal_detections(self, goals) -> List[Dict]:
         """过滤和去重球门检测结果"""
         if not goals:
             return []
         
-        # 按置信度排序
-        goals.sort(key=lambda x: x['confidence'], reverse=True)
+        # 按置信度排序，移除与更高置信度结果重叠度过高的检测，最多返回3个球门
+        boxes = np.array([goal['bbox'] for goal in goals], dtype=np.float64)
+        scores = np.array([goal['confidence'] for goal in goals], dtype=np.float64)
+        keep = non_max_suppression(boxes, scores, 0.5, max_det=3)
+        return [goals[i] for i in keep.tolist()]
+    
+    def _detect_goal_by_edges_fast(self, frame: Union[np.ndarray, FrameContext], scale: float = 1.0) -> List[Dict]:
+        """
+        快速边缘检测球门
         
-        # 去重：移除重叠度过高的检测
-        filtered = []
-        for goal in goals:
-            is_duplicate = False
-            for existing in filtered:
-                if self._calculate_overlap(goal['bbox'], existing['bbox']) > 0.5:
-                    is_duplicate = True
-                    break
-            if not is_duplicate:
-                filtered.append(goal)
-        
-        return filtered[:3]  # 最多返回3个球门
-    
-    def _calculate_overlap(self, bbox1, bbox2) -> float:
-        """计算两个边界框的重叠度"""
-        x1_1, y1_1, x2_1, y2_1 = bbox1
-        x1_2, y1_2, x2_2, y2_2 = bbox2
-        
-        # 计算交集
-        x1_i = max(x1_1, x1_2)
-        y1_i = max(y1_1, y1_2)
-        x2_i = min(x2_1, x2_2)
-        y2_i = min(y2_1, y2_2)
-        
-        if x2_i <= x1_i or y2_i <= y1_i:
-            return 0.0
-        
-        intersection = (x2_i - x1_i) * (y2_i - y1_i)
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        
-        union = area1 + area2 - intersection
-        return intersection / union if union > 0 else 0.0
-    
-    def _detect_goal_by_edges_fast(self, frame: np.ndarray) -> List[Dict]:
-        """快速边缘检测球门"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        Args:
+            frame: 输入帧或帧上下文（可以是金字塔缩小后的图像）
+            scale: frame 相对原图的缩放比例，长度阈值随之换算；返回 frame 坐标
+        """
+        context = FrameContext.wrap(frame)
         goals = []
         
         # 只使用一组参数进行检测以提高速度
-        edges = cv2.Canny(gray, 50, 150)
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=80, 
-                               minLineLength=50, maxLineGap=20)
+        edges = context.edges(50, 150)
+        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=max(10, int(80 * scale)), 
+                               minLineLength=50 * scale, maxLineGap=20 * scale)
         
         if lines is not None:
-            goal_rects = self._analyze_lines_for_rectangles(lines, frame.shape)
+            goal_rects = self._analyze_lines_for_rectangles(lines, context.shape, scale)
             for rect in goal_rects:
                 goals.append({
                     'bbox': rect['bbox'],
@@ -366,21 +1009,28 @@ class SoccerDetector:
                 })
         return goals
     
-    def _detect_goal_by_contours_fast(self, frame: np.ndarray) -> List[Dict]:
-        """快速轮廓检测球门"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def _detect_goal_by_contours_fast(self, frame: Union[np.ndarray, FrameContext], scale: float = 1.0) -> List[Dict]:
+        """
+        快速轮廓检测球门
+        
+        Args:
+            frame: 输入帧或帧上下文（可以是金字塔缩小后的图像）
+            scale: frame 相对原图的缩放比例，面积阈值和滤波尺寸随之换算；返回 frame 坐标
+        """
+        context = FrameContext.wrap(frame)
         goals = []
+        area_scale = scale * scale
         
         # 只使用一组预处理参数
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        blurred = context.blurred(self._scaled_kernel(5, scale))
         thresh = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                     cv2.THRESH_BINARY, 15, 2)
+                                     cv2.THRESH_BINARY, self._scaled_kernel(15, scale), 2)
         
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         for contour in contours:
             area = cv2.contourArea(contour)
-            if 1000 < area < 50000:  # 球门大小范围
+            if 1000 * area_scale < area < 50000 * area_scale:  # 球门大小范围
                 # 多边形拟合
                 epsilon = 0.02 * cv2.arcLength(contour, True)
                 approx = cv2.approxPolyDP(contour, epsilon, True)
@@ -392,7 +1042,7 @@ class SoccerDetector:
                     if 0.8 < aspect_ratio < 3.0:  # 球门宽高比范围
                         goals.append({
                             'bbox': [int(x), int(y), int(x + w), int(y + h)],
-                            'confidence': float(min(0.8, area / 15000)),
+                            'confidence': float(min(0.8, area / area_scale / 15000)),
                             'class_name': 'goal',
                             'center': [float(x + w/2), float(y + h/2)],
                             'detection_method': 'contour_fast',
@@ -401,12 +1051,31 @@ class SoccerDetector:
                         break  # 只取第一个满足条件的
         return goals
 
-    def detect_objects(self, frame: np.ndarray) -> Dict:
+    def detect_objects(self, frame: Union[np.ndarray, FrameContext],
+                       background_model: Optional[BackgroundModel] = None) -> Dict:
         """
         只检测足球，不检测球门
+        
+        Args:
+            frame: 输入帧或帧上下文
+            background_model: 会话的背景模型；detection_mode='proposals' 时
+                              只把运动候选区域按原始分辨率送入YOLO，没有候选时本帧不运行YOLO；
+                              预热期间和每隔 full_frame_interval 次检测做一次整帧检测，找回静止的球
         """
+        context = FrameContext.wrap(frame)
+        frame = context.frame
+        
         # 只使用YOLO检测足球
-        yolo_results = self._yolo_detect(frame)
+        yolo_results = None
+        if self.detection_mode == 'proposals' and background_model is not None:
+            candidates = self._propose_ball_candidates(context, background_model)
+            full_frame = background_model.needs_full_frame()
+            if not full_frame:
+                # 静止画面没有候选：不回退整帧检测，否则 proposals 模式在最常见的场景里没有任何节省
+                yolo_results = (self._classify_proposals(frame, candidates) if candidates
+                                else {'detections': [], 'soccer_balls': []})
+        if yolo_results is None:
+            yolo_results = self._yolo_detect(frame)
         
         # 彻底禁用所有球门检测
         # 只检测足球，并严格限制为1个
@@ -423,54 +1092,26 @@ class SoccerDetector:
     def _yolo_detect(self, frame: np.ndarray) -> Dict:
         """
         使用YOLO进行基础检测
+        
+        推理阶段只保留实际会用到的类别，后处理全部在整组检测框上做NumPy掩码运算，
+        只为通过筛选的框构建结果字典，拥挤画面（22名球员）与空画面开销相同。
         """
-        results = self.model.predict(
+        data = self.backend.predict(
             frame,
             conf=self.confidence_threshold,
             iou=self.iou_threshold,
-            verbose=False
+            classes=self.inference_classes
         )
         
         detections = []
         soccer_balls = []
         goal_areas = []
         
-        if results and len(results) > 0:
-            result = results[0]
-            
-            if result.boxes is not None:
-                boxes = result.boxes.xyxy.cpu().numpy()
-                confidences = result.boxes.conf.cpu().numpy()
-                classes = result.boxes.cls.cpu().numpy()
-                
-                for i, (box, conf, cls) in enumerate(zip(boxes, confidences, classes)):
-                    x1, y1, x2, y2 = box
-                    class_id = int(cls)
-                    
-                    detection = {
-                        'bbox': [float(x1), float(y1), float(x2), float(y2)],
-                        'confidence': float(conf),
-                        'class_id': int(class_id),
-                        'class_name': self.ball_classes.get(class_id, f'class_{class_id}'),
-                        'center': [float((x1 + x2) / 2), float((y1 + y2) / 2)],
-                        'detection_method': 'yolo'
-                    }
-                    
-                    detections.append(detection)
-                    
-                    # 检测运动球类，适配iOS视频中的小足球
-                    if class_id == 32 and conf > 0.15:  # 进一步降低置信度要求
-                        # 验证边界框的合理性
-                        box_width = x2 - x1
-                        box_height = y2 - y1
-                        aspect_ratio = box_width / box_height
-                        box_area = box_width * box_height
-                        
-                        # 进一步放宽足球检测条件
-                        if (0.3 < aspect_ratio < 3.0 and      # 更宽松的宽高比要求
-                            100 < box_area < 100000 and       # 更大的面积范围
-                            box_width > 10 and box_height > 10):  # 更小的最小尺寸
-                            soccer_balls.append(detection)
+        if len(data) > 0:
+            # 每行: [x1, y1, x2, y2, conf, cls]
+            detections, soccer_balls = self._build_yolo_detections(
+                data[:, :4], data[:, 4], data[:, 5].astype(np.int64)
+            )
         
         return {
             'detections': detections,
@@ -478,6 +1119,49 @@ class SoccerDetector:
             'goal_areas': goal_areas
         }
     
+    def _ball_box_mask(self, boxes: np.ndarray, confidences: np.ndarray,
+                       classes: np.ndarray) -> np.ndarray:
+        """
+        向量化的足球框筛选，适配iOS视频中的小足球
+        
+        Returns:
+            与boxes等长的布尔掩码
+        """
+        widths = boxes[:, 2] - boxes[:, 0]
+        heights = boxes[:, 3] - boxes[:, 1]
+        areas = widths * heights
+        # 高度为0的框宽高比记为0，会被下面的条件排除
+        aspect_ratios = np.divide(widths, heights, out=np.zeros_like(widths), where=heights > 0)
+        
+        return ((classes == 32) & (confidences > 0.15) &          # 进一步降低置信度要求
+                (aspect_ratios > 0.3) & (aspect_ratios < 3.0) &   # 更宽松的宽高比要求
+                (areas > 100) & (areas < 100000) &                # 更大的面积范围
+                (widths > 10) & (heights > 10))                   # 更小的最小尺寸
+    
+    def _build_yolo_detections(self, boxes: np.ndarray, confidences: np.ndarray,
+                               classes: np.ndarray, method: str = 'yolo') -> Tuple[List[Detection], List[Detection]]:
+        """
+        把推理输出的数组转换为检测结果
+        
+        Returns:
+            (全部检测, 足球检测)，足球检测与全部检测共享同一批 Detection 对象
+        """
+        ball_mask = self._ball_box_mask(boxes, confidences, classes)
+        centers = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+        
+        detections = []
+        soccer_balls = []
+        for bbox, center, conf, class_id, is_ball in zip(
+                boxes.tolist(), centers.tolist(), confidences.tolist(), classes.tolist(),
+                ball_mask.tolist()):
+            detection = Detection(bbox, conf, self.ball_classes.get(class_id, f'class_{class_id}'),
+                                  method, center, class_id)
+            detections.append(detection)
+            if is_ball:
+                soccer_balls.append(detection)
+        
+        return detections, soccer_balls
+    
     def detect_rectangular_goal(self, goal_posts: List[Dict]) -> Optional[Dict]:
         """
         基于球门柱检测方形球门区域
@@ -522,12 +1206,12 @@ class SoccerDetector:
         
         return goal_area
     
-    def calculate_ball_trajectory(self, ball_history: List[Dict]) -> Optional[Dict]:
+    def calculate_ball_trajectory(self, ball_history: Union[List[Dict], TrackBuffer]) -> Optional[Dict]:
         """
         计算足球轨迹
         
         Args:
-            ball_history: 球的历史位置
+            ball_history: 球的历史位置（检测结果列表或 TrackBuffer）
             
         Returns:
             轨迹信息
@@ -535,32 +1219,47 @@ class SoccerDetector:
         if len(ball_history) < 3:
             return None
         
-        # 提取球心坐标
-        positions = np.array([ball['center'] for ball in ball_history])
-        times = np.array([ball.get('timestamp', i) for i, ball in enumerate(ball_history)])
-        
-        # 计算速度和加速度
-        velocities = np.diff(positions, axis=0) / np.diff(times).reshape(-1, 1)
-        
-        if len(velocities) > 1:
-            accelerations = np.diff(velocities, axis=0) / np.diff(times[1:]).reshape(-1, 1)
+        # 没有会话级 TrajectoryEstimator 时，从整段历史重建一次；
+        # 重复或乱序的时间戳由估计器统一丢弃，速度不会出现 inf/nan
+        if isinstance(ball_history, TrackBuffer):
+            # 直接读取环形缓冲区连续视图的列，不构建中间字典
+            track = ball_history.window()
+            estimator = TrajectoryEstimator.from_samples(track['center'], track['timestamp'])
         else:
-            accelerations = np.array([[0, 0]])
-        
-        return {
-            'positions': positions.tolist(),
-            'velocities': velocities.tolist(),
-            'accelerations': accelerations.tolist(),
-            'speed': np.linalg.norm(velocities[-1]) if len(velocities) > 0 else 0
-        }
+            estimator = TrajectoryEstimator.from_history(ball_history)
+        return estimator.to_dict()
+    
+    def _goal_region(self, goal: Dict) -> GoalRegion:
+        """
+        球门对应的栅格化区域：已经是 GoalRegion 时原样返回，
+        球门字典按顶点（没有顶点时按 bbox）缓存，缓存满时整体清空
+        """
+        if isinstance(goal, GoalRegion):
+            return goal
+        corners = goal.get('corners')
+        if corners and len(corners) >= 3:
+            key = tuple(tuple(float(v) for v in point) for point in corners)
+        else:
+            key = tuple(float(v) for v in goal['bbox'])
+        region = self._goal_regions.get(key)
+        if region is None:
+            if len(self._goal_regions) >= self.goal_region_cache_size:
+                self._goal_regions.clear()
+            region = self._goal_regions[key] = GoalRegion.from_goal(goal)
+        return region
     
-    def check_ball_goal_collision(self, soccer_balls: List[Dict], goal_areas: List[Dict]) -> Dict:
+    def check_ball_goal_collision(self, soccer_balls: List[Dict], goal_areas: List[Dict],
+                                  trajectory: Optional[TrajectoryEstimator] = None) -> Dict:
         """
         检测足球与球门的碰撞 - 修复版
         
         Args:
             soccer_balls: 检测到的足球列表
-            goal_areas: 球门区域列表
+            goal_areas: 球门区域列表；进球/触门只检查用户标注的球门（detection_method='manual'），
+                        按标注的四边形判断球是否完全进门。可以直接传入预先构建的 GoalRegion；
+                        球门字典按顶点缓存栅格化结果，不会每次调用都重新栅格化
+            trajectory: 会话的轨迹估计器；提供时先检查最近两个样本之间的扫掠路径，
+                        采样间隔内进门又出来的球也能发现（collision_type='goal_crossed'）
             
         Returns:
             碰撞检测结果
@@ -573,103 +1272,259 @@ class SoccerDetector:
             'distance': float('inf')
         }
         
+        if trajectory is not None and goal_areas:
+            ball_radius = 0.0
+            if soccer_balls:
+                bx1, by1, bx2, by2 = max(soccer_balls, key=lambda b: b['confidence'])['bbox']
+                ball_radius = max(bx2 - bx1, by2 - by1) / 2
+            crossing = self.detect_goal_crossing(trajectory, goal_areas, ball_radius)
+            if crossing is not None:
+                return {
+                    'has_collision': True,
+                    'collision_type': 'goal_crossed',
+                    'ball_info': {'center': crossing['crossing_point'], 'timestamp': crossing['crossing_time']},
+                    'goal_info': goal_areas[crossing['goal_index']],
+                    'distance': 0,
+                    'crossing': crossing
+                }
+        
         # 严格检查：必须同时有球和球门才能检测碰撞
         if not soccer_balls or not goal_areas:
             return collision_info
             
         # 最终验证：只接受极高置信度的结果
         valid_balls = [ball for ball in soccer_balls if ball['confidence'] > 0.95]  # 极高置信度要求
-        valid_goals = []  # 不检测球门
+        # 只检测用户标注的球门（自动检测的球门误报太多），按透视四边形精确判断
+        valid_goals = [self._goal_region(goal) for goal in goal_areas
+                       if goal.get('detection_method') == 'manual']
         
         if not valid_balls or not valid_goals:
             return collision_info
         
-        min_distance = float('inf')
-        best_ball = None
-        best_goal = None
-        collision_type = None
+        ball_centers = np.array([ball['center'] for ball in valid_balls], dtype=np.float64)
+        ball_boxes = np.array([ball['bbox'] for ball in valid_balls], dtype=np.float64)
+        # 球的半径估算
+        ball_radius = np.maximum(ball_boxes[:, 2] - ball_boxes[:, 0], ball_boxes[:, 3] - ball_boxes[:, 1]) / 2
         
-        for ball in valid_balls:
-            ball_x, ball_y = ball['center']
-            ball_bbox = ball['bbox']
-            
-            for goal in valid_goals:
-                goal_bbox = goal['bbox']
-                goal_center_x, goal_center_y = goal['center']
-                
-                # 1. 检查球是否在球门内（进球）
-                if (goal_bbox[0] <= ball_x <= goal_bbox[2] and 
-                    goal_bbox[1] <= ball_y <= goal_bbox[3]):
-                    return {
-                        'has_collision': True,
-                        'collision_type': 'goal_scored',
-                        'ball_info': ball,
-                        'goal_info': goal,
-                        'distance': 0
-                    }
-                
-                # 2. 检查球是否与球门边框碰撞 - 更严格的判断
-                # 计算球心到球门边框的最短距离
-                closest_x = max(goal_bbox[0], min(ball_x, goal_bbox[2]))
-                closest_y = max(goal_bbox[1], min(ball_y, goal_bbox[3]))
-                
-                distance = np.sqrt((ball_x - closest_x)**2 + (ball_y - closest_y)**2)
-                
-                # 球的半径估算
-                ball_radius = max(ball_bbox[2] - ball_bbox[0], ball_bbox[3] - ball_bbox[1]) / 2
-                
-                # 更严格的碰撞阈值：只有非常近的距离才认为碰撞
-                collision_threshold = max(5, ball_radius * 0.3)  # 更严格的阈值
-                
-                if distance <= collision_threshold and distance < min_distance:
-                    min_distance = distance
-                    best_ball = ball
-                    best_goal = goal
-                    collision_type = 'goal_contact'
+        # 1. 检查球是否完全进入球门（进球），按 球 × 球门 的顺序取第一个
+        inside = np.stack([goal.fully_inside(ball_centers, ball_radius) for goal in valid_goals], axis=1)
+        if inside.any():
+            ball_index, goal_index = np.argwhere(inside)[0]
+            return {
+                'has_collision': True,
+                'collision_type': 'goal_scored',
+                'ball_info': valid_balls[ball_index],
+                'goal_info': valid_goals[goal_index],
+                'distance': 0
+            }
+        
+        # 2. 检查球是否与球门边框碰撞 - 更严格的判断
+        # 球框与球门部分重叠时距离记为0，否则为球心到球门四边形的最短距离
+        overlap = np.stack([goal.overlap_fraction(ball_boxes) for goal in valid_goals], axis=1)
+        edge_distances = np.stack([point_polygon_distances(ball_centers, goal.polygon)
+                                   for goal in valid_goals], axis=1)
+        distances = np.where(overlap > 0, 0.0, edge_distances)
+        # 更严格的碰撞阈值：只有非常近的距离才认为碰撞
+        collision_threshold = np.maximum(5, ball_radius * 0.3)[:, None]
+        candidates = np.where(distances <= collision_threshold, distances, np.inf)
+        ball_index, goal_index = np.unravel_index(np.argmin(candidates), candidates.shape)
+        min_distance = float(candidates[ball_index, goal_index])
         
         # 只有在非常近的距离才认为碰撞
-        if best_ball and best_goal and min_distance < 20:  # 最大允许距离20像素
+        if min_distance < 20:  # 最大允许距离20像素
             collision_info = {
                 'has_collision': True,
-                'collision_type': collision_type,
-                'ball_info': best_ball,
-                'goal_info': best_goal,
+                'collision_type': 'goal_contact',
+                'ball_info': valid_balls[ball_index],
+                'goal_info': valid_goals[goal_index],
                 'distance': min_distance
             }
         
         return collision_info
     
-    def _filter_duplicate_balls(self, balls: List[Dict]) -> List[Dict]:
+    def detect_goal_crossing(self, trajectory: TrajectoryEstimator, goal_areas: List[Dict],
+                             ball_radius: float = 0.0) -> Optional[Dict]:
+        """
+        扫掠路径进门检测：最近两个样本之间的运动是否从门外进入球门
+        
+        采样间隔内球可能进门又出来，只比较单帧位置会漏掉。这里把两次观测之间的运动近似为匀速直线，
+        球门按球半径外扩后与球心线段求交（等价于球扫过的区域与球门相交）：轴对齐球门外扩 bbox，
+        带角点的球门把各条边沿外法线平移（offset_polygon）。同一个矩形以 bbox 或角点给出时结果相同。
+        与 check_ball_goal_collision 的静态判断一致，只检查用户标注的球门（自动检测的球门误报太多）。
+        
+        Args:
+            trajectory: 会话的轨迹估计器
+            goal_areas: 球门区域列表（原图坐标）；detection_method 不是 'manual' 的球门被跳过，
+                        goal_index 仍是在该列表中的下标
+            ball_radius: 球的半径（像素）
+            
+        Returns:
+            {'event': 'goal_crossing', 'goal_index', 'crossing_time', 'crossing_point', 'fraction',
+             'inside_at_end'}；这一段没有从门外进入任何球门时为None
+        """
+        if not goal_areas or len(trajectory) < 2:
+            return None
+        (p0, p1), (t0, t1) = trajectory.positions(recent=2), trajectory.times(recent=2)
+        start, end = np.array([p0], dtype=np.float64), np.array([p1], dtype=np.float64)
+        
+        entries = np.full(len(goal_areas), np.nan)
+        inside_at_end = np.zeros(len(goal_areas), dtype=bool)
+        box_indices, boxes = [], []
+        for i, goal in enumerate(goal_areas):
+            if goal.get('detection_method') != 'manual':
+                continue
+            corners = goal.get('corners')
+            if corners and len(corners) >= 3:
+                polygon = offset_polygon(corners, ball_radius)
+                entries[i] = segment_polygon_entries(start, end, polygon)[0]
+                inside_at_end[i] = points_in_polygon(end, polygon)[0]
+            else:
+                box_indices.append(i)
+                x1, y1, x2, y2 = goal['bbox']
+                boxes.append([x1 - ball_radius, y1 - ball_radius, x2 + ball_radius, y2 + ball_radius])
+        if boxes:
+            entries[box_indices] = segment_box_entries(start, end, boxes)[0]
+            inside_at_end[box_indices] = points_in_boxes(end, boxes)[0]
+        
+        # 起点已在门内（参数为0）说明上一段已经报告过进入
+        entering = np.where(entries > 0, entries, np.inf)
+        goal_index = int(np.argmin(entering))
+        if not np.isfinite(entering[goal_index]):
+            return None
+        
+        fraction = float(entering[goal_index])
+        point = start[0] + fraction * (end[0] - start[0])
+        return {
+            'event': 'goal_crossing',
+            'goal_index': goal_index,
+            'crossing_time': t0 + fraction * (t1 - t0),
+            'crossing_point': point.tolist(),
+            'fraction': fraction,
+            'inside_at_end': bool(inside_at_end[goal_index])
+        }
+    
+    def predict_goal_entry(self, motion: Optional[Dict], goal_areas: List[Dict],
+                           current_time: Optional[float] = None) -> Optional[Dict]:
+        """
+        由轨迹外推预测足球进入球门的时间
+        
+        按匀加速模型 p(t) = p + v·t + a·t²/2 在 entry_prediction_horizon 内逐步外推，
+        取最早落入任一球门的时刻（GoalRegion 按标注的四边形判断，其余按球门框判断）。置信度随预测距离、样本数和加速度项的占比降低。
+        最新样本距当前时刻越久置信度越低；超过 entry_max_sample_gaps 个采样间隔（至多 entry_max_sample_age 秒）
+        没有新样本时球已丢失，不再外推。
+        
+        Args:
+            motion: 运动状态（TrajectoryEstimator.summary()：position、velocity、acceleration、
+                    samples、timestamp、interval）
+            goal_areas: 球门区域列表（bbox 为原图坐标）
+            current_time: 当前帧的采集时间；最新样本较旧时从当前时刻开始计算
+            
+        Returns:
+            {'event': 'predicted_entry', 'goal_index', 'time_to_entry_ms', 'entry_point',
+             'confidence'}；不会进门、已经在门内、速度太低或最新样本过旧时为None
+        """
+        if not motion or not goal_areas:
+            return None
+        position = np.asarray(motion['position'], dtype=np.float64)
+        velocity = np.asarray(motion['velocity'], dtype=np.float64)
+        acceleration = np.asarray(motion['acceleration'], dtype=np.float64)
+        if np.hypot(*velocity) < self.entry_min_speed:
+            return None
+        
+        if self._points_in_goals(position[None, :], goal_areas).any():
+            return None
+        
+        elapsed = 0.0
+        if current_time is not None and motion.get('timestamp') is not None:
+            elapsed = max(0.0, current_time - motion['timestamp'])
+        max_age = self.entry_max_sample_age
+        if motion.get('interval'):
+            max_age = min(max_age, self.entry_max_sample_gaps * motion['interval'])
+        if elapsed > max_age:
+            return None
+        step = self.entry_prediction_step
+        times = np.arange(elapsed + step, elapsed + self.entry_prediction_horizon + step / 2, step)
+        linear = velocity[None, :] * times[:, None]
+        curvature = 0.5 * acceleration[None, :] * (times * times)[:, None]
+        path = position[None, :] + linear + curvature
+        
+        inside = self._points_in_goals(path, goal_areas)
+        hits = np.flatnonzero(inside.any(axis=1))
+        if len(hits) == 0:
+            return None
+        first = hits[0]
+        goal_index = int(np.argmax(inside[first]))
+        
+        # 在进门前最后一步内再细分一次，进门时刻精确到步长的1/10
+        fine = np.linspace(times[first] - step, times[first], 11)[1:]
+        linear = velocity[None, :] * fine[:, None]
+        curvature = 0.5 * acceleration[None, :] * (fine * fine)[:, None]
+        fine_path = position[None, :] + linear + curvature
+        k = int(np.argmax(self._points_in_goals(fine_path, goal_areas[goal_index:goal_index + 1])[:, 0]))
+        time_to_entry = float(fine[k] - elapsed)
+        entry_point = fine_path[k]
+        
+        # 越远越不确定；样本少时速度/加速度不可靠；路径主要靠加速度弯过去时可信度减半；
+        # 最新样本越旧越不可信，到 max_age 时减半
+        linear_norm = float(np.hypot(*linear[k]))
+        curvature_norm = float(np.hypot(*curvature[k]))
+        confidence = ((1 - time_to_entry / self.entry_prediction_horizon) *
+                      min(1.0, (motion.get('samples', 3) - 1) / 4) *
+                      (1 - 0.5 * curvature_norm / (linear_norm + curvature_norm + 1e-9)) *
+                      (1 - 0.5 * elapsed / max_age))
+        if confidence < self.entry_min_confidence:
+            return None
+        
+        return {
+            'event': 'predicted_entry',
+            'goal_index': goal_index,
+            'time_to_entry_ms': round(time_to_entry * 1000),
+            'entry_point': entry_point.tolist(),
+            'confidence': float(confidence)
+        }
+    
+    @staticmethod
+    def _points_in_goals(points: np.ndarray, goal_areas: List[Dict]) -> np.ndarray:
+        """
+        点是否在各球门内：GoalRegion 按多边形网格判断，其余球门按 bbox 判断
+        
+        Returns:
+            (P, G) 布尔矩阵
+        """
+        inside = points_in_boxes(points, [goal['bbox'] for goal in goal_areas])
+        for i, goal in enumerate(goal_areas):
+            if isinstance(goal, GoalRegion):
+                inside[:, i] = goal.contains(points)
+        return inside
+    
+    def _filter_duplicate_balls(self, balls: List[Detection]) -> List[Detection]:
         """
         筛选球类，适配iOS视频中的小足球
         """
         if not balls:
             return []
         
-        # 适配iOS视频的球类验证
-        valid_balls = []
-        for ball in balls:
-            bbox = ball['bbox']
-            width = bbox[2] - bbox[0]
-            height = bbox[3] - bbox[1]
-            area = width * height
-            aspect_ratio = width / height
-            confidence = ball['confidence']
-            
-            # 适配iOS视频的验证条件
-            if (confidence > 0.25 and                 # 降低置信度要求
-                0.5 < aspect_ratio < 2.5 and          # 放宽宽高比
-                300 < area < 10000 and                # 适配小足球面积
-                width > 15 and height > 15 and        # 降低最小尺寸
-                width < 300 and height < 300):        # 防止过大的检测框
-                valid_balls.append(ball)
-        
-        if not valid_balls:
+        boxes = np.array([ball.bbox for ball in balls], dtype=np.float64)
+        confidences = np.array([ball.confidence for ball in balls], dtype=np.float64)
+        widths = boxes[:, 2] - boxes[:, 0]
+        heights = boxes[:, 3] - boxes[:, 1]
+        areas = widths * heights
+        aspect_ratios = np.divide(widths, heights, out=np.zeros_like(widths), where=heights > 0)
+        
+        # 适配iOS视频的验证条件
+        valid = ((confidences > 0.25) &                                   # 降低置信度要求
+                 (aspect_ratios > 0.5) & (aspect_ratios < 2.5) &          # 放宽宽高比
+                 (areas > 300) & (areas < 10000) &                        # 适配小足球面积
+                 (widths > 15) & (heights > 15) &                         # 降低最小尺寸
+                 (widths < 300) & (heights < 300))                        # 防止过大的检测框
+        
+        if not valid.any():
             return balls  # 如果没有通过验证的，返回原始检测结果
         
-        # 按置信度排序，返回前3个最好的结果
-        valid_balls.sort(key=lambda x: x['confidence'], reverse=True)
-        return valid_balls[:3]
+        # 按置信度去掉重叠的重复框，返回前3个最好的结果
+        candidates = np.flatnonzero(valid)
+        keep = non_max_suppression(boxes[candidates], confidences[candidates], self.iou_threshold, max_det=3)
+        return [balls[i] for i in candidates[keep].tolist()]
 
     def is_goal_scoring_moment(self, soccer_balls: List[Dict], goal_areas: List[Dict]) -> bool:
         """
@@ -678,15 +1533,34 @@ class SoccerDetector:
         collision = self.check_ball_goal_collision(soccer_balls, goal_areas)
         return collision['has_collision']
     
-    def process_frame(self, frame: np.ndarray, ball_history: List[Dict] = None, 
-                     frame_buffer: List[Dict] = None) -> Dict:
+    def process_frame(self, frame: Union[np.ndarray, FrameContext],
+                     ball_history: Union[List[Dict], TrackBuffer, None] = None, 
+                     frame_buffer: List[Dict] = None,
+                     tracker: Optional[BallTracker] = None,
+                     background_model: Optional[BackgroundModel] = None,
+                     goal_cache: Optional[GoalCache] = None,
+                     trajectory: Optional[TrajectoryEstimator] = None,
+                     timestamp: Optional[float] = None,
+                     goal_regions: Optional[List[Dict]] = None) -> Dict:
         """
         处理单帧图像（禁用碰撞检测和精彩片段）
         
         Args:
-            frame: 输入帧
-            ball_history: 球的历史位置
+            frame: 输入帧或帧上下文；传入会话的 FrameContext 时，派生图像（缩小图、灰度、HSV等）
+                   在本帧各检测器之间共用，并复用会话的缓冲区
+            ball_history: 球的历史位置；推荐传入会话的 TrackBuffer（定长环形缓冲区，
+                          追加和淘汰均为O(1)），列表形式保留30条
             frame_buffer: 帧缓冲区（保留但不使用）
+            tracker: 会话的足球跟踪器；提供时按 cascade_stages 先在预测位置附近
+                     用廉价阶段确认足球，只在需要时运行完整检测
+            background_model: 会话的背景模型（detection_mode='proposals' 时使用）
+            goal_cache: 会话的球门缓存；提供时结果中包含锁定（或正在确认）的球门，
+                        不提供时不检测球门
+            trajectory: 会话的轨迹估计器；提供时每帧只增量更新最新样本，
+                        结果中的 trajectory 为不含历史列表的运动状态（历史位置按需从估计器读取）
+            timestamp: 帧的采集时间（秒，例如客户端时间戳）；None 时使用服务器当前时间
+            goal_regions: 用户标注的球门（原图坐标，含 bbox）；与球门缓存锁定的球门一起
+                          用于进门时间预测（需要 trajectory）
             
         Returns:
             处理结果
@@ -695,8 +1569,11 @@ class SoccerDetector:
             ball_history = []
         if frame_buffer is None:
             frame_buffer = []
+        sample_added = False
         
-        current_time = time.time()
+        context = FrameContext.wrap(frame)
+        frame = context.frame
+        current_time = time.time() if timestamp is None else timestamp
         
         # 简化版本：不再维护帧缓冲区（因为不需要精彩片段）
         # frame_buffer.append({
@@ -709,23 +1586,42 @@ class SoccerDetector:
         # if len(frame_buffer) > max_buffer_size:
         #     frame_buffer.pop(0)
         
-        # 检测物体（只检测球类）
-        detection_result = self.detect_objects(frame)
+        # 检测物体（只检测球类）：廉价阶段优先，YOLO兜底
+        detection_result, cascade_info = self._run_cascade(context, current_time, tracker, background_model)
+        if goal_cache is not None:
+            detection_result['goal_areas'] = goal_cache.update(frame, current_time, context=context)
         
         # 更新球的历史位置
         current_balls = detection_result['soccer_balls']
         if current_balls:
             # 选择置信度最高的球
-            best_ball = max(current_balls, key=lambda x: x['confidence'])
-            best_ball['timestamp'] = current_time
+            best_ball = max(current_balls, key=lambda x: x.confidence)
+            best_ball.timestamp = current_time
             ball_history.append(best_ball)
             
-            # 保持历史记录长度
-            if len(ball_history) > 30:  # 保留更多历史用于轨迹分析
+            # 保持历史记录长度（TrackBuffer 自动淘汰最旧的记录）
+            if not isinstance(ball_history, TrackBuffer) and len(ball_history) > 30:  # 保留更多历史用于轨迹分析
                 ball_history.pop(0)
+            if trajectory is not None:
+                sample_added = trajectory.add(best_ball.center, current_time)
         
         # 计算轨迹
-        trajectory = self.calculate_ball_trajectory(ball_history)
+        if trajectory is not None:
+            trajectory_info = trajectory.summary()
+        else:
+            trajectory_info = self.calculate_ball_trajectory(ball_history)
+        
+        # 进门时间预测：球到达前就给出预警，录像和高频采样可以提前开始
+        # 扫掠路径进门检测：只在本帧加入了新样本时检查新的一段，同一次进门只报告一次
+        goal_entry = None
+        goal_crossing = None
+        if trajectory is not None:
+            entry_goals = list(detection_result['goal_areas']) + list(goal_regions or [])
+            goal_entry = self.predict_goal_entry(trajectory_info, entry_goals, current_time)
+            if sample_added:
+                bx1, by1, bx2, by2 = best_ball.bbox
+                goal_crossing = self.detect_goal_crossing(trajectory, entry_goals,
+                                                          max(bx2 - bx1, by2 - by1) / 2)
         
         # 禁用碰撞检测 - 用户不需要进球检测
         # collision_info = self.check_ball_goal_collision(
@@ -761,14 +1657,99 @@ class SoccerDetector:
         return {
             'detections': detection_result,
             'collision_info': collision_info,
-            'trajectory': trajectory,
+            'trajectory': trajectory_info,
             'is_goal_moment': False,  # 不再检测进球时刻
             'ball_history': ball_history,
             'frame_buffer': frame_buffer,  # 保留结构但不使用
             'clip_info': clip_info,
+            'tracking': tracker.get_state() if tracker is not None else None,
+            'cascade': cascade_info,
+            'goal_entry': goal_entry,
+            'goal_crossing': goal_crossing,
             'timestamp': current_time
         }
     
+    def _run_cascade(self, frame: Union[np.ndarray, FrameContext], timestamp: float,
+                     tracker: Optional[BallTracker],
+                     background_model: Optional[BackgroundModel]) -> Tuple[Dict, Dict]:
+        """
+        级联检测
+        
+        跟踪器置信（位置不确定度小、未到周期性重新锚定）时，依次尝试廉价阶段，
+        第一个在预测位置附近找到一致足球的阶段直接给出本帧结果；
+        否则运行完整检测（YOLO）并用结果重新锚定跟踪器。
+        
+        Returns:
+            (检测结果, {'stage': 给出结果的阶段, 'attempted': 尝试过的廉价阶段})
+        """
+        context = FrameContext.wrap(frame)
+        frame = context.frame
+        # 背景模型每帧都更新，不论本帧由哪个阶段给出结果（见 BackgroundModel）
+        if self.detection_mode == 'proposals' and background_model is not None:
+            background_model.apply(context)
+        attempted = []
+        if tracker is not None:
+            tracker.predict(timestamp)
+            if not tracker.needs_detection():
+                for stage in self.cascade_stages:
+                    attempted.append(stage)
+                    if stage == 'tracker':
+                        ball = tracker.local_search(frame, timestamp)
+                    else:
+                        ball = self._color_confirm(frame, tracker, timestamp)
+                    if ball is not None:
+                        detection_result = {
+                            'detections': [ball],
+                            'soccer_balls': [ball],
+                            'goal_areas': [],
+                            'frame_shape': frame.shape
+                        }
+                        return detection_result, {'stage': stage, 'attempted': attempted}
+        
+        detection_result = self.detect_objects(context, background_model)
+        if tracker is not None:
+            balls = detection_result['soccer_balls']
+            best = max(balls, key=lambda x: x.confidence) if balls else None
+            tracker.observe_detection(frame, best, timestamp)
+        return detection_result, {'stage': 'yolo', 'attempted': attempted}
+    
+    def _color_confirm(self, frame: np.ndarray, tracker: BallTracker,
+                       timestamp: float) -> Optional[Detection]:
+        """
+        颜色级联阶段：只在跟踪器的预测窗口内做颜色检测
+        
+        候选需要圆度足够高、尺寸与跟踪中的足球相近，取离预测位置最近的一个。
+        
+        Returns:
+            确认成功时返回足球检测结果（原图坐标），否则None
+        """
+        tw, th = tracker.ball_size
+        x1, y1, x2, y2 = tracker.search_region(frame.shape, margin=max(tw, th))
+        if x2 - x1 < 8 or y2 - y1 < 8:
+            return None
+        
+        px, py = tracker.x[:2]
+        best, best_distance = None, float('inf')
+        for ball in self.detect_ball_by_color(frame[y1:y2, x1:x2]):
+            bx1, by1, bx2, by2 = ball.bbox
+            w, h = max(1, bx2 - bx1), max(1, by2 - by1)
+            size_ratio = max(w / tw, tw / w, h / th, th / h)
+            if (ball.confidence < self.color_confirm_confidence or
+                    size_ratio > self.color_confirm_size_ratio):
+                continue
+            distance = np.hypot(ball.center[0] + x1 - px, ball.center[1] + y1 - py)
+            if distance < best_distance:
+                best, best_distance = ball, distance
+        
+        if best is None:
+            return None
+        
+        bx1, by1, bx2, by2 = best.bbox
+        best.bbox = [bx1 + x1, by1 + y1, bx2 + x1, by2 + y1]
+        best.center = [best.center[0] + x1, best.center[1] + y1]
+        tracker.confirm_detection(best, timestamp)
+        return best
+    
     def draw_detections(self, frame: np.ndarray, result: Dict) -> np.ndarray:
         """
         在帧上绘制检测结果
@@ -0,0 +1,125 @@
+"""
+足球轨迹存储 - 定长环形缓冲区，底层为结构化NumPy数组
+取代检测结果字典列表：追加和淘汰都是O(1)，轨迹计算直接使用连续的数组视图
+"""
+
+import numpy as np
+from typing import Dict, List, Optional
+
+TRACK_DTYPE = np.dtype([
+    ('center', np.float32, (2,)),
+    ('bbox', np.float32, (4,)),
+    ('confidence', np.float32),
+    ('timestamp', np.float64),   # 采集时间（秒），float32 精度不足以表示时间戳
+    ('method', np.uint8),        # detection_method 编码
+    ('label', np.uint8),         # class_name 编码
+])
+
+# 检测方法和类别名称的编码表（进程内共享，按首次出现的顺序编号）
+_name_codes: Dict[str, int] = {}
+_code_names: List[str] = []
+
+
+def encode_name(name: str) -> int:
+    """名称 -> 编码，新名称自动登记"""
+    code = _name_codes.get(name)
+    if code is None:
+        if len(_code_names) >= 256:
+            raise ValueError(f'名称编码已满，无法登记: {name}')
+        code = _name_codes[name] = len(_code_names)
+        _code_names.append(name)
+    return code
+
+
+def decode_name(code: int) -> str:
+    """编码 -> 名称"""
+    return _code_names[code]
+
+
+class TrackBuffer:
+    """
+    定长环形缓冲区
+
+    每条记录同时写入 i 和 i + capacity 两个位置，任意最近 n 条记录在底层数组中都是连续的一段，
+    因此 window() 总是返回零拷贝视图，无需处理回绕。
+    视图在后续追加时会被覆盖，需要保存时请 copy()。
+    """
+
+    def __init__(self, capacity: int = 30):
+        """
+        Args:
+            capacity: 最多保留的记录数，超过时淘汰最旧的记录
+        """
+        if capacity < 1:
+            raise ValueError('capacity 必须为正整数')
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=TRACK_DTYPE)
+        self._next = 0    # 下一条记录写入的位置（0..capacity-1）
+        self._size = 0
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, detection: Dict, timestamp: Optional[float] = None):
+        """
+        追加一条检测结果
+
+        Args:
+            detection: 检测结果字典（bbox、center、confidence，可选 class_name、detection_method、timestamp）
+            timestamp: 采集时间；None 时使用 detection['timestamp']
+        """
+        record = (
+            detection['center'],
+            detection['bbox'],
+            detection['confidence'],
+            detection.get('timestamp', 0.0) if timestamp is None else timestamp,
+            encode_name(detection.get('detection_method', 'unknown')),
+            encode_name(detection.get('class_name', 'ball')),
+        )
+        self._data[self._next] = record
+        self._data[self._next + self.capacity] = record
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def window(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        最近 n 条记录（从旧到新）的零拷贝视图
+
+        Args:
+            n: 记录数，None 表示全部
+        """
+        n = self._size if n is None else min(n, self._size)
+        # 回绕时改用第二份副本，使这 n 条记录连续
+        end = self._next if self._next >= n else self._next + self.capacity
+        return self._data[end - n:end]
+
+    @property
+    def centers(self) -> np.ndarray:
+        return self.window()['center']
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.window()['timestamp']
+
+    def latest(self) -> Optional[Dict]:
+        """最新一条记录（字典形式）"""
+        return self._to_dict(self.window(1)[0]) if self._size else None
+
+    def to_dicts(self, n: Optional[int] = None) -> List[Dict]:
+        """把最近 n 条记录转换成检测结果字典列表（只在序列化等边界处使用）"""
+        return [self._to_dict(record) for record in self.window(n)]
+
+    @staticmethod
+    def _to_dict(record) -> Dict:
+        return {
+            'bbox': record['bbox'].tolist(),
+            'confidence': float(record['confidence']),
+            'class_name': decode_name(record['label']),
+            'center': record['center'].tolist(),
+            'detection_method': decode_name(record['method']),
+            'timestamp': float(record['timestamp'])
+        }
@@ -0,0 +1,172 @@
+"""
+足球轨迹估计 - 每个新样本常数时间更新速度、加速度和速率
+历史位置保存在定长队列中，只在调用方需要时才转换成列表
+"""
+
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class TrajectoryEstimator:
+    """
+    增量轨迹估计器（每个会话一个实例）
+
+    速度为相邻两个样本的差分，加速度为相邻两个速度的差分（除以后一段的时间间隔），
+    与对整段历史做 np.diff 的结果相同，但每帧只计算最新的一项。
+    时间使用帧的采集时间（客户端时间戳），不受网络和排队延迟影响。
+    """
+
+    def __init__(self, max_history: int = 30, min_samples: int = 3):
+        """
+        Args:
+            max_history: 保留的历史位置数量
+            min_samples: 至少多少个样本才给出轨迹
+        """
+        self.max_history = max_history
+        self.min_samples = min_samples
+        self.reset()
+
+    def reset(self):
+        """丢弃全部历史"""
+        self._positions = deque(maxlen=self.max_history)
+        self._times = deque(maxlen=self.max_history)
+        self._velocities = deque(maxlen=max(1, self.max_history - 1))
+        self._accelerations = deque(maxlen=max(1, self.max_history - 2))
+
+    @classmethod
+    def from_history(cls, ball_history: List[Dict], max_history: Optional[int] = None) -> 'TrajectoryEstimator':
+        """由检测结果列表构建（没有 timestamp 的记录使用下标作为时间）"""
+        return cls.from_samples([ball['center'] for ball in ball_history],
+                                [ball.get('timestamp', i) for i, ball in enumerate(ball_history)], max_history)
+
+    @classmethod
+    def from_samples(cls, centers, timestamps, max_history: Optional[int] = None) -> 'TrajectoryEstimator':
+        """
+        由球心和采集时间序列构建（例如 TrackBuffer 窗口的 center / timestamp 列）
+
+        与逐帧 add 相同，时间戳没有递增的样本被丢弃，不会出现除以0的速度
+        """
+        estimator = cls(max_history=max_history or max(1, len(centers)))
+        for center, timestamp in zip(centers, timestamps):
+            estimator.add(center, float(timestamp))
+        return estimator
+
+    def add(self, center: List[float], timestamp: float) -> bool:
+        """
+        加入一个新样本
+
+        Args:
+            center: 球心 [x, y]
+            timestamp: 采集时间（秒）
+
+        Returns:
+            False 表示时间戳没有递增（重复或乱序的帧），样本被丢弃
+        """
+        position = (float(center[0]), float(center[1]))
+        if self._times:
+            dt = timestamp - self._times[-1]
+            if dt <= 0:
+                return False
+            last = self._positions[-1]
+            velocity = ((position[0] - last[0]) / dt, (position[1] - last[1]) / dt)
+            if self._velocities:
+                previous = self._velocities[-1]
+                self._accelerations.append(((velocity[0] - previous[0]) / dt,
+                                            (velocity[1] - previous[1]) / dt))
+            self._velocities.append(velocity)
+        self._positions.append(position)
+        self._times.append(float(timestamp))
+        return True
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @property
+    def ready(self) -> bool:
+        return len(self._positions) >= self.min_samples
+
+    @property
+    def position(self) -> Optional[List[float]]:
+        return list(self._positions[-1]) if self._positions else None
+
+    @property
+    def velocity(self) -> List[float]:
+        return list(self._velocities[-1]) if self._velocities else [0.0, 0.0]
+
+    @property
+    def acceleration(self) -> List[float]:
+        return list(self._accelerations[-1]) if self._accelerations else [0.0, 0.0]
+
+    @property
+    def speed(self) -> float:
+        vx, vy = self.velocity
+        return float(np.hypot(vx, vy))
+
+    @property
+    def timestamp(self) -> Optional[float]:
+        return self._times[-1] if self._times else None
+
+    @property
+    def interval(self) -> Optional[float]:
+        """最近几个样本的采样间隔（秒，取中位数）；不足两个样本时为None"""
+        if len(self._times) < 2:
+            return None
+        return float(np.median(np.diff(self.times(recent=5))))
+
+    def positions(self, recent: Optional[int] = None) -> List[List[float]]:
+        """最近 recent 个历史位置（None 表示全部）"""
+        return self._tail(self._positions, recent)
+
+    def times(self, recent: Optional[int] = None) -> List[float]:
+        """最近 recent 个样本的采集时间"""
+        if recent is None or recent >= len(self._times):
+            return list(self._times)
+        return [self._times[i] for i in range(len(self._times) - recent, len(self._times))]
+
+    def velocities(self, recent: Optional[int] = None) -> List[List[float]]:
+        return self._tail(self._velocities, recent)
+
+    def accelerations(self, recent: Optional[int] = None) -> List[List[float]]:
+        return self._tail(self._accelerations, recent)
+
+    @staticmethod
+    def _tail(values: deque, recent: Optional[int]) -> List[List[float]]:
+        if recent is None or recent >= len(values):
+            return [list(v) for v in values]
+        return [list(values[i]) for i in range(len(values) - recent, len(values))]
+
+    def summary(self) -> Optional[Dict]:
+        """
+        当前运动状态（不含历史列表）
+
+        Returns:
+            样本不足时为None
+        """
+        if not self.ready:
+            return None
+        return {
+            'position': self.position,
+            'velocity': self.velocity,
+            'acceleration': self.acceleration,
+            'speed': self.speed,
+            'timestamp': self.timestamp,
+            'interval': self.interval,
+            'samples': len(self._positions)
+        }
+
+    def to_dict(self) -> Optional[Dict]:
+        """
+        完整轨迹信息（与 SoccerDetector.calculate_ball_trajectory 的格式相同）
+
+        Returns:
+            样本不足时为None
+        """
+        if not self.ready:
+            return None
+        return {
+            'positions': self.positions(),
+            'velocities': self.velocities(),
+            'accelerations': self.accelerations() or [[0, 0]],
+            'speed': self.speed
+        }
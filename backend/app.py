@@ -3,20 +3,25 @@ ClipGoal-AI 后端服务
 提供实时足球和球门检测API
 """
 
-from fastapi import FastAPI, File, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, File, Header, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import cv2
 import numpy as np
 import base64
+import hmac
 import json
 import asyncio
 import time
 import sys
 import os
+from typing import Optional
 
 # 自定义JSON编码器，处理numpy数据类型
 class NumpyEncoder(json.JSONEncoder):
     def default(self, obj):
+        if isinstance(obj, (Detection, GoalRegion)):
+            return obj.to_dict()
         if isinstance(obj, (np.integer, np.floating)):
             return obj.item()
         elif isinstance(obj, np.ndarray):
@@ -31,6 +36,18 @@ class NumpyEncoder(json.JSONEncoder):
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'ai_model'))
 
 from soccer_detector import SoccerDetector
+from detection import Detection
+from goal_region import GoalRegion
+from ball_tracker import BallTracker
+from motion_gate import MotionGate, BackgroundModel
+from frame_context import BufferPool, FrameContext
+from trajectory import TrajectoryEstimator
+from event_stream import EventStream
+from track_buffer import TrackBuffer
+from metrics import metrics
+from inference_scheduler import InferenceScheduler
+from latency_trace import FrameTrace
+from sampling_profiler import ProfilerBusy, SamplingProfiler, collapse
 
 app = FastAPI(title="ClipGoal-AI Detection API", version="1.0.0")
 
@@ -43,20 +60,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 检测器配置（可通过环境变量覆盖）
+MODEL_PATH = os.environ.get('CLIPGOAL_MODEL', 'yolo11s.pt')
+INFERENCE_BACKEND = os.environ.get('CLIPGOAL_BACKEND', 'torch')  # torch / onnx / onnx_int8 / openvino
+INFERENCE_IMGSZ = int(os.environ.get('CLIPGOAL_IMGSZ', '640'))
+DETECTION_MODE = os.environ.get('CLIPGOAL_DETECTION_MODE', 'full')  # full / proposals
+# YOLO之前依次尝试的廉价阶段，逗号分隔；设为空字符串表示每帧都运行YOLO
+CASCADE_STAGES = [stage.strip() for stage in os.environ.get('CLIPGOAL_CASCADE', 'tracker,color').split(',')
+                  if stage.strip()]
+# 自动球门检测：每个会话锁定一次球门，之后低频后台复核（默认关闭，只使用手动标注的球门）
+GOAL_DETECTION = os.environ.get('CLIPGOAL_GOAL_DETECTION', '0') == '1'
+# 推理调度：每个实时会话的最低服务速率（帧/秒），以及球接近球门后保持高优先级的时间（秒）
+SCHEDULER_MIN_RATE = float(os.environ.get('CLIPGOAL_MIN_RATE', '2.0'))
+NEAR_GOAL_HOLD = 2.0
+# 运动门控只关注手动标注的球门（按球门宽高的比例外扩）和跟踪器预测的球框
+GATE_GOAL_MARGIN = 0.5
+GATE_BALL_MARGIN = 40.0
+# 管理接口令牌（请求头 X-Admin-Token）；未设置时管理接口关闭
+ADMIN_TOKEN = os.environ.get('CLIPGOAL_ADMIN_TOKEN', '')
+
 # 延迟初始化检测器
 detector = None
 
 def get_detector():
     global detector
     if detector is None:
-        print("正在初始化YOLO11s足球检测器...")
-        detector = SoccerDetector(model_path='yolo11s.pt')
-        print("✅ YOLO11s足球检测器初始化完成")
+        print(f"正在初始化足球检测器: {MODEL_PATH} ({INFERENCE_BACKEND}, {INFERENCE_IMGSZ})...")
+        detector = SoccerDetector(model_path=MODEL_PATH, imgsz=INFERENCE_IMGSZ,
+                                  backend=INFERENCE_BACKEND, detection_mode=DETECTION_MODE,
+                                  cascade=CASCADE_STAGES)
+        print("✅ 足球检测器初始化完成")
     return detector
 
+# 所有会话共享一个检测器：推理在调度器的工作线程中按优先级通道和加权公平排队执行
+scheduler = InferenceScheduler(min_rate=SCHEDULER_MIN_RATE, metrics=metrics)
+# 按需采样分析器：只在 /admin/profile 请求期间运行
+profiler = SamplingProfiler()
+
 # 存储连接的WebSocket客户端
 active_connections = []
-ball_history = []
+ball_history = TrackBuffer()  # /detect 接口的足球历史（定长环形缓冲区）
 frame_buffer = []  # 10秒帧缓冲区
 saved_clips = []   # 保存的精彩片段
 
@@ -104,6 +147,46 @@ def decode_base64_image(base64_string: str) -> np.ndarray:
         return None
 
 
+def parse_goal_area(value) -> Optional[GoalRegion]:
+    """
+    解析客户端随帧发送的手动标注球门（原图像素坐标）
+    
+    支持 [x1, y1, x2, y2] 或顶点列表 [[x, y], ...]（标注的四个角），无效时返回None。
+    返回的 GoalRegion 在构建时栅格化一次，之后逐帧的门内判断都是查表。
+    """
+    try:
+        points = np.asarray(value, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    if points.shape == (4,):
+        x1, y1, x2, y2 = points.tolist()
+        corners = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+    elif points.ndim == 2 and points.shape[0] >= 3 and points.shape[1] == 2:
+        corners = points.tolist()
+    else:
+        return None
+    try:
+        return GoalRegion(corners)
+    except ValueError:
+        return None
+
+
+def motion_gate_regions(manual_goals: list, tracker: BallTracker, frame_shape) -> Optional[list]:
+    """
+    运动门控的关注区域：外扩后的手动标注球门，以及跟踪器预测的球框（按位置不确定度外扩）
+    
+    两者都没有时返回None（整幅画面），远离球门和球的球员、观众走动不会触发检测
+    """
+    regions = []
+    for goal in manual_goals:
+        x1, y1, x2, y2 = goal['bbox']
+        mx, my = (x2 - x1) * GATE_GOAL_MARGIN, (y2 - y1) * GATE_GOAL_MARGIN
+        regions.append([x1 - mx, y1 - my, x2 + mx, y2 + my])
+    if tracker.initialized:
+        regions.append(list(tracker.search_region(frame_shape, margin=GATE_BALL_MARGIN)))
+    return regions or None
+
+
 def encode_image_to_base64(image: np.ndarray) -> str:
     """
     编码图像为base64
@@ -139,7 +222,9 @@ async def detect_image(file: UploadFile = File(...)):
         # 执行检测
         global ball_history, frame_buffer, saved_clips
         current_detector = get_detector()
-        result = current_detector.process_frame(frame, ball_history, frame_buffer)
+        # 单张图片检测为尽力而为：只使用实时会话剩余的检测器时间
+        result = await scheduler.submit('detect', current_detector.process_frame, frame, ball_history,
+                                        frame_buffer, lane='best_effort')
         ball_history = result['ball_history']
         frame_buffer = result['frame_buffer']
         
@@ -160,7 +245,7 @@ async def detect_image(file: UploadFile = File(...)):
         response_data = {
             "success": True,
             "detections": {
-                "soccer_balls": result['detections']['soccer_balls'],
+                "soccer_balls": [ball.to_dict() for ball in result['detections']['soccer_balls']],
                 "goal_areas": result['detections']['goal_areas']
             },
             "collision_info": result['collision_info'],
@@ -181,19 +266,54 @@ async def detect_image(file: UploadFile = File(...)):
 async def websocket_endpoint(websocket: WebSocket):
     """
     实时检测WebSocket端点 - YOLO11s逐帧处理
+    
+    连接参数 mode=events（/ws?mode=events）时不逐帧返回完整结果，只发送状态转换事件
+    （球可见/丢失、进门/离开、预测射门）和低频心跳
     """
     await manager.connect(websocket)
-    global ball_history
+    # 调度器中的会话标识；录制中或球在球门附近时使用最高优先级通道
+    session_id = f'ws-{id(websocket)}'
+    near_goal_until = 0.0
+    # 事件模式：服务端状态机去抖后只发送状态变化
+    event_stream = EventStream() if websocket.query_params.get('mode') == 'events' else None
     frame_count = 0
+    # 每个连接独立的足球历史：结构化数组环形缓冲区，追加和淘汰都是O(1)
+    ball_history = TrackBuffer()
+    # 每个连接独立的足球跟踪器，允许跳过可预测的帧
+    tracker = BallTracker()
+    # 每个连接独立的运动门控：画面静止时复用上一帧结果
+    motion_gate = MotionGate()
+    last_response = None
+    # 每个连接独立的背景模型，为 proposals 模式提供运动候选区域
+    background_model = BackgroundModel()
+    # 每个连接独立的球门缓存（启用自动球门检测时）
+    goal_cache = get_detector().create_goal_cache() if GOAL_DETECTION else None
+    # 每个连接独立的缓冲池：同一路视频分辨率固定，派生图像逐帧复用同一块内存
+    frame_pool = BufferPool()
+    # 每个连接独立的轨迹估计器：每帧增量更新，只在响应时取最近几个位置
+    trajectory = TrajectoryEstimator()
+    # 客户端标注的球门（随帧消息的 goal_area 字段更新，原图像素坐标），用于进门时间预测和扫掠进门检测
+    manual_goals = []
+    # 上一次收到的标注，标注不变时不重新栅格化
+    manual_goal_area = None
     
     try:
         while True:
             # 接收来自客户端的数据
             data = await websocket.receive_text()
+            # 接收时间在解析消息之前记录：解析大段 base64 的耗时计入 decode，不算作网络延迟
+            received = time.time()
             frame_data = json.loads(data)
+            # 本帧的延迟追踪：客户端采集时间 -> 接收 -> 解码 -> 推理开始/结束 -> 序列化
+            trace = FrameTrace(frame_data.get('timestamp'), received)
             
             # 解码图像
             frame = decode_base64_image(frame_data['image'])
+            trace.mark('decode')
+            if 'goal_area' in frame_data and frame_data['goal_area'] != manual_goal_area:
+                manual_goal_area = frame_data['goal_area']
+                goal = parse_goal_area(manual_goal_area)
+                manual_goals = [goal] if goal is not None else []
             
             if frame is not None:
                 frame_count += 1
@@ -201,12 +321,67 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 print(f"📷 帧{frame_count}: 尺寸{frame.shape[1]}x{frame.shape[0]}")
                 
+                # 本帧的派生图像（缩小图、灰度、HSV等）在运动门控和各检测器之间只计算一次
+                context = FrameContext(frame, frame_pool)
+                
+                # 客户端采集时间（Date.now() 毫秒），轨迹按采集时间计算，不受网络和排队延迟影响
+                client_timestamp = frame_data.get('timestamp')
+                capture_time = client_timestamp / 1000 if isinstance(client_timestamp, (int, float)) else None
+                
+                # 运动门控：球门和球附近没有变化时跳过检测，返回上一帧结果并标记为过期
+                has_motion = motion_gate.check(context, motion_gate_regions(manual_goals, tracker, frame.shape))
+                metrics.observe('motion_gate_ms', (time.time() - start_time) * 1000)
+                metrics.incr('motion_gate.frames')
+                if not has_motion:
+                    # 预测的球框内没有运动：球静止，推进跟踪器时钟并把速度置零。
+                    # 跳过的帧不向轨迹估计器加样本：速度按采集时间差计算，下一次检测的样本自然覆盖整段间隔
+                    tracker.hold(capture_time if capture_time is not None else time.time())
+                    if DETECTION_MODE == 'proposals':
+                        # 背景模型每帧都更新（缩小图上开销很小），跳过的帧同样计入 MOG2 的历史
+                        background_model.apply(context)
+                if not has_motion and event_stream is not None and event_stream.frames > 0:
+                    metrics.incr('motion_gate.skipped')
+                    message = event_stream.tick()
+                    if message is not None:
+                        metrics.incr('events.heartbeats')
+                        await websocket.send_text(trace.attach(json.dumps(message, separators=(',', ':'))))
+                        trace.record(metrics)
+                    continue
+                if not has_motion and last_response is not None:
+                    metrics.incr('motion_gate.skipped')
+                    # 与正常响应相同，timestamp 为本帧的采集时间（客户端没有提供时为服务器时间）
+                    stale_response = dict(last_response, stale=True, goal_entry=None, goal_crossing=None,
+                                          timestamp=round(capture_time if capture_time is not None else time.time(), 2))
+                    response_json = json.dumps(stale_response, cls=NumpyEncoder, separators=(',', ':'))
+                    await websocket.send_text(trace.attach(response_json))
+                    trace.record(metrics)
+                    continue
+                
                 # 执行YOLO11s检测
                 global frame_buffer, saved_clips
                 current_detector = get_detector()
-                result = current_detector.process_frame(frame, ball_history, frame_buffer)
+                # 客户端随帧发送 recording=true 表示正在录像
+                lane = 'recording' if frame_data.get('recording') or time.time() < near_goal_until else 'idle'
+                result = await scheduler.submit(session_id, trace.wrap(current_detector.process_frame),
+                                                context, ball_history, frame_buffer,
+                                                tracker=tracker,
+                                                background_model=background_model,
+                                                goal_cache=goal_cache,
+                                                trajectory=trajectory,
+                                                timestamp=capture_time,
+                                                goal_regions=manual_goals,
+                                                lane=lane)
+                if result['goal_entry'] or result['goal_crossing'] or (event_stream is not None and event_stream.in_goal):
+                    near_goal_until = time.time() + NEAR_GOAL_HOLD
                 
-                processing_time = (time.time() - start_time) * 1000
+                # 只统计检测器实际执行的时间，不含调度排队（排队时间见 latency.queue_ms）
+                processing_time = (trace.marks['inference_end'] - trace.marks['inference_start']) * 1000
+                metrics.observe('inference_ms', processing_time)
+                # 级联各阶段的尝试与命中次数
+                metrics.incr('cascade.frames')
+                for stage in result['cascade']['attempted']:
+                    metrics.incr(f'cascade.{stage}.attempts')
+                metrics.incr(f"cascade.{result['cascade']['stage']}.hits")
                 ball_count = len(result['detections']['soccer_balls'])
                 
                 print(f"✅ 帧{frame_count}: 检测到{ball_count}个足球, 耗时{processing_time:.1f}ms")
@@ -214,6 +389,21 @@ async def websocket_endpoint(websocket: WebSocket):
                 ball_history = result['ball_history']
                 frame_buffer = result['frame_buffer']
                 
+                # 事件模式：只在状态变化或心跳到期时发送
+                if event_stream is not None:
+                    message = event_stream.update(result, list(result['detections']['goal_areas']) + manual_goals)
+                    if message is None:
+                        metrics.incr('events.silent_frames')
+                        continue
+                    if message['type'] == 'events':
+                        metrics.incr('events.sent', len(message['events']))
+                    else:
+                        metrics.incr('events.heartbeats')
+                    await websocket.send_text(trace.attach(json.dumps(message, cls=NumpyEncoder,
+                                                                      separators=(',', ':'))))
+                    trace.record(metrics)
+                    continue
+                
                 # 禁用精彩片段保存 - 用户不需要自动片段
                 # if result['clip_info']:
                 #     saved_clips.append(result['clip_info'])
@@ -223,41 +413,67 @@ async def websocket_endpoint(websocket: WebSocket):
                 #         saved_clips.pop(0)
                 
                 # 准备响应数据 - 优化版本，减少数据量
-                # 只传输必要的检测信息，移除冗余数据
-                soccer_balls_optimized = []
-                for ball in result['detections']['soccer_balls']:
-                    soccer_balls_optimized.append({
-                        'bbox': [round(x, 1) for x in ball['bbox']],  # 减少小数位数
-                        'confidence': round(ball['confidence'], 2),
-                        'center': [round(x, 1) for x in ball['center']],
-                        'class_name': ball.get('class_name', 'ball'),
-                        'detection_method': ball.get('detection_method', 'unknown')
-                    })
+                # 只传输必要的检测信息，移除冗余数据（坐标保留1位小数）
+                soccer_balls_optimized = [ball.to_json() for ball in result['detections']['soccer_balls']]
                 
-                # 禁用自动球门检测 - 只允许手动标注球门
-                goal_areas_optimized = []  # 不再处理自动检测的球门
-                # for goal in result['detections']['goal_areas']:
-                #     goal_data = {
-                #         'bbox': [round(x, 1) for x in goal['bbox']],
-                #         'confidence': round(goal['confidence'], 2),
-                #         'center': [round(x, 1) for x in goal['center']],
-                #         'detection_method': goal.get('detection_method', 'unknown')
-                #     }
-                #     # 只在有corners时才包含，且限制数量
-                #     if goal.get('corners') and len(goal['corners']) <= 8:
-                #         goal_data['corners'] = [[round(p[0], 1), round(p[1], 1)] 
-                #                                for p in goal['corners'][:8]]
-                #     goal_areas_optimized.append(goal_data)
+                # 自动球门检测默认关闭 - 只允许手动标注球门；启用时返回会话锁定的球门
+                goal_areas_optimized = []
+                for goal in result['detections']['goal_areas']:
+                    goal_data = {
+                        'bbox': [round(x, 1) for x in goal['bbox']],
+                        'confidence': round(goal['confidence'], 2),
+                        'center': [round(x, 1) for x in goal['center']],
+                        'detection_method': goal.get('detection_method', 'unknown'),
+                        'locked': goal.get('locked', False)
+                    }
+                    # 只在有corners时才包含，且限制数量
+                    if goal.get('corners') and len(goal['corners']) <= 8:
+                        goal_data['corners'] = [[round(p[0], 1), round(p[1], 1)]
+                                               for p in goal['corners'][:8]]
+                    goal_areas_optimized.append(goal_data)
                 
                 # 简化轨迹数据
                 trajectory_optimized = None
-                if result['trajectory'] and result['trajectory'].get('positions'):
-                    positions = result['trajectory']['positions']
+                if result['trajectory']:
                     # 只保留最近的5个位置点
-                    recent_positions = positions[-5:] if len(positions) > 5 else positions
+                    recent_positions = trajectory.positions(recent=5)
                     trajectory_optimized = {
                         'positions': [[round(p[0], 1), round(p[1], 1)] for p in recent_positions],
-                        'speed': round(result['trajectory'].get('speed', 0), 2)
+                        'speed': round(result['trajectory']['speed'], 2)
+                    }
+                
+                # 跟踪状态：预测位置及其协方差
+                tracking_optimized = None
+                if result['tracking']:
+                    tracking_optimized = {
+                        'position': [round(v, 1) for v in result['tracking']['position']],
+                        'covariance': [[round(v, 1) for v in row] for row in result['tracking']['covariance']]
+                    }
+                
+                # 进门时间预测：球到达前通知客户端提前开始录像/提高采样频率
+                goal_entry_optimized = None
+                if result['goal_entry']:
+                    metrics.incr('goal_entry.predictions')
+                    goal_entry = result['goal_entry']
+                    goal_entry_optimized = {
+                        'event': goal_entry['event'],
+                        'goal_index': goal_entry['goal_index'],
+                        'time_to_entry_ms': goal_entry['time_to_entry_ms'],
+                        'entry_point': [round(v, 1) for v in goal_entry['entry_point']],
+                        'confidence': round(goal_entry['confidence'], 2)
+                    }
+                
+                # 扫掠路径进门：两次采样之间球进入了球门（插值得到的时间和位置）
+                goal_crossing_optimized = None
+                if result['goal_crossing']:
+                    metrics.incr('goal_crossing.events')
+                    goal_crossing = result['goal_crossing']
+                    goal_crossing_optimized = {
+                        'event': goal_crossing['event'],
+                        'goal_index': goal_crossing['goal_index'],
+                        'crossing_time': round(goal_crossing['crossing_time'], 3),
+                        'crossing_point': [round(v, 1) for v in goal_crossing['crossing_point']],
+                        'inside_at_end': goal_crossing['inside_at_end']
                     }
                 
                 # 简化碰撞信息 - 禁用状态
@@ -274,14 +490,19 @@ async def websocket_endpoint(websocket: WebSocket):
                     "success": True,
                     "detections": {
                         "soccer_balls": soccer_balls_optimized,
-                        "goal_areas": []  # 不再返回自动检测的球门
+                        "goal_areas": goal_areas_optimized  # 未启用自动球门检测时为空
                     },
                     "collision_info": collision_optimized,
                     "is_goal_moment": False,  # 已禁用
                     "trajectory": trajectory_optimized,
+                    "tracking": tracking_optimized,
+                    "goal_entry": goal_entry_optimized,
+                    "goal_crossing": goal_crossing_optimized,
                     "clip_info": None,  # 已禁用
+                    "stale": False,
                     "timestamp": round(result['timestamp'], 2)
                 }
+                last_response = response_data
                 
                 # 发送检测结果
                 response_json = json.dumps(response_data, cls=NumpyEncoder, separators=(',', ':'))
@@ -299,12 +520,16 @@ async def websocket_endpoint(websocket: WebSocket):
                         },
                         "collision_info": {"has_collision": False},
                         "is_goal_moment": False,
+                        "goal_entry": goal_entry_optimized,
+                        "goal_crossing": goal_crossing_optimized,
                         "timestamp": round(result['timestamp'], 2)
                     }
                     response_json = json.dumps(minimal_response, separators=(',', ':'))
                     print(f"📤 优化后响应大小: {len(response_json)} 字符")
                 
-                await websocket.send_text(response_json)
+                # 序列化完成后附加本帧的延迟追踪，并记录各阶段耗时
+                await websocket.send_text(trace.attach(response_json))
+                trace.record(metrics)
             else:
                 error_response = json.dumps({
                     "success": False,
@@ -317,6 +542,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 await websocket.send_text(error_response)
                 
     except WebSocketDisconnect:
+        scheduler.close_session(session_id)
         manager.disconnect(websocket)
     except Exception as e:
         print(f"❌ WebSocket处理错误: {e}")
@@ -334,6 +560,7 @@ async def websocket_endpoint(websocket: WebSocket):
         except:
             pass  # 如果连接已断开，忽略发送错误
         
+        scheduler.close_session(session_id)
         manager.disconnect(websocket)
 
 
@@ -349,6 +576,52 @@ async def get_saved_clips():
         "clips": saved_clips
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    运行指标：计数器、耗时分位数，以及运动门控的命中率和节省的推理时间
+    """
+    snapshot = metrics.snapshot()
+    gate_frames = snapshot['counters'].get('motion_gate.frames', 0)
+    gate_skipped = snapshot['counters'].get('motion_gate.skipped', 0)
+    snapshot['motion_gate'] = {
+        'frames': gate_frames,
+        'skipped': gate_skipped,
+        'hit_rate': round(gate_skipped / gate_frames, 4) if gate_frames else 0.0,
+        # 以平均推理耗时估算被跳过的帧节省的CPU时间
+        'estimated_saved_ms': round(gate_skipped * metrics.mean('inference_ms'), 1)
+    }
+    
+    # 级联检测：每个廉价阶段的命中率，以及最终需要YOLO的帧占比
+    counters = snapshot['counters']
+    cascade_frames = counters.get('cascade.frames', 0)
+    stages = {}
+    for stage in CASCADE_STAGES:
+        attempts = counters.get(f'cascade.{stage}.attempts', 0)
+        hits = counters.get(f'cascade.{stage}.hits', 0)
+        stages[stage] = {
+            'attempts': attempts,
+            'hits': hits,
+            'hit_rate': round(hits / attempts, 4) if attempts else 0.0
+        }
+    yolo_frames = counters.get('cascade.yolo.hits', 0)
+    snapshot['cascade'] = {
+        'frames': cascade_frames,
+        'stages': stages,
+        'yolo_frames': yolo_frames,
+        'yolo_share': round(yolo_frames / cascade_frames, 4) if cascade_frames else 0.0
+    }
+    
+    # 逐帧延迟分解：各阶段的平均耗时（分位数见 timings 中的 latency.*）
+    snapshot['latency'] = {
+        stage: round(metrics.mean(f'latency.{stage}_ms'), 2)
+        for stage in ('network', 'decode', 'queue', 'inference', 'serialize', 'server', 'total')
+    }
+    
+    # 推理调度：各优先级通道的排队深度、最久等待和累计计数（等待/推理耗时分位数见 timings 中的 scheduler.*）
+    snapshot['scheduler'] = scheduler.snapshot()
+    return snapshot
+
 @app.get("/health")
 async def health_check():
     """
@@ -357,12 +630,54 @@ async def health_check():
     return {
         "status": "healthy",
         "detector_loaded": detector is not None,
+        "inference_backend": INFERENCE_BACKEND,
+        "cascade_stages": CASCADE_STAGES,
+        "goal_detection": GOAL_DETECTION,
         "active_connections": len(manager.active_connections),
         "frame_buffer_size": len(frame_buffer),
         "saved_clips_count": len(saved_clips)
     }
 
 
+
+@app.post("/admin/profile")
+async def profile_server(seconds: float = 10.0, frames: int = 0, interval_ms: float = 5.0,
+                         include_idle: bool = False, x_admin_token: str = Header(default='')):
+    """
+    对运行中的服务做一段时间的调用栈采样（事件循环、推理工作线程等所有线程）
+    
+    Args:
+        seconds: 最长分析时间（秒，上限60）
+        frames: 大于0时处理完这么多 WebSocket 帧后提前结束
+        interval_ms: 采样间隔（毫秒）
+        include_idle: 是否计入阻塞等待中的调用栈
+        
+    Returns:
+        折叠栈文本（flamegraph.pl / speedscope 格式），响应头中包含采样次数和实际时长
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="管理令牌无效")
+    
+    stop = None
+    if frames > 0:
+        start_frames = metrics.counters.get('motion_gate.frames', 0)
+        stop = lambda: metrics.counters.get('motion_gate.frames', 0) - start_frames >= frames
+    
+    # 在线程池中采样，事件循环照常处理请求（也会被采样到）
+    try:
+        result = await asyncio.to_thread(profiler.profile, seconds, interval_ms / 1000, stop, include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    metrics.incr('profiler.runs')
+    print(f"🔬 采样分析完成: {result['samples']} 次采样, {result['duration']:.1f}s")
+    return PlainTextResponse(collapse(result['stacks']), headers={
+        'X-Profile-Samples': str(result['samples']),
+        'X-Profile-Duration': f"{result['duration']:.3f}"
+    })
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
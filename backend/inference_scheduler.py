@@ -0,0 +1,232 @@
+"""
+推理调度器 - 多个会话共享一个检测器时的加权公平排队
+所有推理在专用工作线程中串行执行（检测器不是线程安全的），事件循环只负责排队和分发。
+请求按优先级通道排队：录制中/球在球门附近的会话 > 普通会话 > /detect 等尽力而为的请求；
+同一通道内按会话权重做加权公平排队，每个实时会话另有最低服务速率保证，不会被高优先级通道饿死。
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+
+# 优先级从高到低
+LANES = ('recording', 'idle', 'best_effort')
+# 享有最低速率保证的通道（尽力而为的请求不保证）
+GUARANTEED_LANES = ('recording', 'idle')
+
+
+class _Session:
+    """会话的调度状态"""
+
+    __slots__ = ('weight', 'finish', 'cost', 'served')
+
+    def __init__(self, weight: float, initial_cost: float):
+        self.weight = weight
+        self.finish = {lane: 0.0 for lane in LANES}   # 各通道内上一个请求的虚拟完成时间
+        self.cost = initial_cost                       # 单次推理耗时（秒）的滑动平均
+        self.served = 0
+
+
+class _Job:
+    __slots__ = ('session_id', 'session', 'lane', 'call', 'future', 'start_tag', 'enqueued', 'seq')
+
+    def __init__(self, session_id: str, session: _Session, lane: str, call: Callable,
+                 future: asyncio.Future, start_tag: float, enqueued: float, seq: int):
+        self.session_id = session_id
+        self.session = session
+        self.lane = lane
+        self.call = call
+        self.future = future
+        self.start_tag = start_tag
+        self.enqueued = enqueued
+        self.seq = seq
+
+
+class InferenceScheduler:
+    """
+    加权公平推理调度器（进程内一个实例）
+
+    同一通道内使用起始时间公平排队：每个请求的虚拟起始时间为
+    max(通道虚拟时间, 该会话上一个请求的虚拟完成时间)，完成时间再加上 预计耗时/权重，
+    起始时间最小的请求先执行。预计耗时取该会话最近推理耗时的滑动平均，
+    分辨率高、推理慢的会话不会因为帧数相同而占用更多检测器时间。
+    """
+
+    def __init__(self, min_rate: float = 2.0, workers: int = 1, metrics=None,
+                 cost_smoothing: float = 0.2, initial_cost: float = 0.05):
+        """
+        Args:
+            min_rate: 每个实时会话的最低服务速率（帧/秒）；实时请求排队超过 1/min_rate 秒
+                      时，不论通道优先级立即执行
+            workers: 推理工作线程数（单个检测器实例时为1）
+            metrics: 指标对象（Metrics），记录各通道的排队等待、推理耗时和最低速率提升次数
+            cost_smoothing: 会话推理耗时滑动平均的更新速率
+            initial_cost: 新会话的预计推理耗时（秒）
+        """
+        self.min_rate = min_rate
+        self.workers = workers
+        self.metrics = metrics
+        self.cost_smoothing = cost_smoothing
+        self.initial_cost = initial_cost
+
+        self._executor = None
+        self._queues = {lane: [] for lane in LANES}
+        self._virtual_time = {lane: 0.0 for lane in LANES}
+        self._sessions: Dict[str, _Session] = {}
+        self._seq = itertools.count()
+        self._running = 0
+        self.stats = {lane: {'submitted': 0, 'completed': 0, 'cancelled': 0} for lane in LANES}
+        self.stats['min_rate_promotions'] = 0
+
+    async def submit(self, session_id: str, fn: Callable, *args, lane: str = 'idle',
+                     weight: float = 1.0, **kwargs):
+        """
+        排队执行一次推理并等待结果
+
+        Args:
+            session_id: 会话标识（每个 WebSocket 连接一个；/detect 共用一个）
+            fn: 在工作线程中执行的函数
+            lane: 优先级通道（'recording' / 'idle' / 'best_effort'）
+            weight: 会话在通道内的权重，权重越大分到的检测器时间越多
+
+        Returns:
+            fn 的返回值（fn 抛出的异常原样抛出）
+        """
+        if lane not in self._queues:
+            raise ValueError(f'未知的调度通道: {lane}')
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='inference')
+
+        now = time.monotonic()
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session(weight, self.initial_cost)
+        session.weight = weight
+
+        start_tag = max(self._virtual_time[lane], session.finish[lane])
+        session.finish[lane] = start_tag + session.cost / max(weight, 1e-6)
+        job = _Job(session_id, session, lane, partial(fn, *args, **kwargs), loop.create_future(),
+                   start_tag, now, next(self._seq))
+        heapq.heappush(self._queues[lane], (start_tag, job.seq, job))
+        self.stats[lane]['submitted'] += 1
+
+        self._pump(loop)
+        return await job.future
+
+    def close_session(self, session_id: str):
+        """会话结束时丢弃其调度状态（仍在排队的请求随等待方取消而跳过）"""
+        self._sessions.pop(session_id, None)
+
+    def _pump(self, loop: asyncio.AbstractEventLoop):
+        """有空闲工作线程时取出下一个请求执行"""
+        while self._running < self.workers:
+            job = self._next_job(time.monotonic())
+            if job is None:
+                return
+            self._running += 1
+            self._virtual_time[job.lane] = max(self._virtual_time[job.lane], job.start_tag)
+            started = time.monotonic()
+            if self.metrics is not None:
+                self.metrics.observe(f'scheduler.{job.lane}.wait_ms', (started - job.enqueued) * 1000)
+            future = loop.run_in_executor(self._executor, job.call)
+            future.add_done_callback(partial(self._finished, loop, job, started))
+
+    def _next_job(self, now: float) -> Optional[_Job]:
+        """
+        选择下一个请求：优先级最高的非空通道中虚拟起始时间最小的请求；
+        但低优先级实时通道中有请求排队超过 1/min_rate 秒时，先服务等待最久的那个请求
+        """
+        chosen = None
+        for lane in LANES:
+            queue = self._queues[lane]
+            # 等待方已取消（连接断开）的请求直接丢弃
+            while queue and queue[0][2].future.done():
+                heapq.heappop(queue)
+                self.stats[lane]['cancelled'] += 1
+            if queue:
+                chosen = queue[0][2]
+                break
+        if chosen is None:
+            return None
+
+        overdue = self._most_overdue(now, chosen.lane)
+        if overdue is not None:
+            chosen = overdue
+            self.stats['min_rate_promotions'] += 1
+            if self.metrics is not None:
+                self.metrics.incr('scheduler.min_rate_promotions')
+
+        queue = self._queues[chosen.lane]
+        if queue[0][2] is chosen:
+            heapq.heappop(queue)
+        else:
+            queue.remove((chosen.start_tag, chosen.seq, chosen))
+            heapq.heapify(queue)
+        return chosen
+
+    def _most_overdue(self, now: float, serving_lane: str) -> Optional[_Job]:
+        """
+        优先级低于 serving_lane 的实时通道中，排队已超过 1/min_rate 秒的请求里等待最久的一个
+
+        按请求自身的排队时间判断，而不是距会话上次服务的时间：发送频率本来就低于最低速率的会话
+        （例如1fps的普通会话）刚提交时不算超时，不会插到录制通道的积压前面。
+        同一通道内的积压由加权公平排队处理，不参与提升。
+        """
+        if self.min_rate <= 0:
+            return None
+        max_wait = 1.0 / self.min_rate
+        overdue = None
+        lower_lanes = LANES[LANES.index(serving_lane) + 1:]
+        for lane in GUARANTEED_LANES:
+            if lane not in lower_lanes:
+                continue
+            for _, _, job in self._queues[lane]:
+                if job.future.done() or now - job.enqueued <= max_wait:
+                    continue
+                if overdue is None or job.enqueued < overdue.enqueued:
+                    overdue = job
+        return overdue
+
+    def _finished(self, loop: asyncio.AbstractEventLoop, job: _Job, started: float, future: asyncio.Future):
+        """工作线程完成一个请求（在事件循环线程中回调）"""
+        self._running -= 1
+        elapsed = time.monotonic() - started
+        session = job.session
+        session.served += 1
+        session.cost += self.cost_smoothing * (elapsed - session.cost)
+        self.stats[job.lane]['completed'] += 1
+        if self.metrics is not None:
+            self.metrics.observe(f'scheduler.{job.lane}.run_ms', elapsed * 1000)
+
+        if not job.future.done():
+            if future.cancelled():
+                job.future.cancel()
+            elif future.exception() is not None:
+                job.future.set_exception(future.exception())
+            else:
+                job.future.set_result(future.result())
+        self._pump(loop)
+
+    def snapshot(self) -> Dict:
+        """
+        各通道的排队深度、最久等待时间和累计计数，以及会话数
+        """
+        now = time.monotonic()
+        lanes = {}
+        for lane in LANES:
+            pending = [job for _, _, job in self._queues[lane] if not job.future.done()]
+            lanes[lane] = dict(self.stats[lane],
+                               queued=len(pending),
+                               oldest_wait_ms=round(max((now - job.enqueued for job in pending), default=0.0) * 1000, 1))
+        return {
+            'lanes': lanes,
+            'running': self._running,
+            'sessions': len(self._sessions),
+            'min_rate': self.min_rate,
+            'min_rate_promotions': self.stats['min_rate_promotions']
+        }
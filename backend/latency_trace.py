@@ -0,0 +1,99 @@
+"""
+逐帧延迟追踪 - 从客户端采集到结果序列化完成的各阶段时间点
+客户端随帧发送采集时间（Date.now()），服务端依次记录 接收、解码完成、推理开始、推理结束、序列化完成，
+以紧凑形式附在响应中回传，并把各阶段耗时写入指标。
+客户端用自己收到响应的时间减去采集时间，即为同一时钟下的真实端到端延迟（不受两端时钟偏差影响）。
+"""
+
+import json
+import time
+from typing import Callable, Dict, Optional
+
+# 服务端阶段，按发生顺序
+STAGES = ('decode', 'inference_start', 'inference_end', 'serialize')
+
+
+class FrameTrace:
+    """
+    单帧的延迟追踪
+
+    响应中的格式：{"c": 采集时间, "r": 服务端接收时间, "o": [解码, 推理开始, 推理结束, 序列化]}
+    c、r 为毫秒时间戳；o 为相对接收时间的毫秒偏移（保留1位小数），没有经过的阶段（例如运动门控跳过推理）为null
+    """
+
+    __slots__ = ('capture', 'receive', 'marks')
+
+    def __init__(self, capture_ms: Optional[float] = None, receive: Optional[float] = None):
+        """
+        Args:
+            capture_ms: 客户端采集时间（毫秒时间戳），客户端未提供时为None
+            receive: 服务端收到该帧的时间（秒），None 表示当前时间
+        """
+        self.capture = capture_ms / 1000 if isinstance(capture_ms, (int, float)) else None
+        self.receive = time.time() if receive is None else receive
+        self.marks = {}
+
+    def mark(self, stage: str):
+        """记录某个阶段完成的时间"""
+        self.marks[stage] = time.time()
+
+    def wrap(self, fn: Callable) -> Callable:
+        """包装推理函数：在实际执行的线程中记录推理开始和结束（排队时间不计入推理）"""
+        def traced(*args, **kwargs):
+            self.mark('inference_start')
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.mark('inference_end')
+        return traced
+
+    def to_json(self) -> Dict:
+        """响应中回传的紧凑格式"""
+        offsets = [round((self.marks[stage] - self.receive) * 1000, 1) if stage in self.marks else None
+                   for stage in STAGES]
+        return {
+            'c': round(self.capture * 1000) if self.capture is not None else None,
+            'r': round(self.receive * 1000),
+            'o': offsets
+        }
+
+    def attach(self, response_json: str) -> str:
+        """
+        把追踪信息附加到已经序列化的 JSON 对象末尾
+
+        序列化完成时间只能在序列化之后得到，因此不重新序列化整个响应，只拼接 trace 字段
+        """
+        self.mark('serialize')
+        trace_json = json.dumps(self.to_json(), separators=(',', ':'))
+        return f'{response_json[:-1]},"trace":{trace_json}}}'
+
+    def durations(self) -> Dict[str, float]:
+        """
+        各阶段耗时（毫秒）
+
+        network 为客户端采集到服务端接收（包含两端时钟偏差），decode 为接收到解码完成（包括解析消息），
+        queue 为解码完成到推理开始的排队时间，
+        server 为服务端接收到序列化完成，total 为采集到序列化完成
+        """
+        marks = self.marks
+        spans = {}
+        if 'decode' in marks:
+            spans['decode'] = marks['decode'] - self.receive
+        if 'inference_start' in marks and 'decode' in marks:
+            spans['queue'] = marks['inference_start'] - marks['decode']
+        if 'inference_end' in marks and 'inference_start' in marks:
+            spans['inference'] = marks['inference_end'] - marks['inference_start']
+        if 'serialize' in marks:
+            last = marks.get('inference_end', marks.get('decode', self.receive))
+            spans['serialize'] = marks['serialize'] - last
+            spans['server'] = marks['serialize'] - self.receive
+            if self.capture is not None:
+                spans['total'] = marks['serialize'] - self.capture
+        if self.capture is not None:
+            spans['network'] = self.receive - self.capture
+        return {name: value * 1000 for name, value in spans.items()}
+
+    def record(self, metrics, prefix: str = 'latency'):
+        """把各阶段耗时写入指标（latency.decode_ms、latency.queue_ms 等）"""
+        for name, value in self.durations().items():
+            metrics.observe(f'{prefix}.{name}_ms', value)
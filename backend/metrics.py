@@ -0,0 +1,63 @@
+"""
+服务运行指标 - 计数器与耗时统计，通过 /metrics 端点查看
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Dict
+
+
+class Metrics:
+    """
+    进程内指标
+
+    计数器只增不减；耗时保留累计值和最近一段窗口，用于计算均值和分位数。
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self._timings = {}
+
+    def incr(self, name: str, value: float = 1):
+        """计数器累加"""
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name: str, value_ms: float):
+        """记录一次耗时（毫秒）"""
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = {
+                    'count': 0, 'total': 0.0, 'max': 0.0, 'recent': deque(maxlen=self.window)
+                }
+            timing['count'] += 1
+            timing['total'] += value_ms
+            timing['max'] = max(timing['max'], value_ms)
+            timing['recent'].append(value_ms)
+
+    def mean(self, name: str) -> float:
+        """某项耗时的累计均值，没有记录时为0"""
+        with self._lock:
+            timing = self._timings.get(name)
+            return timing['total'] / timing['count'] if timing and timing['count'] else 0.0
+
+    def snapshot(self) -> Dict:
+        """导出所有指标"""
+        with self._lock:
+            timings = {}
+            for name, timing in self._timings.items():
+                recent = sorted(timing['recent'])
+                timings[name] = {
+                    'count': timing['count'],
+                    'mean_ms': round(timing['total'] / timing['count'], 2),
+                    'p50_ms': round(recent[len(recent) // 2], 2),
+                    'p95_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 2),
+                    'max_ms': round(timing['max'], 2)
+                }
+            return {'counters': dict(self.counters), 'timings': timings}
+
+
+metrics = Metrics()
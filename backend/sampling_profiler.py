@@ -0,0 +1,100 @@
+"""
+采样分析器 - 不重启服务即可对运行中的进程做一段时间的调用栈采样
+采样线程只在分析期间存在：定时读取 sys._current_frames() 中所有线程（事件循环、推理工作线程等）
+的调用栈并计数，结束后输出 flamegraph.pl / speedscope 可直接读取的折叠栈格式。
+不分析时没有任何钩子（不使用 sys.setprofile / settrace），正常运行没有额外开销。
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+# 阻塞等待中的叶子函数：默认不计入（只关心线程实际在做什么）
+IDLE_FUNCTIONS = frozenset({'select', 'poll', 'wait', 'wait_for', '_wait_for_tstate_lock', 'sleep', 'accept'})
+
+
+class ProfilerBusy(RuntimeError):
+    """已有一次分析正在进行"""
+
+
+class SamplingProfiler:
+    """
+    进程内调用栈采样分析器（同一时间只允许一次分析）
+    """
+
+    def __init__(self, max_duration: float = 60.0, min_interval: float = 0.001):
+        """
+        Args:
+            max_duration: 单次分析的最长时间（秒），超过的请求被截断
+            min_interval: 最小采样间隔（秒）
+        """
+        self.max_duration = max_duration
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, duration: float, interval: float = 0.005,
+                stop: Optional[Callable[[], bool]] = None, include_idle: bool = False) -> Dict:
+        """
+        在调用线程中采样，直到时间用完或 stop() 返回 True
+
+        Args:
+            duration: 分析时长（秒）
+            interval: 采样间隔（秒）
+            stop: 提前结束条件（例如已经处理了指定帧数）
+            include_idle: 是否计入阻塞等待中的调用栈
+
+        Returns:
+            {'samples': 采样次数, 'duration': 实际时长（秒）, 'stacks': Counter(折叠栈 -> 次数)}
+
+        Raises:
+            ProfilerBusy: 已有一次分析正在进行
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy('已有一次分析正在进行')
+        try:
+            return self._sample(min(duration, self.max_duration), max(interval, self.min_interval),
+                                stop, include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, duration: float, interval: float, stop: Optional[Callable[[], bool]],
+                include_idle: bool) -> Dict:
+        own = threading.get_ident()
+        labels = {}          # code 对象 -> 栈帧名称，同一函数只格式化一次
+        stacks = Counter()
+        samples = 0
+        start = time.monotonic()
+        deadline = start + duration
+        while time.monotonic() < deadline and not (stop is not None and stop()):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if not include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = (f'{code.co_name} '
+                                                f'({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    parts.append(label)
+                    frame = frame.f_back
+                parts.append(names.get(ident, f'thread-{ident}'))
+                stacks[';'.join(reversed(parts))] += 1
+            samples += 1
+            time.sleep(interval)
+        return {'samples': samples, 'duration': time.monotonic() - start, 'stacks': stacks}
+
+
+def collapse(stacks: Counter) -> str:
+    """折叠栈文本：每行 '线程;外层函数;...;内层函数 次数'，按次数从多到少"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
@@ -65,6 +65,16 @@ const getBoundingRect = (polygon: Point[]): { x1: number, y1: number, x2: number
   };
 };
 
+// 底部导航栏高度；相机预览占满导航栏以上的区域，帧像素按宽、高分别缩放到该区域
+const TAB_BAR_HEIGHT = 83;
+
+// 屏幕上标注的球门角点 -> 相机帧像素坐标（检测框 帧像素 -> 屏幕 缩放的逆变换），随帧发送给后端
+const goalAreaToFramePixels = (polygon: Point[], frameW: number, frameH: number): number[][] => {
+  const scaleX = frameW / screenWidth;
+  const scaleY = frameH / (screenHeight - TAB_BAR_HEIGHT);
+  return polygon.map(p => [Math.round(p.x * scaleX), Math.round(p.y * scaleY)]);
+};
+
 
 
 // 根据运行环境自动判断API地址
@@ -145,6 +155,11 @@ export default function RecordScreen() {
   // === 新增：用 ref 记录上一帧是否重叠，避免闭包读到旧值 ===
   const overlapRef = useRef(false);
   const lastGoalAlertRef = useRef(0); // 进球 Alert 冷却时间戳
+  // 录制状态随帧发送给后端，录制中的会话优先推理；用 ref 避免定时器闭包读到旧值
+  const isRecordingRef = useRef(false);
+  useEffect(() => {
+    isRecordingRef.current = isRecording;
+  }, [isRecording]);
 
 
   // === 新增：本地点亮 GOAL 横幅 1.5s（不再只依赖后端字段）===
@@ -295,6 +310,11 @@ export default function RecordScreen() {
   const [isAnnotatingGoal, setIsAnnotatingGoal] = useState(false);
   const [goalCorners, setGoalCorners] = useState<Point[]>([]);
   const [manualGoalArea, setManualGoalArea] = useState<Point[] | null>(null);
+  // 标注的球门随帧发送给后端（进门预测、扫掠进门检测、运动门控的球门区域）；同样用 ref 避免定时器闭包读到旧值
+  const manualGoalAreaRef = useRef<Point[] | null>(null);
+  useEffect(() => {
+    manualGoalAreaRef.current = manualGoalArea;
+  }, [manualGoalArea]);
   
 
 
@@ -760,9 +780,15 @@ export default function RecordScreen() {
         }
 
         if (picture && picture.base64) {
+          // 没有标注或已清除时发送 null，后端随之丢弃上一次的球门
+          const goalArea = manualGoalAreaRef.current;
           const frameData = {
             image: `data:image/jpeg;base64,${picture.base64}`,
-            timestamp: Date.now()
+            timestamp: Date.now(),
+            recording: isRecordingRef.current,
+            goal_area: goalArea && goalArea.length === 4 && picture.width && picture.height
+              ? goalAreaToFramePixels(goalArea, picture.width, picture.height)
+              : null
           };
           
           // 异步发送，不阻塞UI
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+角点组矩形的规模基准 - 合成角点，不需要YOLO模型
+
+对比原来的4点组合枚举（只在角点较少时运行）与分桶配对算法在不同角点数下的耗时，
+并确认植入的球门矩形能被找回（检测时 goodFeaturesToTrack 最多取100个角点）。
+"""
+import sys
+sys.path.append('ai_model')
+
+from soccer_detector import SoccerDetector
+from itertools import combinations
+from math import comb
+import time
+import numpy as np
+
+FRAME_SHAPE = (720, 1280, 3)
+GOAL = [(400, 250), (880, 250), (880, 450), (400, 450)]
+
+
+def make_corners(count, seed=0):
+    """球门四个角 + 随机噪声角点，格式与 goodFeaturesToTrack 一致 (n, 1, 2)"""
+    rng = np.random.default_rng(seed)
+    noise = rng.uniform((0, 0), (FRAME_SHAPE[1], FRAME_SHAPE[0]), size=(count - len(GOAL), 2))
+    goal = np.array(GOAL) + rng.integers(-3, 4, size=(len(GOAL), 2))
+    return np.concatenate([goal, noise]).astype(int).reshape(-1, 1, 2)
+
+
+def legacy_candidates(corners, frame_shape):
+    """原实现：枚举全部4点组合，只按外接框尺寸判断"""
+    count = 0
+    for pts in combinations(corners.reshape(-1, 2).tolist(), 4):
+        xs = [p[0] for p in pts]
+        ys = [p[1] for p in pts]
+        width, height = max(xs) - min(xs), max(ys) - min(ys)
+        if 50 < width < frame_shape[1] * 0.8 and 30 < height < frame_shape[0] * 0.8:
+            count += 1
+    return count
+
+
+def found_goal(rectangles):
+    return any(abs(r['bbox'][0] - 400) <= 5 and abs(r['bbox'][1] - 250) <= 5 and
+               abs(r['bbox'][2] - 880) <= 5 and abs(r['bbox'][3] - 450) <= 5 for r in rectangles)
+
+
+def time_call(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def run_benchmark(sizes=(25, 50, 100, 200, 400, 800), legacy_limit=40):
+    detector = SoccerDetector.__new__(SoccerDetector)
+    detector.corner_align_tolerance = 8
+    detector.max_corner_rectangles = 50
+
+    print(f"{'角点数':>6} {'4点组合数':>14} {'原实现ms':>10} {'分桶ms':>8} {'候选数':>6} {'找回球门':>8}")
+    rows = []
+    for size in sizes:
+        corners = make_corners(size)
+        elapsed, rectangles = time_call(
+            lambda: detector._find_rectangles_from_corners(corners, FRAME_SHAPE), repeat=20)
+        legacy_ms = None
+        if size <= legacy_limit:
+            legacy_ms, _ = time_call(lambda: legacy_candidates(corners, FRAME_SHAPE), repeat=1)
+        legacy_text = f"{legacy_ms:.1f}" if legacy_ms is not None else '-'
+        print(f"{size:>6} {comb(size, 4):>14,} {legacy_text:>10} {elapsed:>8.2f} "
+              f"{len(rectangles):>6} {'✅' if found_goal(rectangles) else '❌':>7}")
+        rows.append({'corners': size, 'ms': elapsed, 'legacy_ms': legacy_ms,
+                     'rectangles': len(rectangles), 'found_goal': found_goal(rectangles)})
+    return rows
+
+
+if __name__ == "__main__":
+    print("📐 角点组矩形规模基准")
+    rows = run_benchmark()
+    # 随机角点过密时，偶然对齐的四边形会多于候选上限，只检查实际会出现的规模
+    assert all(row['found_goal'] for row in rows if row['corners'] <= 400), "植入的球门矩形应能被找回"
+    print("✅ 基准完成")
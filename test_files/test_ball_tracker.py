@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+测试卡尔曼足球跟踪器 - 合成画面，不需要YOLO模型
+"""
+import sys
+sys.path.append('ai_model')
+
+from ball_tracker import BallTracker
+import cv2
+import numpy as np
+
+
+def make_frame(center, radius=12):
+    """绿色草地 + 白色足球（带黑色花纹）"""
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[:, :] = (40, 120, 40)
+    cv2.circle(frame, (int(center[0]), int(center[1])), radius, (255, 255, 255), -1)
+    cv2.circle(frame, (int(center[0]), int(center[1])), radius // 3, (0, 0, 0), -1)
+    return frame
+
+
+def ball_at(center, radius=12, confidence=0.8):
+    x, y = center
+    return {
+        'bbox': [x - radius - 2, y - radius - 2, x + radius + 2, y + radius + 2],
+        'confidence': confidence,
+        'center': [x, y]
+    }
+
+
+def test_constant_velocity_tracking():
+    """匀速运动：局部搜索应能持续确认轨迹，只有周期性完整检测"""
+    print("🧪 测试匀速运动跟踪")
+    tracker = BallTracker(detect_interval=5)
+    velocity = np.array([150.0, -60.0])  # 像素/秒
+    start = np.array([100.0, 300.0])
+    dt = 1 / 30
+
+    full_detections = 0
+    max_error = 0.0
+    for i in range(60):
+        t = i * dt
+        center = start + velocity * t
+        frame = make_frame(center)
+        tracker.predict(t)
+        tracked = None
+        if not tracker.needs_detection():
+            tracked = tracker.local_search(frame, t)
+        if tracked is None:
+            full_detections += 1
+            tracker.observe_detection(frame, ball_at(center), t)
+        else:
+            max_error = max(max_error, float(np.linalg.norm(np.array(tracked['center']) - center)))
+
+    state = tracker.get_state()
+    print(f"   📊 完整检测 {full_detections}/60 帧, 局部确认最大误差 {max_error:.1f}px")
+    print(f"   📍 估计速度 {np.round(state['velocity'], 1)}, 位置标准差 {state['position_std']:.2f}px")
+    assert full_detections <= 15, "局部搜索应替代大部分完整检测"
+    assert max_error < 3.0
+    assert np.allclose(state['velocity'], velocity, atol=20.0)
+
+
+def test_uncertainty_forces_detection():
+    """长时间没有观测时不确定度增大，应立即回到完整检测"""
+    print("🧪 测试不确定度触发完整检测")
+    tracker = BallTracker(detect_interval=100)
+    frame = make_frame((320, 240))
+    tracker.observe_detection(frame, ball_at((320, 240)), 0.0)
+    tracker.predict(1 / 30)
+    assert not tracker.needs_detection()
+    tracker.predict(1.0)  # 一秒一帧时预测没有意义
+    print(f"   📍 1秒后位置标准差 {tracker.position_std():.1f}px")
+    assert tracker.needs_detection()
+
+
+def test_lost_ball_resets_track():
+    """连续多次完整检测都没有球时丢弃轨迹"""
+    print("🧪 测试丢球后重置轨迹")
+    tracker = BallTracker(max_missed=3)
+    frame = make_frame((320, 240))
+    tracker.observe_detection(frame, ball_at((320, 240)), 0.0)
+    for i in range(3):
+        tracker.observe_detection(frame, None, 0.1 * (i + 1))
+    assert tracker.get_state() is None
+
+
+def test_hold_on_gated_frames():
+    """运动门控跳过的帧：轨迹时钟推进、速度清零，之后不会按旧速度外推整段间隔"""
+    print("🧪 测试门控跳过帧")
+    tracker = BallTracker(detect_interval=5)
+    for i, t in enumerate([0.0, 0.1, 0.2]):
+        tracker.predict(t)
+        tracker.observe_detection(make_frame([100 + 30 * i, 200]), ball_at([100 + 30 * i, 200]), t)
+    position = tracker.predict(0.3).copy()
+    for t in (1.3, 2.3, 3.3):
+        tracker.hold(t)
+    assert tracker.frames_since_detection == 3 and tracker.last_time == 3.3
+    assert np.allclose(tracker.predict(4.3), position)
+
+
+if __name__ == "__main__":
+    test_constant_velocity_tracking()
+    test_uncertainty_forces_detection()
+    test_lost_ball_resets_track()
+    test_hold_on_gated_frames()
+    print("✅ 跟踪器测试全部通过")
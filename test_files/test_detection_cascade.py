@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+测试级联检测 - 合成画面，用记录调用次数的假后端代替YOLO
+"""
+import sys
+sys.path.append('ai_model')
+
+import soccer_detector
+from soccer_detector import SoccerDetector, InferenceBackend
+from ball_tracker import BallTracker
+from frame_context import FrameContext
+from motion_gate import BackgroundModel
+import cv2
+import numpy as np
+
+
+class ScriptedBackend(InferenceBackend):
+    """按预先给定的球心返回检测框，并统计被调用的次数"""
+
+    def __init__(self, model_path, imgsz):
+        self.center = None
+        self.radius = 16
+        self.calls = 0
+
+    def predict(self, frame, conf, iou, classes=None):
+        self.calls += 1
+        if self.center is None:
+            return np.zeros((0, 6), dtype=np.float32)
+        x, y = self.center
+        r = self.radius + 2
+        return np.array([[x - r, y - r, x + r, y + r, 0.8, 32]], dtype=np.float32)
+
+
+soccer_detector.INFERENCE_BACKENDS['scripted'] = ScriptedBackend
+
+
+def make_frame(center, radius=16, angle=0.0):
+    """绿色草地 + 白色足球，黑色花纹随球旋转"""
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[:, :] = (40, 120, 40)
+    cx, cy = int(center[0]), int(center[1])
+    cv2.circle(frame, (cx, cy), radius, (255, 255, 255), -1)
+    offset = (int(radius * 0.4 * np.cos(angle)), int(radius * 0.4 * np.sin(angle)))
+    cv2.circle(frame, (cx + offset[0], cy + offset[1]), radius // 4, (0, 0, 0), -1)
+    return frame
+
+
+def run_sequence(detector, frames=60):
+    """匀速运动的旋转足球，返回各阶段给出结果的帧数"""
+    tracker = BallTracker(detect_interval=10)
+    start = np.array([100.0, 300.0])
+    velocity = np.array([4.0, -1.5])  # 像素/帧
+    counts = {'tracker': 0, 'color': 0, 'yolo': 0}
+    for i in range(frames):
+        center = start + velocity * i
+        detector.backend.center = center
+        frame = make_frame(center, angle=i * 0.6)
+        detection_result, cascade = detector._run_cascade(frame, i / 30, tracker, None)
+        counts[cascade['stage']] += 1
+        balls = detection_result['soccer_balls']
+        assert balls, f"第{i}帧没有找到足球"
+        error = np.linalg.norm(np.array(balls[0]['center']) - center)
+        assert error < 4.0, f"第{i}帧位置误差 {error:.1f}px"
+    return counts
+
+
+def test_cascade_reduces_yolo_frames():
+    """干净画面上廉价阶段应接管大部分帧，YOLO只做周期性重新锚定"""
+    print("🧪 测试级联检测减少YOLO帧数")
+    detector = SoccerDetector('scripted.pt', backend='scripted')
+    counts = run_sequence(detector)
+    print(f"   📊 各阶段给出结果的帧数: {counts}, YOLO调用 {detector.backend.calls} 次")
+    assert detector.backend.calls == counts['yolo']
+    assert counts['yolo'] <= 10
+
+
+def test_color_stage_confirms_track():
+    """只用颜色阶段时，同样只有周期性重新锚定需要YOLO"""
+    print("🧪 测试颜色阶段确认轨迹")
+    detector = SoccerDetector('scripted.pt', backend='scripted', cascade=['color'])
+    counts = run_sequence(detector)
+    print(f"   📊 各阶段给出结果的帧数: {counts}")
+    assert counts['tracker'] == 0
+    assert counts['color'] >= 45
+
+
+def test_empty_cascade_runs_yolo_every_frame():
+    """不配置廉价阶段时每帧都运行YOLO"""
+    print("🧪 测试关闭级联")
+    detector = SoccerDetector('scripted.pt', backend='scripted', cascade=[])
+    counts = run_sequence(detector, frames=20)
+    assert counts['yolo'] == 20 and detector.backend.calls == 20
+
+
+def test_background_model_updates_every_frame():
+    """proposals 模式下廉价阶段接管的帧也更新背景模型，整帧检测周期按检测次数计算"""
+    print("🧪 测试背景模型逐帧更新")
+    detector = SoccerDetector('scripted.pt', backend='scripted', detection_mode='proposals')
+    background_model = BackgroundModel(warmup_frames=5, full_frame_interval=3)
+    tracker = BallTracker(detect_interval=10)
+    stages = []
+    for i in range(40):
+        center = (100.0 + 4.0 * i, 300.0 - 1.5 * i)
+        detector.backend.center = center
+        context = FrameContext(make_frame(center, angle=i * 0.6))
+        _, cascade = detector._run_cascade(context, i / 30, tracker, background_model)
+        stages.append(cascade['stage'])
+        # 同一帧再次传入不会重复更新
+        assert background_model.apply(context) is background_model.foreground
+    print(f"   📊 YOLO帧 {stages.count('yolo')}/40，背景模型更新 {background_model.frame_count} 次")
+    assert stages.count('yolo') < 40
+    assert background_model.frame_count == 40
+    assert background_model.detection_count == stages.count('yolo')
+
+
+
+def test_static_scene_skips_yolo_in_proposals_mode():
+    """proposals 模式下没有运动候选时不运行YOLO，只有预热和周期性整帧检测调用"""
+    print("🧪 测试静止画面不回退整帧检测")
+    detector = SoccerDetector('scripted.pt', backend='scripted', detection_mode='proposals')
+    background_model = BackgroundModel(warmup_frames=5, full_frame_interval=15)
+    detector.backend.center = (320, 240)
+    frame = make_frame((320, 240))
+    for _ in range(30):
+        result = detector.detect_objects(FrameContext(frame), background_model)
+    print(f"   📊 30帧静止画面 YOLO调用 {detector.backend.calls} 次")
+    # 预热5帧 + 第15、30次检测的整帧重新锚定
+    assert detector.backend.calls == 7
+    assert result['soccer_balls']  # 最后一帧是整帧检测，静止的球被找回
+
+
+if __name__ == "__main__":
+    test_cascade_reduces_yolo_frames()
+    test_color_stage_confirms_track()
+    test_empty_cascade_runs_yolo_every_frame()
+    test_background_model_updates_every_frame()
+    test_static_scene_skips_yolo_in_proposals_mode()
+    print("✅ 级联检测测试全部通过")
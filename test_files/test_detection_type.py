@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+测试 Detection 检测结果类型 - 字典式访问兼容、序列化
+"""
+import sys
+sys.path.append('ai_model')
+
+from detection import Detection
+import json
+
+
+def test_dict_compatible_access():
+    """旧代码按字典读写检测结果仍然可用"""
+    print("🧪 测试字典式访问")
+    ball = Detection([10.0, 20.0, 30.0, 44.0], 0.87, class_id=32)
+    assert ball['center'] == [20.0, 32.0]
+    assert ball.get('detection_method', 'unknown') == 'yolo'
+    assert ball.get('timestamp', 0.0) == 0.0 and 'timestamp' not in ball
+    ball['timestamp'] = 12.5
+    assert ball.timestamp == 12.5 and 'timestamp' in ball
+    assert dict(ball) == ball.to_dict()
+    try:
+        ball['corners']
+        raise AssertionError('未知字段应抛出 KeyError')
+    except KeyError:
+        pass
+    assert Detection.from_dict(ball.to_dict()).to_dict() == ball.to_dict()
+
+
+def test_serialization_boundary():
+    """to_json 只保留响应需要的字段并控制小数位数"""
+    print("🧪 测试序列化")
+    ball = Detection([10.123, 20.456, 30.789, 44.001], 0.87654, 'white_ball', 'color_white', class_id=None)
+    compact = ball.to_json()
+    assert compact == {
+        'bbox': [10.1, 20.5, 30.8, 44.0],
+        'confidence': 0.88,
+        'center': [20.5, 32.2],
+        'class_name': 'white_ball',
+        'detection_method': 'color_white'
+    }
+    print(f"   📦 {json.dumps(compact, separators=(',', ':'))}")
+
+
+if __name__ == "__main__":
+    test_dict_compatible_access()
+    test_serialization_boundary()
+    print("✅ 检测结果类型测试全部通过")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+测试事件流状态机 - 去抖、迟滞、射门冷却和心跳频率，不需要YOLO模型
+"""
+import sys
+sys.path.append('ai_model')
+
+from event_stream import EventStream
+from goal_region import GoalRegion
+
+GOAL = GoalRegion([[800, 200], [1000, 200], [1000, 400], [800, 400]])
+
+
+def frame(t, center=None, r=10, entry=None, crossing=None):
+    balls = []
+    if center is not None:
+        x, y = center
+        balls.append({'bbox': [x - r, y - r, x + r, y + r], 'center': [x, y], 'confidence': 0.9})
+    return {'timestamp': t, 'detections': {'soccer_balls': balls, 'goal_areas': []},
+            'goal_entry': entry, 'goal_crossing': crossing}
+
+
+def run(stream, frames, fps=30.0):
+    """按帧推进，返回 (事件名列表, 发送消息数)"""
+    names, sent = [], 0
+    for i, result in enumerate(frames):
+        message = stream.update(result, [GOAL], now=i / fps)
+        if message is not None:
+            sent += 1
+            if message['type'] == 'events':
+                names.extend(event['event'] for event in message['events'])
+    return names, sent
+
+
+def test_debounce_and_hysteresis():
+    """单帧误检不报告；在门线附近抖动只产生一次进门和一次离开"""
+    print("🧪 测试去抖与迟滞")
+    stream = EventStream()
+    frames = [frame(0.0, [400, 300]), frame(0.033), frame(0.066)]          # 单帧误检
+    frames += [frame(0.1 + i / 30, [500 + 10 * i, 300]) for i in range(30)]  # 飞向球门
+    frames += [frame(1.1 + i / 30, [830, 300]) for i in range(3)]             # 进门
+    # 在门线附近抖动：重叠比例在 0.4 和 0.7 之间交替（离开阈值0.2），保持在门内
+    frames += [frame(1.2 + i / 30, [798 if i % 2 else 804, 300]) for i in range(20)]
+    frames += [frame(1.8 + i / 30, [700, 300]) for i in range(10)]           # 离开球门
+    frames += [frame(2.2 + i / 30) for i in range(10)]                         # 球丢失
+    names, sent = run(stream, frames)
+    print(f"   📨 {len(frames)} 帧发送 {sent} 条消息: {names}")
+    assert names == ['ball_visible', 'goal_enter', 'goal_exit', 'ball_lost']
+    assert sent < len(frames) / 5
+
+
+def test_crossing_and_shot_cooldown():
+    """扫掠进门立即报告；射门预测在冷却期内不重复"""
+    print("🧪 测试扫掠进门与射门冷却")
+    stream = EventStream()
+    entry = {'goal_index': 0, 'time_to_entry_ms': 400, 'entry_point': [800, 300], 'confidence': 0.8}
+    crossing = {'goal_index': 0, 'crossing_time': 0.15, 'crossing_point': [800, 300], 'inside_at_end': False}
+    frames = [frame(0.0, [500, 300], entry=entry), frame(0.1, [600, 300], entry=entry),
+              frame(0.2, [1200, 300], crossing=crossing), frame(0.3, [1300, 300], entry=entry)]
+    names, _ = run(stream, frames)
+    assert names == ['shot_predicted', 'ball_visible', 'goal_enter']
+    assert stream.in_goal and stream.last_shot_time == 0.0
+
+
+def test_heartbeat_rate():
+    """没有状态变化时按心跳间隔发送最新位置"""
+    print("🧪 测试心跳")
+    stream = EventStream(heartbeat_interval=1.0)
+    messages = [stream.update(frame(i / 30, [300, 300]), [GOAL], now=i / 30) for i in range(90)]
+    heartbeats = [m for m in messages if m is not None and m['type'] == 'heartbeat']
+    # 第一帧发送初始状态，之后每秒一次（事件消息也会重置心跳计时）
+    assert [m['timestamp'] for m in heartbeats] == [0.0, 1.03, 2.07]
+    assert heartbeats[-1]['position'] == [300, 300] and heartbeats[-1]['ball_visible']
+    assert stream.tick(now=3.5)['ball_visible'] is True
+    assert stream.tick(now=3.6) is None
+
+
+if __name__ == "__main__":
+    test_debounce_and_hysteresis()
+    test_crossing_and_shot_cooldown()
+    test_heartbeat_rate()
+    print("✅ 事件流测试全部通过")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+测试帧上下文 - 派生图像每帧只计算一次，缓冲区逐帧复用
+"""
+import sys
+sys.path.append('ai_model')
+
+from frame_context import BufferPool, FrameContext
+from motion_gate import MotionGate
+import cv2
+import numpy as np
+
+
+def make_frame(seed, size=(720, 1280)):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size + (3,), dtype=np.uint8)
+
+
+def test_derived_images_match_opencv():
+    """派生图像与直接调用OpenCV的结果一致，重复请求返回同一对象"""
+    print("🧪 测试派生图像")
+    frame = make_frame(0)
+    context = FrameContext(frame, BufferPool())
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    assert np.array_equal(context.gray, gray)
+    assert np.array_equal(context.hsv, cv2.cvtColor(frame, cv2.COLOR_BGR2HSV))
+    assert np.array_equal(context.blurred(5), cv2.GaussianBlur(gray, (5, 5), 0))
+    assert np.array_equal(context.edges(50, 150), cv2.Canny(gray, 50, 150))
+    assert np.array_equal(context.resized(0.5).frame,
+                          cv2.resize(frame, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA))
+
+    level, scale = context.pyramid_level(640)
+    assert scale == 0.5 and np.array_equal(level.frame, cv2.pyrDown(frame))
+
+    assert context.gray is context.gray
+    assert context.edges(50, 150) is context.edges(50, 150)
+    assert context.resized(0.5) is context.resized(0.5)
+    assert context.pyramid_level(640)[0] is level
+
+
+def test_buffers_reused_across_frames():
+    """相同分辨率的后续帧直接写入已有缓冲区，不再分配内存"""
+    print("🧪 测试缓冲区复用")
+    pool = BufferPool()
+    first = FrameContext(make_frame(1), pool)
+    first_buffers = [first.gray, first.resized(0.5).hsv, first.pyramid_level(640)[0].gray]
+    allocations = pool.stats['allocations']
+
+    second = FrameContext(make_frame(2), pool)
+    second_buffers = [second.gray, second.resized(0.5).hsv, second.pyramid_level(640)[0].gray]
+    print(f"   📊 分配 {pool.stats['allocations']} 次, 复用 {pool.stats['reuses']} 次")
+    assert pool.stats['allocations'] == allocations
+    for old, new in zip(first_buffers, second_buffers):
+        assert new is old
+
+
+def test_motion_gate_accepts_context():
+    """运动门控使用帧上下文时结果与原始帧相同"""
+    print("🧪 测试运动门控共用帧上下文")
+    pool = BufferPool()
+    plain, shared = MotionGate(), MotionGate()
+    base = make_frame(3, (480, 640))
+    for i in range(5):
+        frame = base.copy()
+        frame[100:140, 100 + 30 * i:140 + 30 * i] = 255
+        assert plain.check(frame) == shared.check(FrameContext(frame, pool))
+        assert plain.last_motion == shared.last_motion
+
+
+if __name__ == "__main__":
+    test_derived_images_match_opencv()
+    test_buffers_reused_across_frames()
+    test_motion_gate_accepts_context()
+    print("✅ 帧上下文测试全部通过")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+测试几何工具 - IoU、NMS、点在框/多边形内、线段进入框/多边形、多边形外扩
+"""
+import sys
+sys.path.append('ai_model')
+
+from geometry import (pairwise_iou, non_max_suppression, soft_nms,
+                      points_in_boxes, points_in_polygon, point_box_distances,
+                      segment_box_entries, segment_polygon_entries, offset_polygon,
+                      point_polygon_distances)
+import time
+import numpy as np
+
+
+def test_pairwise_iou():
+    print("🧪 测试IoU矩阵")
+    boxes = np.array([[0, 0, 10, 10], [5, 5, 15, 15], [20, 20, 30, 30], [0, 0, 0, 0]])
+    iou = pairwise_iou(boxes, boxes)
+    assert iou.shape == (4, 4)
+    assert np.isclose(iou[0, 1], 25 / 175)
+    assert iou[0, 2] == 0 and iou[3, 3] == 0  # 不相交、面积为0
+    assert np.allclose(np.diag(iou)[:3], 1.0)
+
+
+def test_nms_and_soft_nms():
+    print("🧪 测试贪心NMS与Soft-NMS")
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60], [0, 0, 10, 10]])
+    scores = np.array([0.9, 0.8, 0.7, 0.9])
+    # 分数相同保持输入顺序
+    assert non_max_suppression(boxes, scores, 0.5).tolist() == [0, 2]
+    keep, decayed = soft_nms(boxes, scores, sigma=0.5)
+    assert keep[0] == 0 and 2 in keep.tolist()
+    assert np.all(np.diff(decayed) <= 1e-12), "衰减后的分数应从高到低"
+    assert decayed[keep.tolist().index(3)] < 0.9, "重叠框的分数应被衰减"
+
+
+def test_points():
+    print("🧪 测试点在框内/多边形内")
+    points = np.array([[5, 5], [15, 5], [10, 10], [-3, 4]])
+    boxes = np.array([[0, 0, 10, 10]])
+    assert points_in_boxes(points, boxes)[:, 0].tolist() == [True, False, True, False]
+    assert np.allclose(point_box_distances(points, boxes)[:, 0], [0, 5, 0, 3])
+    # 凹多边形（L形）
+    polygon = np.array([[0, 0], [20, 0], [20, 10], [10, 10], [10, 20], [0, 20]])
+    inside = points_in_polygon(np.array([[5, 5], [15, 5], [15, 15], [5, 15], [25, 5]]), polygon)
+    assert inside.tolist() == [True, True, False, True, False]
+
+
+def test_segment_entries():
+    print("🧪 测试线段进入框/多边形")
+    starts = np.array([[0, 5], [0, 5], [5, 5], [0, 20], [11, 5]])
+    ends = np.array([[20, 5], [4, 5], [30, 5], [20, 20], [30, 5]])
+    box = np.array([[10, 0, 12, 10]])
+    t = segment_box_entries(starts, ends, box)[:, 0]
+    # 穿过、没到、起点在外、擦不到、起点在内
+    assert np.allclose(t[[0, 2, 4]], [0.5, 0.2, 0.0]) and np.isnan(t[[1, 3]]).all()
+    square = np.array([[10, 0], [12, 0], [12, 10], [10, 10]])
+    assert np.allclose(segment_polygon_entries(starts, ends, square), t, equal_nan=True)
+    # 透视变形的四边形：斜线从左下方进入
+    quad = np.array([[10, 0], [30, 2], [28, 20], [12, 16]])
+    entry = segment_polygon_entries([[0, 30]], [[40, -10]], quad)[0]
+    point = np.array([0, 30]) + entry * np.array([40, -40])
+    assert points_in_polygon(point[None, :] + [0.5, -0.5], quad)[0]
+    assert not points_in_polygon(point[None, :] - [0.5, -0.5], quad)[0]
+
+
+
+def test_offset_polygon():
+    print("🧪 测试多边形外扩")
+    # 轴对齐矩形（两种绕向）外扩后与 bbox 外扩相同
+    square = np.array([[10, 0], [12, 0], [12, 10], [10, 10]])
+    expected = np.array([[7, -3], [15, -3], [15, 13], [7, 13]])
+    assert np.allclose(offset_polygon(square, 3), expected)
+    assert np.allclose(offset_polygon(square[::-1], 3), expected[::-1])
+    # 透视四边形：外扩后各条边到原多边形的距离等于外扩距离，原多边形完全在内
+    quad = np.array([[10, 0], [30, 2], [28, 20], [12, 16]])
+    grown = offset_polygon(quad, 2)
+    midpoints = (grown + np.roll(grown, -1, axis=0)) / 2
+    assert np.allclose(point_polygon_distances(midpoints, quad), 2)
+    assert points_in_polygon(quad, grown).all()
+    # 共线顶点和重复顶点
+    assert np.allclose(offset_polygon([[0, 0], [10, 0], [20, 0], [20, 10], [0, 10], [0, 10]], 1),
+                       [[-1, -1], [10, -1], [21, -1], [21, 11], [-1, 11]])
+
+
+def test_nms_scales_to_thousands():
+    print("🧪 测试数千个候选框的去重耗时")
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(0, 1280, size=(3000, 2))
+    sizes = rng.uniform(20, 120, size=(3000, 2))
+    boxes = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1)
+    scores = rng.uniform(0, 1, size=3000)
+    start = time.perf_counter()
+    keep = non_max_suppression(boxes, scores, 0.5, max_det=3000)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"   ⏱️ 3000个框 -> 保留{len(keep)}个, 耗时 {elapsed:.1f}ms")
+    iou = pairwise_iou(boxes[keep], boxes[keep])
+    np.fill_diagonal(iou, 0)
+    assert iou.max() <= 0.5
+
+
+if __name__ == "__main__":
+    test_pairwise_iou()
+    test_nms_and_soft_nms()
+    test_points()
+    test_segment_entries()
+    test_offset_polygon()
+    test_nms_scales_to_thousands()
+    print("✅ 几何工具测试全部通过")
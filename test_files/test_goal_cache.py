@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+测试静态球门缓存 - 合成画面和假的球门检测函数，不需要YOLO模型
+"""
+import sys
+sys.path.append('ai_model')
+
+from goal_cache import GoalCache
+import numpy as np
+
+
+class FakeGoalDetector:
+    """返回固定球门（带少量抖动），并统计调用次数"""
+
+    def __init__(self, bbox=(400, 250, 880, 450), corners=False):
+        self.bbox = list(bbox)
+        self.corners = corners
+        self.calls = 0
+        self.rng = np.random.default_rng(0)
+
+    def __call__(self, frame):
+        self.calls += 1
+        if self.bbox is None:
+            return []
+        x1, y1, x2, y2 = (np.array(self.bbox) + self.rng.integers(-3, 4, size=4)).tolist()
+        goal = {'bbox': [x1, y1, x2, y2], 'confidence': 0.7, 'class_name': 'goal',
+                'center': [(x1 + x2) / 2, (y1 + y2) / 2], 'detection_method': 'edge_lines_fast'}
+        if self.corners:
+            # 透视四边形：远端门柱更短，外接框即检测框
+            goal['corners'] = [[x1, y1 + 20], [x2, y1], [x2, y2], [x1, y2 - 10]]
+        return [goal]
+
+
+def make_frame(shift=0):
+    """草地 + 白色球门框；shift 模拟相机平移"""
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[:, :] = (30, 90, 30)
+    frame[:, (np.arange(1280) // 80) % 2 == 0] = (70, 170, 70)  # 草坪条纹，平移后整幅画面都会变化
+    frame = np.roll(frame, shift, axis=1)
+    frame[250:450, 400 + shift:406 + shift] = 255
+    return frame
+
+
+def test_locks_after_stable_frames():
+    """连续一致后锁定，之后每帧不再检测"""
+    print("🧪 测试球门锁定")
+    detector = FakeGoalDetector()
+    cache = GoalCache(detector, stable_frames=5, revalidate_interval=1000)
+    frame = make_frame()
+    for i in range(30):
+        goals = cache.update(frame, i / 30)
+    print(f"   📊 30帧中检测 {detector.calls} 次, 状态 {cache.get_state()}")
+    assert cache.locked and detector.calls == 5
+    assert goals[0]['locked'] and abs(goals[0]['bbox'][0] - 400) <= 3
+
+
+def test_scene_change_triggers_redetection():
+    """相机移动后立即重新检测，并重新锁定到新位置"""
+    print("🧪 测试场景变化后重新检测")
+    detector = FakeGoalDetector()
+    cache = GoalCache(detector, stable_frames=3, revalidate_interval=1000)
+    for i in range(5):
+        cache.update(make_frame(), i / 30)
+    calls_before = detector.calls
+    detector.bbox = [480, 250, 960, 450]
+    moved = make_frame(shift=80)
+    for i in range(5, 10):
+        goals = cache.update(moved, i / 30)
+    assert cache.stats['scene_changes'] == 1
+    assert detector.calls == calls_before + 3
+    assert cache.locked and abs(goals[0]['bbox'][0] - 480) <= 3
+
+
+def test_background_revalidation_unlocks_when_goal_disappears():
+    """后台复核连续不一致时解除锁定"""
+    print("🧪 测试后台复核")
+    detector = FakeGoalDetector()
+    cache = GoalCache(detector, stable_frames=3, revalidate_interval=1.0, max_disagreements=2)
+    frame = make_frame()
+    for i in range(3):
+        cache.update(frame, i * 0.1)
+    assert cache.locked
+    detector.bbox = None  # 球门被移走（或检测失败）
+    t = 0.3
+    while cache.locked and t < 10:
+        t += 0.5
+        cache.update(frame, t)
+        if cache.pending is not None:
+            cache.pending.result()  # 等待后台线程完成，下一帧取回结果
+    print(f"   📊 复核 {cache.stats['revalidations']} 次后解除锁定 (t={t:.1f}s)")
+    assert not cache.locked and cache.stats['revalidations'] == 2
+
+
+
+def test_locked_corners_follow_median_box():
+    """锁定后角点与中位数框一致，不保留最后一帧的抖动"""
+    print("🧪 测试锁定球门的角点")
+    detector = FakeGoalDetector(corners=True)
+    cache = GoalCache(detector, stable_frames=5, revalidate_interval=1000)
+    for i in range(6):
+        goals = cache.update(make_frame(), i / 30)
+    assert cache.locked and goals[0]['locked']
+    corners = np.array(goals[0]['corners'])
+    assert np.allclose(np.r_[corners.min(axis=0), corners.max(axis=0)], goals[0]['bbox'])
+    # 透视形状保留：左上角仍低于右上角
+    assert corners[0][1] > corners[1][1]
+
+
+if __name__ == "__main__":
+    test_locks_after_stable_frames()
+    test_scene_change_triggers_redetection()
+    test_background_revalidation_unlocks_when_goal_disappears()
+    test_locked_corners_follow_median_box()
+    print("✅ 球门缓存测试全部通过")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+测试进门时间预测与扫掠路径进门检测 - 轨迹外推/插值，不需要YOLO模型
+"""
+import sys
+sys.path.append('ai_model')
+
+from soccer_detector import SoccerDetector
+from trajectory import TrajectoryEstimator
+import numpy as np
+
+GOAL = {'bbox': [800, 200, 1000, 400], 'confidence': 1.0, 'center': [900, 300], 'detection_method': 'manual'}
+
+
+def make_detector():
+    detector = SoccerDetector.__new__(SoccerDetector)
+    detector.entry_prediction_horizon = 2.0
+    detector.entry_prediction_step = 0.02
+    detector.entry_min_speed = 20.0
+    detector.entry_min_confidence = 0.2
+    detector.entry_max_sample_gaps = 3
+    detector.entry_max_sample_age = 1.0
+    return detector
+
+
+def track(points, dt=0.2):
+    estimator = TrajectoryEstimator()
+    for i, point in enumerate(points):
+        estimator.add(point, 100.0 + i * dt)
+    return estimator
+
+
+def test_predicts_entry_time():
+    """匀速飞向球门：预测时间与解析解一致"""
+    print("🧪 测试匀速进门预测")
+    detector = make_detector()
+    # 200 px/s 向右，最后位置 x=600，距离球门左边 200px -> 1.0s
+    estimator = track([[440 + 40 * i, 300] for i in range(5)])
+    entry = detector.predict_goal_entry(estimator.summary(), [GOAL], estimator.timestamp)
+    print(f"   ⏱️ {entry}")
+    assert entry is not None and entry['goal_index'] == 0
+    assert abs(entry['time_to_entry_ms'] - 1000) <= 5
+    assert abs(entry['entry_point'][0] - 800) <= 5
+
+    # 当前帧没检测到球：从当前时刻算起，剩余时间相应减少，最新样本变旧后置信度降低
+    later = detector.predict_goal_entry(estimator.summary(), [GOAL], estimator.timestamp + 0.4)
+    assert abs(later['time_to_entry_ms'] - 600) <= 5
+    assert later['confidence'] < entry['confidence']
+
+    # 超过3个采样间隔没有新样本：球已丢失，不再外推
+    assert detector.predict_goal_entry(estimator.summary(), [GOAL], estimator.timestamp + 0.7) is None
+
+
+def test_no_prediction_when_missing_goal():
+    """远离球门、速度太低或已经在门内时不预测"""
+    print("🧪 测试不会进门的情况")
+    detector = make_detector()
+    away = track([[600 - 40 * i, 300] for i in range(5)])
+    assert detector.predict_goal_entry(away.summary(), [GOAL]) is None
+    slow = track([[600 + 2 * i, 300] for i in range(5)])
+    assert detector.predict_goal_entry(slow.summary(), [GOAL]) is None
+    inside = track([[820 + 20 * i, 300] for i in range(5)])
+    assert detector.predict_goal_entry(inside.summary(), [GOAL]) is None
+    passing = track([[440 + 40 * i, 600] for i in range(5)])
+    assert detector.predict_goal_entry(passing.summary(), [GOAL]) is None
+    # 以 30 px/s 滚动的球丢失9.5秒后，外推位置已经在门内，但样本过旧不应给出预测
+    lost = track([[680 + 6 * i, 300] for i in range(5)])
+    assert detector.predict_goal_entry(lost.summary(), [GOAL], lost.timestamp + 9.5) is None
+
+
+def test_swept_crossing_between_samples():
+    """球在两次采样之间进门又出来：单帧位置都在门外，扫掠路径仍能发现并插值出进门时刻"""
+    print("🧪 测试扫掠路径进门检测")
+    detector = make_detector()
+    estimator = TrajectoryEstimator()
+    estimator.add([500, 300], 10.0)
+    estimator.add([1300, 300], 11.0)   # 1秒内横穿整个球门
+    assert not detector.check_ball_goal_collision([], [GOAL])['has_collision']
+
+    crossing = detector.detect_goal_crossing(estimator, [GOAL], ball_radius=10)
+    print(f"   ⚽ {crossing}")
+    assert crossing is not None and not crossing['inside_at_end']
+    assert abs(crossing['crossing_point'][0] - 790) < 1e-6   # 球门左边外扩球半径
+    assert abs(crossing['crossing_time'] - (10.0 + 290 / 800)) < 1e-9
+
+    collision = detector.check_ball_goal_collision([], [GOAL], trajectory=estimator)
+    assert collision['collision_type'] == 'goal_crossed'
+
+    # 同一个矩形以角点给出：同样按球半径外扩，进门时刻与 bbox 形式相同
+    x1, y1, x2, y2 = GOAL['bbox']
+    rect_goal = dict(GOAL, corners=[[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+    for radius in (0, 10, 25):
+        as_box = detector.detect_goal_crossing(estimator, [GOAL], ball_radius=radius)
+        as_corners = detector.detect_goal_crossing(estimator, [rect_goal], ball_radius=radius)
+        assert abs(as_corners['crossing_time'] - as_box['crossing_time']) < 1e-9
+        assert np.allclose(as_corners['crossing_point'], as_box['crossing_point'])
+
+    # 自动检测的球门与静态判断一样不参与：静止在门内和扫掠穿过都不算
+    auto_goal = dict(GOAL, detection_method='edges')
+    resting = {'bbox': [890, 290, 910, 310], 'center': [900, 300], 'confidence': 0.99}
+    assert not detector.check_ball_goal_collision([resting], [auto_goal])['has_collision']
+    assert detector.detect_goal_crossing(estimator, [auto_goal], ball_radius=10) is None
+    assert not detector.check_ball_goal_collision([], [auto_goal], trajectory=estimator)['has_collision']
+    crossing = detector.detect_goal_crossing(estimator, [auto_goal, GOAL], ball_radius=10)
+    assert crossing['goal_index'] == 1
+
+    # 透视四边形球门（上沿低于外接框上沿）：穿过外接框但没有进入四边形
+    quad_goal = dict(GOAL, corners=[[800, 260], [1000, 240], [1000, 400], [800, 400]])
+    grazing = TrajectoryEstimator()
+    grazing.add([700, 220], 0.0)
+    grazing.add([1100, 220], 1.0)
+    assert detector.detect_goal_crossing(grazing, [GOAL]) is not None
+    assert detector.detect_goal_crossing(grazing, [quad_goal]) is None
+
+    # 起点已在门内：这一段不重复报告
+    staying = TrajectoryEstimator()
+    staying.add([850, 300], 0.0)
+    staying.add([1300, 300], 1.0)
+    assert detector.detect_goal_crossing(staying, [GOAL]) is None
+
+
+if __name__ == "__main__":
+    test_predicts_entry_time()
+    test_no_prediction_when_missing_goal()
+    test_swept_crossing_between_samples()
+    print("✅ 进门预测与扫掠检测测试全部通过")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+测试多边形球门区域 - 栅格查表与精确多边形计算一致，透视四边形不按外接框误判
+"""
+import sys
+sys.path.append('ai_model')
+
+from goal_region import GoalRegion
+from geometry import points_in_polygon, point_polygon_distances
+from soccer_detector import SoccerDetector
+import numpy as np
+import time
+
+# 透视下的球门：远端门柱更短
+QUAD = [[812.3, 203.7], [1187.9, 251.2], [1160.4, 498.8], [790.2, 455.1]]
+
+
+def test_queries_match_exact_polygon():
+    """点在门内、球完全在门内与精确计算一致；重叠比例与蒙特卡洛估计一致"""
+    print("🧪 测试栅格查表精度")
+    region = GoalRegion(QUAD)
+    rng = np.random.default_rng(0)
+    points = rng.uniform([700, 150], [1250, 550], (50000, 2))
+    radii = rng.uniform(2, 40, len(points))
+
+    start = time.perf_counter()
+    inside = region.contains(points)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"   ⏱️ {len(points)} 个点查询 {elapsed:.1f}ms")
+    exact = points_in_polygon(points, QUAD)
+    assert np.array_equal(inside, exact)
+    assert np.array_equal(region.fully_inside(points, radii),
+                          exact & (point_polygon_distances(points, QUAD) >= radii))
+
+    boxes = np.column_stack([points[:100], points[:100] + rng.uniform(10, 60, (100, 2))])
+    fractions = region.overlap_fraction(boxes)
+    for box, fraction in zip(boxes, fractions):
+        samples = rng.uniform(box[:2], box[2:], (20000, 2))
+        assert abs(fraction - points_in_polygon(samples, QUAD).mean()) < 0.03
+    assert np.allclose(region.overlap_fraction([[950, 300, 1000, 350], [0, 0, 10, 10]]), [1.0, 0.0])
+
+
+def test_perspective_goal_collision():
+    """外接框内但在四边形外的球不算进球；完全进入标注四边形才算"""
+    print("🧪 测试透视球门进球判断")
+    detector = SoccerDetector.__new__(SoccerDetector)
+    region = GoalRegion(QUAD)
+    assert region['bbox'] == region.bbox and region.get('detection_method') == 'manual'
+
+    def ball(x, y, r=10):
+        return {'bbox': [x - r, y - r, x + r, y + r], 'center': [x, y], 'confidence': 0.99}
+
+    corner_ball = ball(1175, 215)   # 外接框右上角内，四边形外
+    assert detector.check_ball_goal_collision([corner_ball], [region])['has_collision'] is False
+    scored = detector.check_ball_goal_collision([ball(1000, 350)], [region])
+    assert scored['collision_type'] == 'goal_scored'
+    on_line = detector.check_ball_goal_collision([ball(1175, 375)], [region])
+    assert on_line['collision_type'] == 'goal_contact' and on_line['distance'] == 0
+
+    # 自动检测的球门不参与进球判断
+    auto_goal = dict(region.to_dict(), detection_method='edges')
+    assert detector.check_ball_goal_collision([ball(1000, 350)], [auto_goal])['has_collision'] is False
+
+
+
+def test_collision_reuses_rasterized_goal():
+    """同一个标注球门字典只栅格化一次；传入 GoalRegion 时直接使用"""
+    print("🧪 测试球门区域缓存")
+    detector = SoccerDetector.__new__(SoccerDetector)
+    detector._goal_regions = {}
+    detector.goal_region_cache_size = 2
+    goal = GoalRegion(QUAD).to_dict()
+    ball = {'bbox': [990, 340, 1010, 360], 'center': [1000, 350], 'confidence': 0.99}
+
+    first = detector.check_ball_goal_collision([ball], [goal])
+    second = detector.check_ball_goal_collision([ball], [dict(goal)])
+    assert first['collision_type'] == second['collision_type'] == 'goal_scored'
+    assert len(detector._goal_regions) == 1 and first['goal_info'] is second['goal_info']
+
+    region = GoalRegion(QUAD)
+    assert detector.check_ball_goal_collision([ball], [region])['goal_info'] is region
+    assert len(detector._goal_regions) == 1
+
+    # 缓存满时清空，不会无限增长
+    for dx in range(3):
+        detector.check_ball_goal_collision([ball], [dict(goal, corners=[[x + dx, y] for x, y in QUAD])])
+    assert len(detector._goal_regions) <= 2
+
+
+if __name__ == "__main__":
+    test_queries_match_exact_polygon()
+    test_perspective_goal_collision()
+    test_collision_reuses_rasterized_goal()
+    print("✅ 多边形球门区域测试全部通过")
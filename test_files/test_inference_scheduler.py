@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+测试推理调度器 - 优先级通道、会话加权公平、最低速率保证，用 sleep 模拟推理
+"""
+import sys
+sys.path.append('backend')
+
+from inference_scheduler import InferenceScheduler
+import asyncio
+import time
+
+
+def work(name, order, duration=0.005):
+    time.sleep(duration)
+    order.append(name)
+    return name
+
+
+def test_priority_lanes():
+    """录制通道的积压先于普通会话和尽力而为的请求执行"""
+    print("🧪 测试优先级通道")
+
+    async def scenario():
+        scheduler = InferenceScheduler(min_rate=0)
+        order = []
+        jobs = [scheduler.submit('detect', work, 'detect', order, lane='best_effort') for _ in range(3)]
+        jobs += [scheduler.submit('idle', work, 'idle', order, lane='idle') for _ in range(3)]
+        jobs += [scheduler.submit('rec', work, 'rec', order, lane='recording') for _ in range(3)]
+        results = await asyncio.gather(*jobs)
+        return scheduler, order, results
+
+    scheduler, order, results = asyncio.run(scenario())
+    # 第一个请求提交时工作线程空闲，立即执行；之后严格按通道优先级
+    assert order == ['detect'] + ['rec'] * 3 + ['idle'] * 3 + ['detect'] * 2
+    assert results[0] == 'detect'
+    snapshot = scheduler.snapshot()
+    assert snapshot['lanes']['recording']['completed'] == 3 and snapshot['lanes']['idle']['queued'] == 0
+
+
+def test_weighted_fair_share():
+    """同一通道内积压的会话按权重分配检测器时间"""
+    print("🧪 测试加权公平排队")
+
+    async def scenario():
+        scheduler = InferenceScheduler(min_rate=0)
+        order = []
+        blocker = scheduler.submit('warmup', work, 'warmup', order)
+        heavy = [scheduler.submit('a', work, 'a', order, weight=2.0) for _ in range(20)]
+        light = [scheduler.submit('b', work, 'b', order, weight=1.0) for _ in range(20)]
+        await asyncio.gather(blocker, *heavy, *light)
+        return order
+
+    order = asyncio.run(scenario())
+    first = order[1:31]
+    print(f"   ⚖️ 前30次服务: a={first.count('a')} b={first.count('b')}")
+    assert first.count('a') == 20 and first.count('b') == 10
+
+
+def test_min_rate_guarantee():
+    """录制通道持续积压时，普通会话仍按最低速率得到服务；异常原样返回给提交方"""
+    print("🧪 测试最低速率保证")
+
+    async def scenario():
+        scheduler = InferenceScheduler(min_rate=20)   # 每个请求最多排队50ms
+        order = []
+        recording = [asyncio.ensure_future(scheduler.submit('rec', work, 'rec', order, 0.01, lane='recording'))
+                     for _ in range(40)]
+        await asyncio.sleep(0)
+        start = time.monotonic()
+        await scheduler.submit('idle', work, 'idle', order)
+        waited = time.monotonic() - start
+
+        def fail():
+            raise RuntimeError('推理失败')
+        try:
+            await scheduler.submit('idle', fail)
+            raise AssertionError('异常应传给提交方')
+        except RuntimeError:
+            pass
+        await asyncio.gather(*recording)
+        return scheduler, order, waited
+
+    scheduler, order, waited = asyncio.run(scenario())
+    print(f"   ⏱️ 普通会话等待 {waited * 1000:.0f}ms（录制积压 {40 * 10}ms）")
+    assert waited < 0.15 and order.index('idle') < 15
+    assert scheduler.snapshot()['min_rate_promotions'] >= 1
+
+
+def test_low_rate_session_keeps_lane_priority():
+    """发送频率低于最低速率的普通会话（1fps）刚提交时不插到录制积压前面"""
+    print("🧪 测试低频会话不抢占录制通道")
+
+    async def scenario():
+        scheduler = InferenceScheduler(min_rate=2)   # 最多等待500ms
+        order = []
+        await scheduler.submit('idle', work, 'idle', order)
+        await asyncio.sleep(1.0)                     # 1fps：距上次服务已超过 1/min_rate
+        recording = [asyncio.ensure_future(scheduler.submit('rec', work, 'rec', order, 0.01, lane='recording'))
+                     for _ in range(20)]
+        await asyncio.sleep(0)
+        await scheduler.submit('idle', work, 'idle', order)
+        await asyncio.gather(*recording)
+        return scheduler, order
+
+    scheduler, order = asyncio.run(scenario())
+    assert order == ['idle'] + ['rec'] * 20 + ['idle']
+    assert scheduler.snapshot()['min_rate_promotions'] == 0
+
+
+if __name__ == "__main__":
+    test_priority_lanes()
+    test_weighted_fair_share()
+    test_min_rate_guarantee()
+    test_low_rate_session_keeps_lane_priority()
+    print("✅ 推理调度器测试全部通过")
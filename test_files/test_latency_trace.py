@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+测试逐帧延迟追踪 - 阶段时间点、响应拼接格式、指标记录
+"""
+import sys
+sys.path.append('backend')
+
+from latency_trace import FrameTrace
+from metrics import Metrics
+import json
+import time
+
+
+def test_trace_attached_to_response():
+    """序列化后拼接 trace 字段，响应仍是合法 JSON；偏移按阶段顺序递增"""
+    print("🧪 测试响应中的追踪信息")
+    capture_ms = time.time() * 1000 - 80
+    trace = FrameTrace(capture_ms)
+    trace.mark('decode')
+    run = trace.wrap(lambda x: time.sleep(0.01) or x * 2)
+    assert run(21) == 42
+    response = json.loads(trace.attach(json.dumps({'success': True}, separators=(',', ':'))))
+    print(f"   🧭 {response['trace']}")
+    assert response['success'] is True
+    assert response['trace']['c'] == round(capture_ms)
+    offsets = response['trace']['o']
+    assert all(a <= b for a, b in zip(offsets, offsets[1:]))
+    assert offsets[2] - offsets[1] >= 9.5
+
+    durations = trace.durations()
+    assert 70 <= durations['network'] <= 200 and durations['inference'] >= 9.5
+    assert abs(durations['total'] - durations['network'] - durations['server']) < 1e-6
+
+
+def test_skipped_stages_and_metrics():
+    """运动门控跳过推理时对应阶段为 null；没有客户端时间戳时不记录网络和总延迟"""
+    print("🧪 测试缺失阶段与指标")
+    metrics = Metrics()
+    trace = FrameTrace(None)
+    trace.mark('decode')
+    response = json.loads(trace.attach('{"stale":true}'))
+    assert response['trace']['c'] is None and response['trace']['o'][1:3] == [None, None]
+    trace.record(metrics)
+    timings = metrics.snapshot()['timings']
+    assert set(timings) == {'latency.decode_ms', 'latency.serialize_ms', 'latency.server_ms'}
+
+
+if __name__ == "__main__":
+    test_trace_attached_to_response()
+    test_skipped_stages_and_metrics()
+    print("✅ 延迟追踪测试全部通过")
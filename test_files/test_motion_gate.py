@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+测试运动门控 - 关注区域按区域分别判断，小球的运动不被大区域稀释
+"""
+import sys
+sys.path.append('ai_model')
+
+from motion_gate import MotionGate
+import cv2
+import numpy as np
+
+GOAL_REGION = [160, 160, 1120, 560]   # 外扩后的球门框 960×400
+
+
+def rolling_ball_frames(frames=20, step=15):
+    """静止草地上20px的球在球门框旁边以每帧15px滚动"""
+    for i in range(frames):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        frame[:, :] = (40, 120, 40)
+        center = (200 + step * i, 620)
+        cv2.circle(frame, center, 10, (255, 255, 255), -1)
+        yield frame, [center[0] - 50, center[1] - 50, center[0] + 50, center[1] + 50]
+
+
+def test_small_ball_region_not_diluted():
+    """球门框很大也不影响：球区域内有运动就需要检测"""
+    print("🧪 测试按区域判断运动")
+    gate = MotionGate()
+    gated = []
+    for i, (frame, ball_region) in enumerate(rolling_ball_frames()):
+        if not gate.check(frame, [GOAL_REGION, ball_region]):
+            gated.append(i)
+    print(f"   📊 被跳过的帧: {gated}")
+    assert gated == []
+
+
+def test_static_regions_are_gated():
+    """所有关注区域都静止时跳过检测，区域外的运动不触发"""
+    print("🧪 测试静止区域跳过检测")
+    gate = MotionGate()
+    results = []
+    for frame, _ in rolling_ball_frames(frames=10):
+        results.append(gate.check(frame, [GOAL_REGION, [1180, 20, 1270, 110]]))
+    assert results[0] and not any(results[1:])
+
+
+if __name__ == "__main__":
+    test_small_ball_region_not_diluted()
+    test_static_regions_are_gated()
+    print("✅ 运动门控测试全部通过")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+测试离线回归评测 - 合成视频 + 按白色像素定位足球的假后端
+"""
+import sys
+sys.path.append('ai_model')
+
+import csv
+import io
+import os
+import tempfile
+
+import soccer_detector
+from soccer_detector import InferenceBackend
+import regression_runner
+import cv2
+import numpy as np
+
+
+class WhiteBallBackend(InferenceBackend):
+    """在输入图像中找白色像素的外接框作为足球，并统计被调用的次数"""
+
+    def __init__(self, model_path, imgsz):
+        self.calls = 0
+
+    def predict(self, frame, conf, iou, classes=None):
+        self.calls += 1
+        ys, xs = np.nonzero((frame > 200).all(axis=2))
+        if len(xs) < 20:
+            return np.zeros((0, 6), dtype=np.float32)
+        return np.array([[xs.min() - 1, ys.min() - 1, xs.max() + 2, ys.max() + 2, 0.8, 32]],
+                        dtype=np.float32)
+
+
+soccer_detector.INFERENCE_BACKENDS['white_ball'] = WhiteBallBackend
+
+
+def ball_center(i):
+    return 100.0 + 4.0 * i, 300.0 - 1.5 * i
+
+
+def write_video(path, frames=40, fps=25.0):
+    """匀速运动的足球，返回逐帧真值框"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (640, 480))
+    gt = {}
+    for i in range(frames):
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        frame[:, :] = (40, 120, 40)
+        cx, cy = ball_center(i)
+        cv2.circle(frame, (int(cx), int(cy)), 16, (255, 255, 255), -1)
+        writer.write(frame)
+        gt[i] = [[cx - 16, cy - 16, cx + 16, cy + 16]]
+    writer.release()
+    return gt
+
+
+def run(video_dir, gt_dir, config):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=regression_runner.CSV_FIELDS)
+    summary = regression_runner.run_config(config, regression_runner.list_videos(video_dir), gt_dir,
+                                           writer, None, 1, 0.3, regression_runner.SMALL_BALL_AREA)
+    rows = list(csv.DictReader(io.StringIO(output.getvalue()), fieldnames=regression_runner.CSV_FIELDS))
+    return summary, rows
+
+
+def test_config_axes():
+    """级联、检测模式和球门缓存都是配置轴，配置名互不相同"""
+    print("🧪 测试配置组合")
+    configs = regression_runner.build_configs(
+        ['yolo11s.pt'], ['torch'], [640],
+        cascades=[regression_runner.parse_cascade('tracker+color'), regression_runner.parse_cascade('none')],
+        detection_modes=['full', 'proposals'], goal_caches=[False, True])
+    names = [c['name'] for c in configs]
+    print(f"   📊 {names[:2]} ...")
+    assert len(configs) == 8 and len(set(names)) == 8
+    assert configs[0]['cascade'] == ['tracker', 'color']
+    assert any(c['cascade'] == [] and c['goal_cache'] and c['detection_mode'] == 'proposals' for c in configs)
+    try:
+        regression_runner.parse_cascade('optical_flow')
+        assert False, "未知阶段应报错"
+    except ValueError:
+        pass
+
+
+def test_session_objects_drive_cascade():
+    """每个视频使用独立的跟踪器：开启级联时YOLO只做周期性重新锚定，关闭时每帧都运行"""
+    print("🧪 测试评测流程使用会话对象")
+    with tempfile.TemporaryDirectory() as tmp:
+        gt = write_video(os.path.join(tmp, 'clip.avi'))
+        gt_dir = os.path.join(tmp, 'gt')
+        os.makedirs(gt_dir)
+        with open(os.path.join(gt_dir, 'clip.csv'), 'w', newline='') as f:
+            f.write('frame,x1,y1,x2,y2\n')
+            for i, boxes in gt.items():
+                f.write(f'{i},' + ','.join(f'{v:.1f}' for v in boxes[0]) + '\n')
+
+        base = dict(model='white.pt', backend='white_ball', imgsz=640, detection_mode='full', goal_cache=False)
+        cascade_summary, rows = run(tmp, gt_dir, dict(base, name='cascade', cascade=['tracker', 'color']))
+        yolo_summary, yolo_rows = run(tmp, gt_dir, dict(base, name='yolo', cascade=[]))
+
+    stages = [row['stage'] for row in rows]
+    print(f"   📊 YOLO占比: 级联 {cascade_summary['yolo_share']} / 关闭 {yolo_summary['yolo_share']}")
+    assert len(rows) == 40
+    assert float(rows[25]['timestamp']) == 1.0  # 帧号 / 帧率
+    assert {row['cascade'] for row in rows} == {'tracker+color'}
+    assert stages.count('yolo') < 20
+    assert yolo_summary['yolo_share'] == 1.0
+    assert cascade_summary['recall'] >= 0.95 and yolo_summary['recall'] >= 0.95
+
+
+if __name__ == "__main__":
+    test_config_axes()
+    test_session_objects_drive_cascade()
+    print("✅ 回归评测测试全部通过")
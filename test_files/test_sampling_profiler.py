@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+测试采样分析器 - 折叠栈内容、提前结束条件、同一时间只允许一次分析
+"""
+import sys
+sys.path.append('backend')
+
+from sampling_profiler import ProfilerBusy, SamplingProfiler, collapse
+import threading
+import time
+
+
+def busy_inference(stop_event):
+    while not stop_event.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_collapsed_stacks_cover_worker_threads():
+    """工作线程的调用栈以线程名开头出现在折叠栈中，分析结束后不留下线程"""
+    print("🧪 测试折叠栈")
+    threads_before = threading.active_count()
+    stop_event = threading.Event()
+    worker = threading.Thread(target=busy_inference, args=(stop_event,), name='inference_0')
+    worker.start()
+    try:
+        result = SamplingProfiler().profile(0.3, interval=0.005)
+    finally:
+        stop_event.set()
+        worker.join()
+    text = collapse(result['stacks'])
+    print(f"   🔥 {result['samples']} 次采样, {len(result['stacks'])} 种调用栈")
+    hot = [line for line in text.splitlines() if line.startswith('inference_0;') and 'busy_inference' in line]
+    assert hot and sum(int(line.rsplit(' ', 1)[1]) for line in hot) >= result['samples'] * 0.8
+    assert threading.active_count() == threads_before
+
+
+def test_stop_condition_and_busy():
+    """stop() 为真时提前结束；分析进行中再次请求抛出 ProfilerBusy"""
+    print("🧪 测试提前结束与并发请求")
+    profiler = SamplingProfiler()
+    start = time.monotonic()
+    deadline = start + 0.1
+    result = profiler.profile(10.0, stop=lambda: time.monotonic() > deadline)
+    assert result['duration'] < 1.0
+
+    errors = []
+    runner = threading.Thread(target=profiler.profile, args=(0.3,))
+    runner.start()
+    time.sleep(0.05)
+    try:
+        profiler.profile(0.1)
+    except ProfilerBusy as e:
+        errors.append(e)
+    runner.join()
+    assert len(errors) == 1 and not profiler.running
+
+
+if __name__ == "__main__":
+    test_collapsed_stacks_cover_worker_threads()
+    test_stop_condition_and_busy()
+    print("✅ 采样分析器测试全部通过")
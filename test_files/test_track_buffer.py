@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+测试足球轨迹环形缓冲区 - 淘汰顺序、零拷贝视图、与列表历史的轨迹一致
+"""
+import sys
+sys.path.append('ai_model')
+
+from track_buffer import TrackBuffer
+from soccer_detector import SoccerDetector
+import json
+import numpy as np
+
+
+def ball(i, t):
+    x, y = 100.0 + 12 * i + 0.5 * i * i, 300.0 - 4 * i
+    return {
+        'bbox': [x - 8, y - 8, x + 8, y + 8],
+        'confidence': 0.9,
+        'class_name': 'sports ball',
+        'center': [x, y],
+        'detection_method': 'yolo',
+        'timestamp': t
+    }
+
+
+def test_ring_buffer_eviction_and_views():
+    """超过容量后淘汰最旧记录，任意窗口都是底层数组的连续视图"""
+    print("🧪 测试环形缓冲区")
+    buffer = TrackBuffer(capacity=8)
+    for i in range(21):
+        buffer.append(ball(i, i * 0.1))
+        window = buffer.window()
+        assert len(window) == min(i + 1, 8)
+        assert np.allclose(window['timestamp'], np.arange(max(0, i - 7), i + 1) * 0.1)
+        for n in range(1, len(window) + 1):
+            assert np.shares_memory(buffer.window(n), buffer._data)
+            assert np.array_equal(buffer.window(n), window[-n:])
+
+    latest = buffer.latest()
+    assert latest['detection_method'] == 'yolo' and latest['class_name'] == 'sports ball'
+    assert np.allclose(latest['center'], ball(20, 2.0)['center'])
+    print(f"   💾 {buffer.capacity} 条记录占用 {buffer._data.nbytes} 字节")
+
+
+def test_trajectory_matches_list_history():
+    """TrackBuffer 与字典列表得到相同的轨迹"""
+    print("🧪 测试轨迹计算一致")
+    detector = SoccerDetector.__new__(SoccerDetector)
+    history, buffer = [], TrackBuffer(capacity=30)
+    for i in range(40):
+        detection = ball(i, 1000.0 + i / 3)
+        history = (history + [detection])[-30:]
+        buffer.append(detection)
+
+    expected = detector.calculate_ball_trajectory(history)
+    actual = detector.calculate_ball_trajectory(buffer)
+    for key in ('positions', 'velocities', 'accelerations'):
+        assert np.allclose(actual[key], expected[key], atol=1e-3), key
+    assert np.isclose(actual['speed'], expected['speed'], atol=1e-3)
+
+
+
+def test_repeated_timestamps_stay_finite():
+    """重复或乱序的时间戳被丢弃：两种历史形式结果相同，速度都是有限值，可以序列化为合法JSON"""
+    print("🧪 测试重复时间戳")
+    detector = SoccerDetector.__new__(SoccerDetector)
+    times = [0.0, 0.1, 0.1, 0.2, 0.15, 0.3]
+    history = [ball(i, t) for i, t in enumerate(times)]
+    buffer = TrackBuffer(capacity=30)
+    for detection in history:
+        buffer.append(detection)
+
+    expected = detector.calculate_ball_trajectory(history)
+    actual = detector.calculate_ball_trajectory(buffer)
+    assert len(actual['positions']) == 4
+    for key in ('positions', 'velocities', 'accelerations'):
+        assert np.isfinite(actual[key]).all() and np.allclose(actual[key], expected[key], atol=1e-3), key
+    json.dumps(actual, allow_nan=False)
+
+
+if __name__ == "__main__":
+    test_ring_buffer_eviction_and_views()
+    test_trajectory_matches_list_history()
+    test_repeated_timestamps_stay_finite()
+    print("✅ 轨迹缓冲区测试全部通过")
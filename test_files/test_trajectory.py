@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+测试增量轨迹估计器 - 与对整段历史做差分的结果一致
+"""
+import sys
+sys.path.append('ai_model')
+
+from trajectory import TrajectoryEstimator
+import numpy as np
+
+
+def full_history_trajectory(positions, times):
+    """原先每帧对整段历史重新计算的做法"""
+    velocities = np.diff(positions, axis=0) / np.diff(times).reshape(-1, 1)
+    accelerations = np.diff(velocities, axis=0) / np.diff(times[1:]).reshape(-1, 1)
+    return velocities, accelerations
+
+
+def test_matches_full_history():
+    """逐帧增量更新的速度、加速度与整段差分相同（包括超过历史长度后）"""
+    print("🧪 测试增量结果与整段差分一致")
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.uniform(0.03, 1.0, 80))
+    positions = np.cumsum(rng.normal(0, 20, (80, 2)), axis=0) + 500
+
+    estimator = TrajectoryEstimator(max_history=30)
+    for i, (position, t) in enumerate(zip(positions, times)):
+        estimator.add(position, t)
+        window = slice(max(0, i - 29), i + 1)
+        if i < 2:
+            assert estimator.summary() is None
+            continue
+        velocities, accelerations = full_history_trajectory(positions[window], times[window])
+        trajectory = estimator.to_dict()
+        assert np.allclose(trajectory['positions'], positions[window])
+        assert np.allclose(trajectory['velocities'], velocities)
+        assert np.allclose(trajectory['accelerations'], accelerations)
+        assert np.isclose(estimator.speed, np.linalg.norm(velocities[-1]))
+        assert np.allclose(estimator.summary()['acceleration'], accelerations[-1])
+
+    assert np.allclose(estimator.positions(recent=5), positions[-5:])
+    print(f"   📍 最终速率 {estimator.speed:.1f}px/s, 保留 {len(estimator)} 个样本")
+
+
+def test_rejects_out_of_order_samples():
+    """重复或乱序的采集时间不会产生无穷大的速度"""
+    print("🧪 测试乱序时间戳")
+    estimator = TrajectoryEstimator()
+    assert estimator.add([0, 0], 1.0)
+    assert estimator.add([10, 0], 2.0)
+    assert not estimator.add([20, 0], 2.0)
+    assert not estimator.add([20, 0], 1.5)
+    assert estimator.add([30, 0], 3.0)
+    assert estimator.velocity == [20.0, 0.0]
+    assert estimator.acceleration == [10.0, 0.0]
+
+
+if __name__ == "__main__":
+    test_matches_full_history()
+    test_rejects_out_of_order_samples()
+    print("✅ 轨迹估计测试全部通过")